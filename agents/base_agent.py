@@ -1,30 +1,129 @@
-from agno.agent import Agent
-from openai import OpenAI
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from utils.config import OPENAI_API_KEY
-from typing import List, Optional
+from utils.tracing import annotate, span
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
+    from openai import OpenAI
+
+MODEL = "gpt-4-turbo-preview"
+
+_client: Optional["OpenAI"] = None
+_client_lock = threading.Lock()
+
+# Token usage of the completions made inside the innermost count_tokens block
+_token_counts: ContextVar[Optional[Dict[str, int]]] = ContextVar("token_counts", default=None)
+
+
+def shared_openai_client() -> "OpenAI":
+    """Get the OpenAI client every agent uses, so they share one HTTP connection pool"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+@contextmanager
+def count_tokens() -> Iterator[Dict[str, int]]:
+    """Add up the token usage of the completions made inside the block
+
+    Counts are kept per thread, so agents shared between workers each report
+    only their own caller's calls. They stay at zero if the client reports no usage.
+    """
+    counts = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    token = _token_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _token_counts.reset(token)
+
 
 class BaseAgent:
+    # Names of the Function attributes defined by each subclass, discovered once per class
+    _tool_attr_names: Dict[type, List[str]] = {}
+
     def __init__(self, name: str, description: str, tools: Optional[List] = None):
         self.name = name
         self.description = description
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        
+        self._client: Optional["OpenAI"] = None
+
         # Collect tools from subclass
         agent_tools = []
         if tools:
             agent_tools.extend(tools)
-        
-        # Check if subclass has defined any function attributes
-        for attr_name in dir(self):
-            attr = getattr(self, attr_name)
-            if hasattr(attr, '__class__') and attr.__class__.__name__ == 'Function':
-                agent_tools.append(attr)
-        
-        self.agent = Agent(
-            name=name,
-            description=description,
-            tools=agent_tools if agent_tools else None
-        )
-    
+        agent_tools.extend(getattr(self, attr_name) for attr_name in self._tool_names())
+        self.tools = agent_tools
+        self._agent: Optional["Agent"] = None
+
+    def _tool_names(self) -> List[str]:
+        cls = type(self)
+        names = BaseAgent._tool_attr_names.get(cls)
+        if names is None:
+            # Check if subclass has defined any function attributes, skipping properties
+            # so that discovery doesn't build the agno agent
+            names = []
+            for attr_name in dir(self):
+                if isinstance(getattr(cls, attr_name, None), property):
+                    continue
+                attr = getattr(self, attr_name)
+                if attr.__class__.__name__ == 'Function':
+                    names.append(attr_name)
+            BaseAgent._tool_attr_names[cls] = names
+        return names
+
+    @property
+    def client(self) -> "OpenAI":
+        # Resolved on first use, so an agent can be built, or handed another client, without a key
+        if self._client is None:
+            self._client = shared_openai_client()
+        return self._client
+
+    @client.setter
+    def client(self, client: "OpenAI"):
+        self._client = client
+
+    @property
+    def agent(self) -> "Agent":
+        # Built on first use since the pipelines call the handlers directly
+        if self._agent is None:
+            from agno.agent import Agent
+            self._agent = Agent(
+                name=self.name,
+                description=self.description,
+                tools=self.tools if self.tools else None
+            )
+        return self._agent
+
+    def complete_json(self, system_prompt: str, prompt: str) -> Dict[str, Any]:
+        """Ask the model for a JSON object, recording sizes and token usage on a span"""
+        with span("llm.chat_completion", agent=self.name, model=MODEL, prompt_chars=len(prompt)):
+            response = self.client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"}
+            )
+            content = response.choices[0].message.content
+            annotate(response_chars=len(content))
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                annotate(prompt_tokens=usage.prompt_tokens,
+                         completion_tokens=usage.completion_tokens,
+                         total_tokens=usage.total_tokens)
+                counts = _token_counts.get()
+                if counts is not None:
+                    for field in counts:
+                        counts[field] += getattr(usage, field)
+        return json.loads(content)
+
     def run(self, *args, **kwargs):
-        raise NotImplementedError("Subclasses must implement run method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement run method")
@@ -1,36 +1,16 @@
 import json
 from typing import Dict
 from agents.base_agent import BaseAgent
-from agno.agent import Function
+from utils.tracing import annotate, span
 
-class CoverLetterWriterAgent(BaseAgent):
-    def __init__(self):
-        self.write_cover_letter = Function(
-            name="write_cover_letter",
-            description="Generate a tailored cover letter",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "cv_data": {"type": "string", "description": "JSON string of CV analysis"},
-                    "job_data": {"type": "string", "description": "JSON string of job analysis"},
-                    "tone": {"type": "string", "description": "Tone of the letter (professional, enthusiastic, etc.)"}
-                },
-                "required": ["cv_data", "job_data"]
-            },
-            handler=self.write_cover_letter_handler
-        )
-        
-        super().__init__(
-            name="Cover Letter Writer",
-            description="Generates personalized cover letters based on CV and job requirements"
-        )
-    
-    def write_cover_letter_handler(self, cv_data: str, job_data: str, 
-                                 tone: str = "professional") -> Dict:
-        cv = json.loads(cv_data)
-        job = json.loads(job_data)
-        
-        prompt = f"""
+SYSTEM_PROMPT = "You are a professional cover letter writer creating compelling, personalized cover letters."
+# Tones a letter can be written in, the first being the default
+TONES = ("professional", "enthusiastic", "confident", "friendly")
+
+
+def build_cover_letter_prompt(cv: Dict, job: Dict, tone: str = "professional") -> str:
+    """Build the prompt asking for a cover letter for a CV and job in the given tone"""
+    return f"""
         Write a compelling cover letter for the following job application.
         
         Candidate CV Data:
@@ -68,28 +48,54 @@ class CoverLetterWriterAgent(BaseAgent):
             "full_text": ""
         }}
         """
+
+
+def join_cover_letter(sections: Dict[str, str]) -> str:
+    """Join the sections of a generated cover letter into its full text"""
+    full_text = f"{sections['salutation']}\n\n"
+    full_text += f"{sections['opening_paragraph']}\n\n"
+    full_text += f"{sections['body_paragraph_1']}\n\n"
+    full_text += f"{sections['body_paragraph_2']}\n\n"
+    full_text += f"{sections['body_paragraph_3']}\n\n"
+    full_text += f"{sections['closing_paragraph']}\n\n"
+    full_text += sections['sign_off']
+    return full_text
+
+
+class CoverLetterWriterAgent(BaseAgent):
+    def __init__(self):
+        from agno.agent import Function
         
-        response = self.client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a professional cover letter writer creating compelling, personalized cover letters."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+        self.write_cover_letter = Function(
+            name="write_cover_letter",
+            description="Generate a tailored cover letter",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "cv_data": {"type": "string", "description": "JSON string of CV analysis"},
+                    "job_data": {"type": "string", "description": "JSON string of job analysis"},
+                    "tone": {"type": "string", "description": "Tone of the letter (professional, enthusiastic, etc.)"}
+                },
+                "required": ["cv_data", "job_data"]
+            },
+            handler=self.write_cover_letter_handler
         )
         
-        result = json.loads(response.choices[0].message.content)
-        
-        sections = result['cover_letter']
-        full_text = f"{sections['salutation']}\n\n"
-        full_text += f"{sections['opening_paragraph']}\n\n"
-        full_text += f"{sections['body_paragraph_1']}\n\n"
-        full_text += f"{sections['body_paragraph_2']}\n\n"
-        full_text += f"{sections['body_paragraph_3']}\n\n"
-        full_text += f"{sections['closing_paragraph']}\n\n"
-        full_text += sections['sign_off']
+        super().__init__(
+            name="Cover Letter Writer",
+            description="Generates personalized cover letters based on CV and job requirements"
+        )
+    
+    def write_cover_letter_handler(self, cv_data: str, job_data: str, 
+                                 tone: str = "professional") -> Dict:
+        with span("prompt.build", agent=self.name):
+            cv = json.loads(cv_data)
+            job = json.loads(job_data)
+            prompt = build_cover_letter_prompt(cv, job, tone)
+            annotate(chars=len(prompt))
+        result = self.complete_json(SYSTEM_PROMPT, prompt)
         
-        result['full_text'] = full_text
+        result['full_text'] = join_cover_letter(result['cover_letter'])
         
         return result
     
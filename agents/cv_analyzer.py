@@ -1,39 +1,30 @@
-import json
-import PyPDF2
-from typing import Dict
+from typing import BinaryIO, Dict, Union
 from agents.base_agent import BaseAgent
-from agno.agent import Function
+from utils.tracing import annotate, span
 
-class CVAnalyzerAgent(BaseAgent):
-    def __init__(self):
-        self.analyze_cv = Function(
-            name="analyze_cv",
-            description="Extract and analyze information from CV",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "cv_text": {"type": "string", "description": "The extracted text from CV PDF"}
-                },
-                "required": ["cv_text"]
-            },
-            handler=self.analyze_cv_handler
-        )
-        
-        super().__init__(
-            name="CV Analyzer",
-            description="Analyzes CV/Resume PDFs and extracts structured information"
-        )
+SYSTEM_PROMPT = "You are a professional CV analyzer. Extract information accurately and return valid JSON."
+
+
+def extract_text_from_pdf(pdf: Union[str, BinaryIO]) -> str:
+    """Extract the text of every page from a PDF path or binary file object"""
+    if isinstance(pdf, str):
+        with open(pdf, 'rb') as file:
+            return extract_text_from_pdf(file)
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+    import PyPDF2
     
-    def analyze_cv_handler(self, cv_text: str) -> Dict:
-        prompt = f"""
+    with span("pdf.extract"):
+        text = ""
+        pdf_reader = PyPDF2.PdfReader(pdf)
+        for page in pdf_reader.pages:
+            text += page.extract_text() + "\n"
+        annotate(pages=len(pdf_reader.pages), chars=len(text))
+    return text
+
+
+def build_cv_prompt(cv_text: str) -> str:
+    """Build the prompt asking for the structured analysis of a CV"""
+    return f"""
         Analyze the following CV/Resume and extract structured information:
         
         {cv_text}
@@ -83,17 +74,38 @@ class CVAnalyzerAgent(BaseAgent):
             "achievements": []
         }}
         """
+
+
+class CVAnalyzerAgent(BaseAgent):
+    def __init__(self):
+        from agno.agent import Function
         
-        response = self.client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a professional CV analyzer. Extract information accurately and return valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+        self.analyze_cv = Function(
+            name="analyze_cv",
+            description="Extract and analyze information from CV",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "cv_text": {"type": "string", "description": "The extracted text from CV PDF"}
+                },
+                "required": ["cv_text"]
+            },
+            handler=self.analyze_cv_handler
         )
         
-        return json.loads(response.choices[0].message.content)
+        super().__init__(
+            name="CV Analyzer",
+            description="Analyzes CV/Resume PDFs and extracts structured information"
+        )
+    
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
+        return extract_text_from_pdf(pdf_path)
+    
+    def analyze_cv_handler(self, cv_text: str) -> Dict:
+        with span("prompt.build", agent=self.name):
+            prompt = build_cv_prompt(cv_text)
+            annotate(chars=len(prompt))
+        return self.complete_json(SYSTEM_PROMPT, prompt)
     
     def run(self, pdf_path: str) -> Dict:
         extracted_text = self.extract_text_from_pdf(pdf_path)
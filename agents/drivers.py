@@ -0,0 +1,165 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional
+
+from utils.config import DRIVER_POOL_SIZE
+from utils.tracing import annotate, span
+
+# Seconds a loaded page is given to run its scripts before its source is read
+PAGE_SETTLE_SECONDS = 3
+# Most seconds spent waiting for a page's ready_selector to match before reading it anyway
+PAGE_READY_TIMEOUT_SECONDS = 10
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+
+def create_driver() -> "WebDriver":
+    """Start a headless Chrome"""
+    # Imported here so that pages which never scrape don't pay for selenium
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+
+    with span("driver.start"):
+        service = Service(ChromeDriverManager().install())
+        return webdriver.Chrome(service=service, options=options)
+
+
+def wait_for_selector(driver: "WebDriver", selector: str, timeout: float) -> bool:
+    """Wait until an element matches a CSS selector, returning False if none did in time"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.find_elements(By.CSS_SELECTOR, selector)
+        )
+    except TimeoutException:
+        return False
+    return True
+
+
+class DriverPool:
+    """Keeps up to size browsers running and lends them out one caller at a time
+
+    Starting Chrome takes seconds, so drivers are reused across scrapes
+    rather than started and quit for each one. A driver whose use raised is
+    quit instead of returned, in case the browser itself is broken.
+    """
+
+    def __init__(self, size: int = DRIVER_POOL_SIZE,
+                 factory: Callable[[], "WebDriver"] = create_driver,
+                 settle_seconds: float = PAGE_SETTLE_SECONDS):
+        self.size = size
+        self.factory = factory
+        self.settle_seconds = settle_seconds
+        self._idle: List["WebDriver"] = []
+        self._started = 0
+        self._closed = False
+        self._available = threading.Condition()
+
+    @contextmanager
+    def driver(self) -> Iterator["WebDriver"]:
+        """Borrow a driver, waiting for one when all of them are in use"""
+        with self._available:
+            while not self._closed and not self._idle and self._started >= self.size:
+                self._available.wait()
+            if self._closed:
+                raise RuntimeError("Driver pool is closed")
+            if self._idle:
+                driver = self._idle.pop()
+            else:
+                self._started += 1
+                driver = None
+        if driver is None:
+            try:
+                driver = self.factory()
+            except BaseException:
+                self._discard(None)
+                raise
+
+        # Anything escaping the caller's block, even KeyboardInterrupt, gives the slot back
+        finished = False
+        try:
+            yield driver
+            finished = True
+        finally:
+            if not finished:
+                self._discard(driver)
+            else:
+                with self._available:
+                    if self._closed:
+                        driver.quit()
+                    else:
+                        self._idle.append(driver)
+                    self._available.notify()
+
+    def page_source(self, url: str, ready_selector: Optional[str] = None,
+                    timeout: float = PAGE_READY_TIMEOUT_SECONDS) -> str:
+        """Load a page in a borrowed driver and return its HTML once it has settled
+
+        With ready_selector, the HTML is read as soon as an element matches that
+        CSS selector, or after timeout seconds, e.g. for a page without results,
+        instead of after the fixed settle time.
+        """
+        with span("page.load", url=url):
+            waiting = time.perf_counter()
+            with self.driver() as driver:
+                annotate(pool_wait_ms=round((time.perf_counter() - waiting) * 1000, 3))
+                driver.get(url)
+                if ready_selector:
+                    annotate(ready=wait_for_selector(driver, ready_selector, timeout))
+                else:
+                    time.sleep(self.settle_seconds)
+                page_source = driver.page_source
+            annotate(html_chars=len(page_source))
+            return page_source
+
+    def _discard(self, driver: Optional["WebDriver"]):
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        with self._available:
+            self._started -= 1
+            self._available.notify()
+
+    def close(self):
+        """Quit the idle drivers; drivers in use are quit when they're given back"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+            self._available.notify_all()
+        for driver in idle:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Get the process-wide driver pool, whose browsers are quit when the process exits"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = DriverPool()
+                atexit.register(_pool.close)
+    return _pool
@@ -1,72 +1,46 @@
-import json
-from typing import Dict
+from typing import Dict, Optional
 from agents.base_agent import BaseAgent
-from agno.agent import Function
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-import time
-from bs4 import BeautifulSoup
+from agents.drivers import DriverPool, get_driver_pool
+from utils.tracing import annotate, span
 
-class JobAnalyzerAgent(BaseAgent):
-    def __init__(self):
-        self.analyze_job = Function(
-            name="analyze_job",
-            description="Analyze a job posting from LinkedIn URL",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "job_url": {"type": "string", "description": "LinkedIn job posting URL"},
-                    "job_content": {"type": "string", "description": "Job posting content"}
-                },
-                "required": ["job_content"]
-            },
-            handler=self.analyze_job_handler
-        )
-        
-        super().__init__(
-            name="Job Analyzer",
-            description="Analyzes LinkedIn job postings from URL"
-        )
-    
-    def setup_driver(self):
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
-    
-    def scrape_job_content(self, url: str) -> str:
-        driver = self.setup_driver()
-        content = ""
-        
-        try:
-            driver.get(url)
-            time.sleep(3)
-            
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            job_description = soup.find('div', class_='description__text')
-            if job_description:
-                content = job_description.get_text(strip=True, separator='\n')
-            else:
-                content = "Could not extract job description"
-                
-        except Exception as e:
-            content = f"Error scraping job: {e}"
-        finally:
-            driver.quit()
-        
+NO_DESCRIPTION = "Could not extract job description"
+SCRAPE_ERROR_PREFIX = "Error scraping job:"
+POSTING_REMOVED = "Job posting is no longer accepting applications"
+# LinkedIn puts this banner on a posting once it's closed
+CLOSED_BANNER_CLASS = "closed-job"
+CLOSED_BANNER_TEXT = "No longer accepting applications"
+SYSTEM_PROMPT = "You are a job posting analyzer. Extract information accurately and return valid JSON."
+
+
+def is_scrape_failure(content: str) -> bool:
+    """Check whether scraped content is one of the placeholder messages instead of a description"""
+    return content in (NO_DESCRIPTION, POSTING_REMOVED) or content.startswith(SCRAPE_ERROR_PREFIX)
+
+
+def parse_job_description(page_source: str) -> str:
+    """Get the description text of a job posting page, or a placeholder if closed or missing"""
+    from bs4 import BeautifulSoup
+    with span("parse.job_posting", html_chars=len(page_source)):
+        soup = BeautifulSoup(page_source, 'html.parser')
+
+        # Only the banner counts, since a description can mention the phrase too
+        banner = soup.find(class_=CLOSED_BANNER_CLASS)
+        if banner and CLOSED_BANNER_TEXT.casefold() in banner.get_text().casefold():
+            annotate(found=False, closed=True)
+            return POSTING_REMOVED
+
+        job_description = soup.find('div', class_='description__text')
+        if not job_description:
+            annotate(found=False)
+            return NO_DESCRIPTION
+        content = job_description.get_text(strip=True, separator='\n')
+        annotate(found=True, chars=len(content))
         return content
-    
-    def analyze_job_handler(self, job_content: str) -> Dict:
-        prompt = f"""
+
+
+def build_job_prompt(job_content: str) -> str:
+    """Build the prompt asking for the structured analysis of a job posting"""
+    return f"""
         Analyze the following job posting and extract structured information:
         
         {job_content}
@@ -94,20 +68,55 @@ class JobAnalyzerAgent(BaseAgent):
             "preferred_qualifications": []
         }}
         """
+
+
+class JobAnalyzerAgent(BaseAgent):
+    def __init__(self, driver_pool: Optional[DriverPool] = None):
+        # Scrapes go through the process-wide browsers unless given a pool of their own
+        self.driver_pool = driver_pool or get_driver_pool()
+        from agno.agent import Function
         
-        response = self.client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a job posting analyzer. Extract information accurately and return valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+        self.analyze_job = Function(
+            name="analyze_job",
+            description="Analyze a job posting from LinkedIn URL",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "job_url": {"type": "string", "description": "LinkedIn job posting URL"},
+                    "job_content": {"type": "string", "description": "Job posting content"}
+                },
+                "required": ["job_content"]
+            },
+            handler=self.analyze_job_handler
         )
         
-        return json.loads(response.choices[0].message.content)
+        super().__init__(
+            name="Job Analyzer",
+            description="Analyzes LinkedIn job postings from URL"
+        )
+    
+    def scrape_job_content(self, url: str) -> str:
+        content = ""
+        
+        try:
+            page_source = self.driver_pool.page_source(url)
+            content = parse_job_description(page_source)
+            
+        except Exception as e:
+            content = f"{SCRAPE_ERROR_PREFIX} {e}"
+        
+        return content
+    
+    def analyze_job_handler(self, job_content: str) -> Dict:
+        with span("prompt.build", agent=self.name):
+            prompt = build_job_prompt(job_content)
+            annotate(chars=len(prompt))
+        return self.complete_json(SYSTEM_PROMPT, prompt)
     
     def run(self, job_url: str) -> Dict:
         job_content = self.scrape_job_content(job_url)
+        if job_content == POSTING_REMOVED:
+            raise ValueError(f"{POSTING_REMOVED}: {job_url}")
         result = self.analyze_job_handler(job_content=job_content)
         result['job_url'] = job_url
         return result
\ No newline at end of file
@@ -1,17 +1,80 @@
 import json
-from typing import Dict, List
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
 from agents.base_agent import BaseAgent
-from agno.agent import Function
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-import time
-from bs4 import BeautifulSoup
+from agents.drivers import DriverPool, get_driver_pool
+from utils.config import SEARCH_MAX_RESULTS
+from utils.tracing import annotate, span
+
+# Matches each job card of a LinkedIn search results page
+JOB_CARD_SELECTOR = "div.base-card"
+# Results pages read per search at most, however few cards they hold
+MAX_SEARCH_PAGES = 10
+
+
+def build_search_url(job_title: str, location: str = "", start: int = 0) -> str:
+    """Build the LinkedIn job search URL for a title and optional location
+
+    start is the number of results to skip, for the pages after the first.
+    """
+    search_url = f"https://www.linkedin.com/jobs/search/?keywords={job_title}"
+    if location:
+        search_url += f"&location={location}"
+    if start:
+        search_url += f"&start={start}"
+    return search_url
+
+
+def iter_job_cards(page_source: str, experience_level: str = "",
+                   posted_date: str = "") -> Iterator[Dict]:
+    """Yield the job cards of a LinkedIn search results page one at a time, in page order"""
+    from bs4 import BeautifulSoup
+    with span("parse.search_results", html_chars=len(page_source)):
+        soup = BeautifulSoup(page_source, 'html.parser')
+        cards = soup.select(JOB_CARD_SELECTOR)
+        annotate(cards=len(cards))
+
+    for card in cards:
+        job = {}
+
+        title_elem = card.find('h3', class_='base-search-card__title')
+        job['title'] = title_elem.text.strip() if title_elem else "N/A"
+
+        company_elem = card.find('h4', class_='base-search-card__subtitle')
+        job['company'] = company_elem.text.strip() if company_elem else "N/A"
+
+        location_elem = card.find('span', class_='job-search-card__location')
+        job['location'] = location_elem.text.strip() if location_elem else "N/A"
+
+        link_elem = card.find('a', class_='base-card__full-link')
+        job['url'] = link_elem['href'] if link_elem else "N/A"
+
+        job['posted_date'] = posted_date if posted_date else "Recent"
+        job['experience_level'] = experience_level if experience_level else "Not specified"
+
+        yield job
+
+
+def parse_job_cards(page_source: str, experience_level: str = "",
+                    posted_date: str = "", max_results: int = SEARCH_MAX_RESULTS) -> List[Dict]:
+    """Read the job cards of a LinkedIn search results page"""
+    return list(islice(iter_job_cards(page_source, experience_level, posted_date), max_results))
+
+
+def _job_identity(job: Dict) -> tuple:
+    # Results shift between page loads, so a card can show up again on the next page
+    if job['url'] != "N/A":
+        return (job['url'],)
+    return (job['title'], job['company'], job['location'])
+
 
 class JobSearchAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, driver_pool: Optional[DriverPool] = None):
+        # Scrapes go through the process-wide browsers unless given a pool of their own
+        self.driver_pool = driver_pool or get_driver_pool()
+
+        from agno.agent import Function
+        
         self.search_function = Function(
             name="search_jobs",
             description="Search LinkedIn jobs with filters",
@@ -33,58 +96,50 @@ class JobSearchAgent(BaseAgent):
             description="Searches for jobs on LinkedIn based on filters"
         )
     
-    def setup_driver(self):
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
-    
+    def iter_jobs(self, filters: Dict, max_results: int = SEARCH_MAX_RESULTS) -> Iterator[Dict]:
+        """Yield each job of a search as soon as its results page is read
+
+        The first page's jobs are yielded before the next page is loaded, and
+        pages are read until max_results jobs were found or a page adds none.
+        """
+        job_title = filters.get('job_title', '')
+        location = filters.get('location', '')
+        experience_level = filters.get('experience_level', '')
+        posted_date = filters.get('posted_date', '')
+
+        seen = set()
+        start = 0
+        for _ in range(MAX_SEARCH_PAGES):
+            page_source = self.driver_pool.page_source(
+                build_search_url(job_title, location, start), ready_selector=JOB_CARD_SELECTOR
+            )
+            cards = added = 0
+            for job in iter_job_cards(page_source, experience_level, posted_date):
+                cards += 1
+                if _job_identity(job) in seen:
+                    continue
+                seen.add(_job_identity(job))
+                added += 1
+                yield job
+                if len(seen) >= max_results:
+                    return
+            # Past the last page, LinkedIn repeats results or shows none
+            if added == 0:
+                return
+            start += cards
+
     def search_jobs_handler(self, job_title: str, location: str = "", 
                            experience_level: str = "", posted_date: str = "") -> List[Dict]:
-        driver = self.setup_driver()
         jobs = []
         
         try:
-            search_url = f"https://www.linkedin.com/jobs/search/?keywords={job_title}"
-            if location:
-                search_url += f"&location={location}"
-            
-            driver.get(search_url)
-            time.sleep(3)
-            
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            job_cards = soup.find_all('div', class_='base-card')[:10]
-            
-            for card in job_cards:
-                job = {}
-                
-                title_elem = card.find('h3', class_='base-search-card__title')
-                job['title'] = title_elem.text.strip() if title_elem else "N/A"
-                
-                company_elem = card.find('h4', class_='base-search-card__subtitle')
-                job['company'] = company_elem.text.strip() if company_elem else "N/A"
-                
-                location_elem = card.find('span', class_='job-search-card__location')
-                job['location'] = location_elem.text.strip() if location_elem else "N/A"
-                
-                link_elem = card.find('a', class_='base-card__full-link')
-                job['url'] = link_elem['href'] if link_elem else "N/A"
-                
-                job['posted_date'] = posted_date if posted_date else "Recent"
-                job['experience_level'] = experience_level if experience_level else "Not specified"
-                
+            filters = {"job_title": job_title, "location": location,
+                       "experience_level": experience_level, "posted_date": posted_date}
+            for job in self.iter_jobs(filters):
                 jobs.append(job)
                 
         except Exception as e:
             print(f"Error searching jobs: {e}")
-        finally:
-            driver.quit()
         
         return jobs
     
@@ -95,4 +150,4 @@ class JobSearchAgent(BaseAgent):
             location=filters.get('location', ''),
             experience_level=filters.get('experience_level', ''),
             posted_date=filters.get('posted_date', '')
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,37 @@
+import threading
+import time
+from typing import Dict, Type, TypeVar
+from agents.base_agent import BaseAgent
+
+AgentT = TypeVar("AgentT", bound=BaseAgent)
+
+# Process-wide, so Streamlit reruns and sessions all share one instance per agent class
+_agents: Dict[type, BaseAgent] = {}
+_construction_seconds: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def get_agent(agent_class: Type[AgentT]) -> AgentT:
+    """Get the shared instance of an agent class, constructing it on first use"""
+    agent = _agents.get(agent_class)
+    if agent is None:
+        with _lock:
+            agent = _agents.get(agent_class)
+            if agent is None:
+                start = time.perf_counter()
+                agent = agent_class()
+                _construction_seconds[agent_class.__name__] = time.perf_counter() - start
+                _agents[agent_class] = agent
+    return agent
+
+
+def construction_times() -> Dict[str, float]:
+    """Get how long each registered agent took to construct, in seconds"""
+    return dict(_construction_seconds)
+
+
+def clear():
+    """Drop all shared agents so the next get_agent call rebuilds them"""
+    with _lock:
+        _agents.clear()
+        _construction_seconds.clear()
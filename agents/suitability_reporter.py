@@ -1,34 +1,14 @@
 import json
 from typing import Dict
 from agents.base_agent import BaseAgent
-from agno.agent import Function
+from utils.tracing import annotate, span
 
-class SuitabilityReporterAgent(BaseAgent):
-    def __init__(self):
-        self.generate_report = Function(
-            name="generate_report",
-            description="Generate suitability report for job application",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "cv_data": {"type": "string", "description": "JSON string of CV analysis"},
-                    "job_data": {"type": "string", "description": "JSON string of job analysis"}
-                },
-                "required": ["cv_data", "job_data"]
-            },
-            handler=self.generate_report_handler
-        )
-        
-        super().__init__(
-            name="Suitability Reporter",
-            description="Generates job suitability reports by comparing CV and job requirements"
-        )
-    
-    def generate_report_handler(self, cv_data: str, job_data: str) -> Dict:
-        cv = json.loads(cv_data)
-        job = json.loads(job_data)
-        
-        prompt = f"""
+SYSTEM_PROMPT = "You are a career advisor generating detailed job suitability reports."
+
+
+def build_report_prompt(cv: Dict, job: Dict) -> str:
+    """Build the prompt asking for a suitability report comparing a CV with a job"""
+    return f"""
         Generate a comprehensive job suitability report by comparing the candidate's CV with the job requirements.
         
         CV Data:
@@ -91,17 +71,38 @@ class SuitabilityReporterAgent(BaseAgent):
             }}
         }}
         """
+
+
+class SuitabilityReporterAgent(BaseAgent):
+    def __init__(self):
+        from agno.agent import Function
         
-        response = self.client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a career advisor generating detailed job suitability reports."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+        self.generate_report = Function(
+            name="generate_report",
+            description="Generate suitability report for job application",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "cv_data": {"type": "string", "description": "JSON string of CV analysis"},
+                    "job_data": {"type": "string", "description": "JSON string of job analysis"}
+                },
+                "required": ["cv_data", "job_data"]
+            },
+            handler=self.generate_report_handler
         )
         
-        return json.loads(response.choices[0].message.content)
+        super().__init__(
+            name="Suitability Reporter",
+            description="Generates job suitability reports by comparing CV and job requirements"
+        )
+    
+    def generate_report_handler(self, cv_data: str, job_data: str) -> Dict:
+        with span("prompt.build", agent=self.name):
+            cv = json.loads(cv_data)
+            job = json.loads(job_data)
+            prompt = build_report_prompt(cv, job)
+            annotate(chars=len(prompt))
+        return self.complete_json(SYSTEM_PROMPT, prompt)
     
     def run(self, cv_analysis: Dict, job_analysis: Dict) -> Dict:
         cv_data = json.dumps(cv_analysis)
@@ -0,0 +1,267 @@
+"""HTTP API over the background task queue
+
+Callers submit work and get a task ID back straight away; the work runs in
+the same bounded worker pools the Streamlit pages use, so the agents, their
+OpenAI client, the browser pool and the database connection are shared by
+every caller for the lifetime of the process. A full pool answers 429 with
+Retry-After instead of queueing without bound.
+
+Endpoints:
+    POST /tasks                  {"task_type": ..., "params": {...}} -> 202 {"task_id", ...}
+    POST /cv-analyses            PDF request body (?force_refresh=true) -> 202 {"task_id", ...}
+    GET  /tasks/{id}?wait=30     task state; with wait, long-polls until it finishes
+    GET  /tasks/{id}/result      the document a finished task saved
+    GET  /health                 workers and unfinished tasks per pool
+
+Usage:
+    python -m api.server [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+except ImportError:
+    raise ImportError("The HTTP API needs starlette and uvicorn: uv sync --extra api")
+from bson.errors import InvalidId
+
+from agents.cover_letter_writer import TONES
+from utils.pipeline import strip_internal_fields
+from utils.tasks import (
+    ACTIVE_STATUSES, QueueFull, TaskQueue, get_task_queue, result_document, task_key
+)
+
+# Longest a GET /tasks/{id}?wait=... request is held open
+MAX_WAIT_SECONDS = 60.0
+# How often a long-poll rereads a task that another process is running
+POLL_SECONDS = 0.5
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+RETRY_AFTER_SECONDS = 5
+
+# Fields of each JSON-submittable task type's params, and which are required
+_PARAMS = {
+    "job_analysis": ({"job_url": str, "force_refresh": bool}, ["job_url"]),
+    "job_search": ({"filters": dict}, ["filters"]),
+    "suitability_report": ({"cv_id": str, "job_id": str}, ["cv_id", "job_id"]),
+    "cover_letter": ({"cv_id": str, "job_id": str, "tone": str}, ["cv_id", "job_id"]),
+}
+# Task fields returned by the API
+_TASK_FIELDS = ("task_type", "status", "progress", "partial", "result", "error",
+                "created_at", "started_at", "finished_at")
+
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert ObjectIds and datetimes in a stored document to strings"""
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _task_view(task: Dict[str, Any]) -> Dict[str, Any]:
+    view = {"task_id": str(task["_id"])}
+    view.update({field: task.get(field) for field in _TASK_FIELDS})
+    return _jsonable(view)
+
+
+def validate_params(task_type: str, params: Any) -> Dict[str, Any]:
+    """Check the params of a JSON task submission, raising ValueError if they're invalid"""
+    if not isinstance(task_type, str) or task_type not in _PARAMS:
+        raise ValueError(f"task_type must be one of {sorted(_PARAMS)}")
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    fields, required = _PARAMS[task_type]
+    for name in required:
+        if not params.get(name):
+            raise ValueError(f"params.{name} is required")
+    for name, value in params.items():
+        if name not in fields:
+            raise ValueError(f"Unknown parameter params.{name}")
+        if not isinstance(value, fields[name]):
+            raise ValueError(f"params.{name} must be of type {fields[name].__name__}")
+    if task_type == "job_search" and not params["filters"].get("job_title"):
+        raise ValueError("params.filters.job_title is required")
+    if task_type == "cover_letter" and params.get("tone", TONES[0]) not in TONES:
+        raise ValueError(f"params.tone must be one of {list(TONES)}")
+    return params
+
+
+def create_app(queue: Optional[TaskQueue] = None) -> Starlette:
+    """Build the API app; without a queue, the process-wide one is used"""
+    state: Dict[str, TaskQueue] = {}
+
+    def get_queue() -> TaskQueue:
+        return state["queue"]
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        # Connecting and starting the pools once, before the first request
+        state["queue"] = queue or await run_in_threadpool(get_task_queue)
+        yield
+        if queue is None:
+            from agents.drivers import get_driver_pool
+            get_driver_pool().close()
+
+    async def submit(task_type: str, params: Dict[str, Any],
+                     key: Optional[str] = None) -> JSONResponse:
+        try:
+            task_id = await run_in_threadpool(get_queue().submit, task_type, params, key)
+        except QueueFull as e:
+            return _error(429, str(e), {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        return _accepted(task_id)
+
+    async def submit_task(request: Request) -> JSONResponse:
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error(400, "The request body must be JSON")
+        if not isinstance(body, dict):
+            return _error(400, "The request body must be an object")
+        try:
+            params = validate_params(body.get("task_type"), body.get("params", {}))
+        except ValueError as e:
+            return _error(400, str(e))
+        return await submit(body["task_type"], params)
+
+    async def submit_cv(request: Request) -> JSONResponse:
+        data = await request.body()
+        if not data:
+            return _error(400, "Send the CV as a PDF request body")
+        if len(data) > MAX_UPLOAD_BYTES:
+            return _error(413, f"CVs are limited to {MAX_UPLOAD_BYTES} bytes")
+        force_refresh = request.query_params.get("force_refresh", "").lower() in ("1", "true")
+        digest = hashlib.sha256(data).hexdigest()
+        pdf_path = await run_in_threadpool(_save_upload, data)
+        params = {"pdf_path": pdf_path, "force_refresh": force_refresh, "delete_pdf": True}
+        key = task_key("cv_analysis", {"sha256": digest, "force_refresh": force_refresh})
+        try:
+            task_id = await run_in_threadpool(_submit_upload, get_queue(), params, key)
+        except QueueFull as e:
+            return _error(429, str(e), {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        return _accepted(task_id)
+
+    async def get_task(request: Request) -> JSONResponse:
+        task_id = request.path_params["task_id"]
+        try:
+            wait = min(float(request.query_params.get("wait", 0)), MAX_WAIT_SECONDS)
+        except ValueError:
+            return _error(400, "wait must be a number of seconds")
+        task = await _load_task(task_id)
+        if task is None:
+            return _error(404, f"Task {task_id} not found")
+        if task["status"] in ACTIVE_STATUSES and wait > 0:
+            await _wait_for(task_id, wait)
+            task = await _load_task(task_id)
+        return JSONResponse(_task_view(task))
+
+    async def get_result(request: Request) -> JSONResponse:
+        task_id = request.path_params["task_id"]
+        task = await _load_task(task_id)
+        if task is None:
+            return _error(404, f"Task {task_id} not found")
+        if task["status"] != "done":
+            return _error(409, f"Task {task_id} is {task['status']}")
+        doc = await run_in_threadpool(result_document, get_queue().db, task)
+        if doc is None:
+            return _error(404, "The task saved no document")
+        return JSONResponse(_jsonable({"id": str(doc["_id"]), **strip_internal_fields(doc)}))
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok", "pools": get_queue().stats()})
+
+    async def _load_task(task_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await run_in_threadpool(get_queue().get, task_id)
+        except InvalidId:
+            # Not a valid ID for the backend
+            return None
+
+    async def _wait_for(task_id: str, timeout: float):
+        """Wait until a task finishes or timeout seconds pass"""
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(None))
+
+        if get_queue().on_finished(task_id, notify):
+            try:
+                await asyncio.wait_for(finished, timeout)
+            except asyncio.TimeoutError:
+                pass
+            return
+        # Run by another process sharing the database: poll it instead
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(min(POLL_SECONDS, deadline - loop.time()))
+            task = await _load_task(task_id)
+            if task is None or task["status"] not in ACTIVE_STATUSES:
+                return
+
+    routes: List[Route] = [
+        Route("/tasks", submit_task, methods=["POST"]),
+        Route("/cv-analyses", submit_cv, methods=["POST"]),
+        Route("/tasks/{task_id}", get_task, methods=["GET"]),
+        Route("/tasks/{task_id}/result", get_result, methods=["GET"]),
+        Route("/health", health, methods=["GET"]),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+def _accepted(task_id: str) -> JSONResponse:
+    return JSONResponse({"task_id": task_id, "status_url": f"/tasks/{task_id}"}, status_code=202)
+
+
+def _save_upload(data: bytes) -> str:
+    # Every upload gets a file of its own, which only the task given it deletes
+    fd, pdf_path = tempfile.mkstemp(prefix="job_agent_cv_", suffix=".pdf")
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    return pdf_path
+
+
+def _submit_upload(queue: TaskQueue, params: Dict[str, Any], key: str) -> str:
+    """Queue the analysis of a saved upload, deleting the file unless the queued task owns it"""
+    try:
+        task_id = queue.submit("cv_analysis", params, key)
+    except BaseException:
+        os.unlink(params["pdf_path"])
+        raise
+    task = queue.get(task_id)
+    if task is None or task["params"].get("pdf_path") != params["pdf_path"]:
+        # An identical upload's unfinished task reads its own copy
+        os.unlink(params["pdf_path"])
+    return task_id
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve the job agent HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    # One process: the task queue and its pools live in it
+    uvicorn.run(create_app(), host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
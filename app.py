@@ -1,5 +1,6 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
+from utils.memory import current_session_id, get_memory_profiler
 import sys
 sys.path.append('.')
 
@@ -57,24 +58,50 @@ st.markdown("---")
 with st.sidebar:
     selected = option_menu(
         menu_title="Main Menu",
-        options=["CV Analyzer", "Job Search", "Job Analyzer", "Suitability Report", "Cover Letter"],
-        icons=["file-person", "search", "briefcase", "graph-up", "envelope"],
+        options=["CV Analyzer", "Job Search", "Job Analyzer", "Suitability Report", "Cover Letter",
+                 "Dashboard", "Traces"],
+        icons=["file-person", "search", "briefcase", "graph-up", "envelope", "bar-chart",
+               "activity"],
         menu_icon="cast",
         default_index=0,
     )
 
-if selected == "CV Analyzer":
-    from pages import cv_analyzer_page
-    cv_analyzer_page.show()
-elif selected == "Job Search":
-    from pages import job_search_page
-    job_search_page.show()
-elif selected == "Job Analyzer":
-    from pages import job_analyzer_page
-    job_analyzer_page.show()
-elif selected == "Suitability Report":
-    from pages import suitability_report_page
-    suitability_report_page.show()
-elif selected == "Cover Letter":
-    from pages import cover_letter_page
-    cover_letter_page.show()
\ No newline at end of file
+memory_profiler = get_memory_profiler()
+with memory_profiler.render(current_session_id(), selected, st.session_state):
+    if selected == "CV Analyzer":
+        from pages import cv_analyzer_page
+        cv_analyzer_page.show()
+    elif selected == "Job Search":
+        from pages import job_search_page
+        job_search_page.show()
+    elif selected == "Job Analyzer":
+        from pages import job_analyzer_page
+        job_analyzer_page.show()
+    elif selected == "Suitability Report":
+        from pages import suitability_report_page
+        suitability_report_page.show()
+    elif selected == "Cover Letter":
+        from pages import cover_letter_page
+        cover_letter_page.show()
+    elif selected == "Dashboard":
+        from pages import dashboard_page
+        dashboard_page.show()
+    elif selected == "Traces":
+        from pages import traces_page
+        traces_page.show()
+
+with st.sidebar.expander("Database cache"):
+    # Without connecting, on pages that haven't used the database
+    from utils.mongodb import cache_stats
+    stats = cache_stats()
+    if stats is None:
+        st.caption("Not connected yet")
+    else:
+        st.json(stats)
+
+if memory_profiler.enabled:
+    with st.sidebar.expander("Memory"):
+        st.caption("This session")
+        st.json(memory_profiler.session_report(current_session_id()) or {})
+        st.caption("All sessions")
+        st.json(memory_profiler.report())
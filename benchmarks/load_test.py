@@ -0,0 +1,418 @@
+"""Load-test the Streamlit pages with simulated concurrent sessions, offline
+
+Each simulated session drives the pages' show() functions through
+Streamlit's AppTest, one AppTest per page, so every session has its own
+session state. The session fills in forms, presses the buttons a user would,
+and reruns the page every poll interval until its background task has
+finished, just as the page's own progress fragment does.
+
+Nothing touches the network. The process-wide database is a SQLite file in
+a temporary directory. The browsers serve the recorded LinkedIn pages after
+--scrape-latency-ms. Every LLM call answers with a recorded response after
+--llm-latency-ms. The task queue, driver pool and agents are the real ones,
+so their pools limit throughput as they would in production.
+
+For each session count, the report covers:
+    renders     script runs per second, with p50/p95/p99 latency
+    tasks       seconds from pressing a button to seeing the result, p50/p95
+    cpu         process CPU time over wall time (100% is one core)
+    memory      peak and mean resident set size while the sessions ran
+
+Usage:
+    python -m benchmarks.load_test [--sessions 1 --sessions 5 --sessions 10]
+        [--step dashboard --step job_search] [--iterations 1]
+        [--llm-latency-ms 2000] [--scrape-latency-ms 1500] [--output results.json]
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import agents.drivers
+import utils.mongodb
+import utils.tasks
+from agents import registry
+from agents.cover_letter_writer import CoverLetterWriterAgent
+from agents.cv_analyzer import CVAnalyzerAgent
+from agents.drivers import DriverPool
+from agents.job_analyzer import JobAnalyzerAgent
+from agents.job_searcher import JobSearchAgent
+from agents.suitability_reporter import SuitabilityReporterAgent
+from benchmarks.pipeline_stages import JOB_URL, RecordedDriver, RecordedLLM, load_fixture
+from utils.config import DRIVER_POOL_SIZE
+from utils.mongodb import JobAgentDB
+from utils.stats import percentile
+from utils.storage.sqlite import SQLiteBackend
+from utils.ui import TASK_POLL_SECONDS
+
+STEPS = ["dashboard", "job_search", "job_analysis", "suitability_report", "cover_letter"]
+DEFAULT_SESSIONS = [1, 5, 10, 20]
+# Agents answered by each recorded response
+RECORDED_AGENTS = {
+    "cv_analysis": CVAnalyzerAgent,
+    "job_analysis": JobAnalyzerAgent,
+    "suitability_report": SuitabilityReporterAgent,
+    "cover_letter": CoverLetterWriterAgent,
+}
+# Seconds an AppTest script run may take before it counts as failed
+RENDER_TIMEOUT_SECONDS = 60
+
+
+def _page_script(page: str):
+    # Runs as the AppTest's script, so it may only use its own imports
+    import importlib
+    importlib.import_module(f"pages.{page}").show()
+
+
+def _rss_bytes() -> int:
+    """Get the process's resident set size, or its peak where the current one isn't exposed"""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ResourceSampler:
+    """Samples resident memory in a thread and measures CPU time between start and stop"""
+
+    def __init__(self, interval_seconds: float = 0.1):
+        self.interval_seconds = interval_seconds
+        self._samples: List[int] = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="resource-sampler", daemon=True)
+
+    def _sample(self):
+        while True:
+            self._samples.append(_rss_bytes())
+            if self._stopped.wait(self.interval_seconds):
+                return
+
+    def start(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._thread.start()
+
+    def stop(self) -> Dict[str, float]:
+        """Stop sampling, returning CPU use and memory over the sampled period"""
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self._stopped.set()
+        self._thread.join()
+        self._samples.append(_rss_bytes())
+        return {
+            "cpu_percent": cpu / wall * 100 if wall else 0.0,
+            "rss_peak_mb": max(self._samples) / 2**20,
+            "rss_mean_mb": statistics.fmean(self._samples) / 2**20,
+        }
+
+
+@contextmanager
+def shared_streamlit_runtime() -> Iterator[None]:
+    """Let AppTests run in several threads at once, sharing one stand-in Streamlit runtime
+
+    Each AppTest run installs a runtime of its own as the process-wide one and
+    removes it when the run ends, pulling it from under runs in other threads.
+    Here the first runtime installed is kept for every run, as a server keeps
+    one runtime, and one st.cache_data store, for all its sessions.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test
+
+    class SharedInstance(type):
+        @property
+        def _instance(cls):
+            return Runtime._instance
+
+        @_instance.setter
+        def _instance(cls, runtime):
+            if runtime is not None and Runtime._instance is None:
+                Runtime._instance = runtime
+
+    class SharedRuntime(Runtime, metaclass=SharedInstance):
+        pass
+
+    app_test.Runtime = SharedRuntime
+    try:
+        yield
+    finally:
+        app_test.Runtime = Runtime
+        Runtime._instance = None
+
+
+@contextmanager
+def offline_app(tmp: str, llm_latency_seconds: float, scrape_latency_seconds: float,
+                drivers: int = DRIVER_POOL_SIZE) -> Iterator[JobAgentDB]:
+    """Point the process-wide database, browsers and agents at offline stand-ins
+
+    The pages, task queue and pipelines then run unchanged. Everything is put
+    back, and the stand-ins shut down, on exit.
+    """
+    responses = json.loads(load_fixture("llm_responses.json"))
+    pages = {"search": load_fixture("search_results.html"), "job": load_fixture("job_posting.html")}
+    db = JobAgentDB(SQLiteBackend(os.path.join(tmp, "load_test.db")))
+    pool = DriverPool(size=drivers, factory=lambda: RecordedDriver(pages, scrape_latency_seconds),
+                      settle_seconds=0)
+    saved = (utils.mongodb._db_instance, agents.drivers._pool, utils.tasks._queue)
+    utils.mongodb._db_instance, agents.drivers._pool, utils.tasks._queue = db, pool, None
+    registry.clear()
+    try:
+        for task_type, agent_class in RECORDED_AGENTS.items():
+            registry.get_agent(agent_class).client = RecordedLLM(responses[task_type],
+                                                                 llm_latency_seconds)
+        registry.get_agent(JobSearchAgent)
+        yield db
+    finally:
+        if utils.tasks._queue is not None:
+            utils.tasks._queue.shutdown()
+        registry.clear()
+        pool.close()
+        db.close()
+        utils.mongodb._db_instance, agents.drivers._pool, utils.tasks._queue = saved
+
+
+def seed(db: JobAgentDB, sessions: int):
+    """Save one CV analysis per session and a job analysis, for the report and letter pages"""
+    responses = json.loads(load_fixture("llm_responses.json"))
+    for session in range(sessions):
+        cv = copy.deepcopy(responses["cv_analysis"])
+        cv["personal_info"]["name"] = candidate_name(session)
+        cv["content_hash"] = f"load-test-cv-{session}"
+        db.save_cv_analysis(cv)
+    db.save_job_analysis({**responses["job_analysis"], "job_url": JOB_URL,
+                          "content_hash": "load-test-job"})
+
+
+def candidate_name(session: int) -> str:
+    return f"Load Test Candidate {session:04d}"
+
+
+class Session:
+    """One simulated user, recording how long each render and each task took"""
+
+    def __init__(self, number: int, poll_seconds: float, task_timeout_seconds: float):
+        self.number = number
+        self.poll_seconds = poll_seconds
+        self.task_timeout_seconds = task_timeout_seconds
+        self.render_seconds: List[float] = []
+        self.task_seconds: List[float] = []
+        self.errors: List[str] = []
+        self._apps: Dict[str, Any] = {}
+
+    def app(self, page: str):
+        """Get this session's AppTest of a page, created on first use"""
+        from streamlit.testing.v1 import AppTest
+        if page not in self._apps:
+            self._apps[page] = AppTest.from_function(_page_script, args=(page,),
+                                                     default_timeout=RENDER_TIMEOUT_SECONDS)
+        return self._apps[page]
+
+    def render(self, at, action: Optional[Callable[[], Any]] = None):
+        """Rerun the page, timed, after an optional widget action; exceptions are recorded"""
+        start = time.perf_counter()
+        try:
+            (action() if action else at).run()
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+            return
+        self.render_seconds.append(time.perf_counter() - start)
+        self.errors.extend(exception.value for exception in at.exception)
+
+    def wait_for_task(self, at, submit: Callable[[], Any]):
+        """Press the button that submits a task, then rerun the page until it shows the result"""
+        start = time.perf_counter()
+        self.render(at, submit)
+        # The pages show a success once the task is done, and a warning or error if it can't be
+        while not (at.success or at.warning or at.error or at.exception):
+            if time.perf_counter() - start > self.task_timeout_seconds:
+                self.errors.append(f"Task still unfinished after {self.task_timeout_seconds}s")
+                return
+            time.sleep(self.poll_seconds)
+            self.render(at)
+        if at.success:
+            self.task_seconds.append(time.perf_counter() - start)
+        else:
+            self.errors.extend(element.value for element in [*at.warning, *at.error])
+
+    def step(self, name: str, iteration: int):
+        # Inputs are unique per session and iteration, so no two sessions share a task
+        tag = f"{self.number}-{iteration}"
+        if name == "dashboard":
+            self.render(self.app("dashboard_page"))
+        elif name == "job_search":
+            at = self.app("job_search_page")
+            self.render(at)
+            at.text_input[0].set_value(f"Data Engineer {tag}")
+            self.wait_for_task(at, _button(at, "Search Jobs").click)
+        elif name == "job_analysis":
+            at = self.app("job_analyzer_page")
+            self.render(at)
+            at.text_input[0].set_value(f"{JOB_URL}?session={tag}")
+            # The recorded posting never changes, so ask for a new analysis, not the stored one
+            at.checkbox[0].check()
+            self.wait_for_task(at, _button(at, "Analyze Job Posting").click)
+        else:
+            page, prefix = {"suitability_report": ("suitability_report_page", "report"),
+                            "cover_letter": ("cover_letter_page", "letter")}[name]
+            at = self.app(page)
+            self.render(at)
+            # Each session picks its own CV, and the newest job analysis
+            self.render(at, lambda: at.text_input(key=f"{prefix}_cv_name").set_value(
+                candidate_name(self.number)))
+            self.wait_for_task(at, at.button(key=f"generate_{prefix}").click)
+
+    def run(self, steps: List[str], iterations: int):
+        for iteration in range(iterations):
+            for name in steps:
+                try:
+                    self.step(name, iteration)
+                except Exception as e:
+                    # e.g. a page that failed to render the widget the step needs
+                    self.errors.append(f"{name}: {type(e).__name__}: {e}")
+
+
+def _button(at, label: str):
+    return next(button for button in at.button if button.label == label)
+
+
+def _seconds_stats(values: List[float], prefix: str, unit: str, scale: float,
+                   fractions: Dict[str, float]) -> Dict[str, Optional[float]]:
+    return {f"{prefix}_{name}_{unit}": percentile(values, fraction) * scale if values else None
+            for name, fraction in fractions.items()}
+
+
+def run_level(sessions: int, steps: List[str], iterations: int = 1,
+              poll_seconds: float = TASK_POLL_SECONDS,
+              task_timeout_seconds: float = 120) -> Dict[str, Any]:
+    """Run sessions simulated users at once, each going through the steps iterations times"""
+    users = [Session(number, poll_seconds, task_timeout_seconds) for number in range(sessions)]
+    sampler = ResourceSampler()
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as executor:
+        for future in [executor.submit(user.run, steps, iterations) for user in users]:
+            future.result()
+    wall = time.perf_counter() - start
+    resources = sampler.stop()
+
+    renders = [seconds for user in users for seconds in user.render_seconds]
+    tasks = [seconds for user in users for seconds in user.task_seconds]
+    errors = [error for user in users for error in user.errors]
+    return {
+        "sessions": sessions,
+        "wall_seconds": wall,
+        "renders": len(renders),
+        "renders_per_s": len(renders) / wall,
+        **_seconds_stats(renders, "render", "ms", 1000, {"p50": 0.5, "p95": 0.95, "p99": 0.99}),
+        "tasks": len(tasks),
+        "tasks_per_s": len(tasks) / wall,
+        **_seconds_stats(tasks, "task", "s", 1, {"p50": 0.5, "p95": 0.95}),
+        "errors": len(errors),
+        # A few distinct messages are enough to see what went wrong
+        "error_samples": sorted(set(errors))[:5],
+        **resources,
+    }
+
+
+def run_load_test(sessions: Optional[List[int]] = None, steps: Optional[List[str]] = None,
+                  iterations: int = 1, llm_latency_ms: float = 2000,
+                  scrape_latency_ms: float = 1500, drivers: int = DRIVER_POOL_SIZE,
+                  poll_seconds: float = TASK_POLL_SECONDS,
+                  task_timeout_seconds: float = 120) -> Dict[str, Any]:
+    """Run each session count in turn against one offline app, returning the results per count"""
+    sessions = sorted(sessions or DEFAULT_SESSIONS)
+    steps = steps or STEPS
+    levels = []
+    with tempfile.TemporaryDirectory() as tmp, shared_streamlit_runtime():
+        with offline_app(tmp, llm_latency_ms / 1000, scrape_latency_ms / 1000, drivers) as db:
+            seed(db, max(sessions))
+            for count in sessions:
+                levels.append(run_level(count, steps, iterations, poll_seconds,
+                                        task_timeout_seconds))
+            task_workers = utils.tasks.get_task_queue().pool_sizes
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "steps": steps,
+            "iterations": iterations,
+            "llm_latency_ms": llm_latency_ms,
+            "scrape_latency_ms": scrape_latency_ms,
+            "drivers": drivers,
+            "task_workers": task_workers,
+        },
+        "levels": levels,
+    }
+
+
+def _format(value: Optional[float], width: int, digits: int) -> str:
+    return f"{'-':>{width}}" if value is None else f"{value:{width}.{digits}f}"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Load-test the Streamlit pages with simulated concurrent sessions, offline"
+    )
+    parser.add_argument("--sessions", type=int, action="append",
+                        help="Concurrent sessions to simulate, repeatable "
+                             f"(default: {', '.join(map(str, DEFAULT_SESSIONS))})")
+    parser.add_argument("--step", action="append", choices=STEPS,
+                        help="Step each session goes through, repeatable, in order (default: all)")
+    parser.add_argument("--iterations", type=int, default=1,
+                        help="Times each session goes through the steps")
+    parser.add_argument("--llm-latency-ms", type=float, default=2000,
+                        help="Delay before every recorded LLM response")
+    parser.add_argument("--scrape-latency-ms", type=float, default=1500,
+                        help="Delay before every recorded page is read")
+    parser.add_argument("--drivers", type=int, default=DRIVER_POOL_SIZE,
+                        help="Browsers in the driver pool")
+    parser.add_argument("--poll-seconds", type=float, default=TASK_POLL_SECONDS,
+                        help="How often a session waiting for a task reruns its page")
+    parser.add_argument("--task-timeout", type=float, default=120,
+                        help="Seconds a session waits for a task before counting it as failed")
+    parser.add_argument("--output", help="Write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    run = run_load_test(args.sessions, args.step, args.iterations, args.llm_latency_ms,
+                        args.scrape_latency_ms, args.drivers, args.poll_seconds,
+                        args.task_timeout)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(run, file, indent=2)
+
+    print(f"{'sessions':>8} {'renders/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'tasks/s':>8} {'task p50 s':>10} {'task p95 s':>10} {'cpu %':>7} "
+          f"{'rss MB':>8} {'errors':>6}")
+    for level in run["levels"]:
+        print(f"{level['sessions']:8d} {level['renders_per_s']:10.1f} "
+              f"{_format(level['render_p50_ms'], 8, 1)} {_format(level['render_p95_ms'], 8, 1)} "
+              f"{_format(level['render_p99_ms'], 8, 1)} {level['tasks_per_s']:8.2f} "
+              f"{_format(level['task_p50_s'], 10, 2)} {_format(level['task_p95_s'], 10, 2)} "
+              f"{level['cpu_percent']:7.1f} {level['rss_peak_mb']:8.1f} {level['errors']:6d}")
+    for level in run["levels"]:
+        for error in level["error_samples"]:
+            print(f"ERROR with {level['sessions']} sessions: {error}", file=sys.stderr)
+    return 1 if any(level["errors"] for level in run["levels"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""Measure every pipeline stage offline, and compare the results with a baseline
+
+Nothing touches the network: PDFs are generated, pages come from recorded
+LinkedIn HTML (benchmarks/fixtures), every LLM call returns a recorded
+response, and the database is a SQLite file in a temporary directory.
+
+Each operation is timed twice: its latency over sequential calls, and its
+throughput with --workers threads calling it at once. benchmarks/baseline.json
+holds reference results of a default run; timings depend on the machine, so
+on another one, record a baseline of its own before making changes.
+
+Stages:
+    pdf     text extraction from a generated two-page CV
+    parse   reading the recorded job posting and search results pages
+    prompt  building each agent's prompt
+    agent   each agent's run, with the recorded browser pages and LLM responses
+    db      JobAgentDB saves and lookups
+
+Usage:
+    python -m benchmarks.pipeline_stages [--stage parse --stage prompt] [--repeats 50]
+        [--workers 4] [--llm-latency-ms 0] [--output results.json]
+        [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+"""
+import argparse
+import copy
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.cover_letter_writer import (
+    CoverLetterWriterAgent, build_cover_letter_prompt, join_cover_letter
+)
+from agents.cv_analyzer import CVAnalyzerAgent, build_cv_prompt, extract_text_from_pdf
+from agents.drivers import DriverPool
+from agents.job_analyzer import JobAnalyzerAgent, build_job_prompt, parse_job_description
+from agents.job_searcher import JobSearchAgent, build_search_url, parse_job_cards
+from agents.suitability_reporter import SuitabilityReporterAgent, build_report_prompt
+from utils.cache import DocumentCache, TTLCache
+from utils.mongodb import JobAgentDB
+from utils.stats import percentile
+from utils.storage.sqlite import SQLiteBackend
+
+STAGES = ["pdf", "parse", "prompt", "agent", "db"]
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Reference results of a default run, recorded on the machine described in its "meta"
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+JOB_URL = "https://www.linkedin.com/jobs/view/3900000000/"
+FILTERS = {"job_title": "Data Engineer", "location": "Berlin", "experience_level": "",
+           "posted_date": ""}
+# Slowdowns per call smaller than this are ignored as timer noise, whatever the tolerance
+NOISE_FLOOR_MS = 0.05
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as file:
+        return file.read()
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines: List[str], lines_per_page: int = 50) -> bytes:
+    """Write a minimal PDF with the lines in Helvetica, so no PDF library is needed"""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3
+    objects = {font_id: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_ids = []
+    for n, page_lines in enumerate(pages):
+        content_id, page_id = 4 + 2 * n, 5 + 2 * n
+        text = "".join(f"({_pdf_escape(line)}) Tj T* " for line in page_lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 750 Td {text}ET".encode("latin-1", "replace")
+        objects[content_id] = (b"<< /Length %d >>\nstream\n" % len(stream)) + stream + \
+            b"\nendstream"
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        page_ids.append(page_id)
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for obj_id in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+              % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def cv_lines(cv: Dict[str, Any]) -> List[str]:
+    """Lay out a CV analysis as the lines of a two-page CV"""
+    info = cv["personal_info"]
+    lines = [info["name"], f"{info['email']} | {info['phone']} | {info['location']}", "",
+             "SUMMARY", cv["summary"], "", "SKILLS", ", ".join(cv["skills"]["technical"]), ""]
+    lines.append("EXPERIENCE")
+    for job in cv["experience"]:
+        lines.append(f"{job['position']}, {job['company']} ({job['duration']})")
+        lines.extend(f"- {item}" for item in job["responsibilities"] * 8)
+        lines.append("")
+    lines.append("EDUCATION")
+    lines.extend(f"{e['degree']}, {e['institution']} {e['graduation_date']}"
+                 for e in cv["education"])
+    lines.extend(["", "PROJECTS"] + [f"{p['name']}: {p['description']}" for p in cv["projects"]])
+    return (lines * 2)[:100]
+
+
+class RecordedLLM:
+    """Stands in for the OpenAI client, answering every completion with one recorded response"""
+
+    def __init__(self, response: Dict[str, Any], latency_seconds: float = 0):
+        self.content = json.dumps(response)
+        self.latency_seconds = latency_seconds
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs) -> SimpleNamespace:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class RecordedDriver:
+    """Stands in for a WebDriver, serving the recorded search results or job posting page"""
+
+    def __init__(self, pages: Dict[str, str], latency_seconds: float = 0):
+        self.pages = pages
+        self.latency_seconds = latency_seconds
+        self.page_source = ""
+
+    def get(self, url: str):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        kind = "search" if "/jobs/search/" in url else "job"
+        self.page_source = self.pages[kind]
+
+    def find_elements(self, by: str, value: str) -> List[Any]:
+        # Only CSS selectors are waited for
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(self.page_source, "html.parser").select(value)
+
+    def quit(self):
+        pass
+
+
+def measure(fn: Callable[[], Any], repeats: int, workers: int) -> Dict[str, float]:
+    """Time repeats sequential calls, then repeats calls in each of workers threads at once"""
+    fn()  # Warm up imports and caches
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    def call_repeatedly():
+        for _ in range(repeats):
+            fn()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        for future in [executor.submit(call_repeatedly) for _ in range(workers)]:
+            future.result()
+        wall = time.perf_counter() - start
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "throughput_per_s": repeats * workers / wall,
+    }
+
+
+def _operations(tmp: str, db: JobAgentDB, llm_latency_seconds: float
+                ) -> Dict[str, Tuple[str, Callable[[], Any]]]:
+    """Every timed operation by name, with its stage"""
+    responses = json.loads(load_fixture("llm_responses.json"))
+    cv, job = responses["cv_analysis"], responses["job_analysis"]
+    pages = {"search": load_fixture("search_results.html"), "job": load_fixture("job_posting.html")}
+    pdf_bytes = make_pdf(cv_lines(cv))
+    pdf_path = os.path.join(tmp, "cv.pdf")
+    with open(pdf_path, "wb") as file:
+        file.write(pdf_bytes)
+    cv_text = extract_text_from_pdf(pdf_path)
+    job_text = parse_job_description(pages["job"])
+
+    pool = DriverPool(size=8, factory=lambda: RecordedDriver(pages), settle_seconds=0)
+    agents = {
+        "cv_analysis": CVAnalyzerAgent(),
+        "job_analysis": JobAnalyzerAgent(driver_pool=pool),
+        "job_search": JobSearchAgent(driver_pool=pool),
+        "suitability_report": SuitabilityReporterAgent(),
+        "cover_letter": CoverLetterWriterAgent(),
+    }
+    for task_type, agent in agents.items():
+        if task_type in responses:
+            agent.client = RecordedLLM(responses[task_type], llm_latency_seconds)
+
+    counter = itertools.count()
+    cv_id = db.save_cv_analysis(cv)
+    job_id = db.save_job_analysis({**job, "job_url": JOB_URL})
+    db.save_cover_letter({"cv_id": cv_id, "job_id": job_id, "tone": "professional",
+                          **responses["cover_letter"]})
+    report = {"cv_id": cv_id, "job_id": job_id, "cv_name": cv["personal_info"]["name"],
+              "job_title": job["job_title"], "company": job["company"],
+              **responses["suitability_report"]}
+
+    def unique(doc: Dict[str, Any]) -> Dict[str, Any]:
+        # Saves replace documents with the same content, so every save gets new content
+        doc = copy.deepcopy(doc)
+        doc["summary"] = f"{doc.get('summary', '')} #{next(counter)}"
+        return doc
+
+    return {
+        "pdf_extraction": ("pdf", lambda: extract_text_from_pdf(io.BytesIO(pdf_bytes))),
+        "parse_job_posting": ("parse", lambda: parse_job_description(pages["job"])),
+        "parse_search_results": ("parse", lambda: parse_job_cards(pages["search"])),
+        "build_search_url": ("parse", lambda: build_search_url("Data Engineer", "Berlin")),
+        "build_cv_prompt": ("prompt", lambda: build_cv_prompt(cv_text)),
+        "build_job_prompt": ("prompt", lambda: build_job_prompt(job_text)),
+        "build_report_prompt": ("prompt", lambda: build_report_prompt(cv, job)),
+        "build_cover_letter_prompt": ("prompt", lambda: build_cover_letter_prompt(cv, job)),
+        "join_cover_letter": ("prompt", lambda: join_cover_letter(
+            responses["cover_letter"]["cover_letter"])),
+        "cv_analyzer_run": ("agent", lambda: agents["cv_analysis"].run(pdf_path)),
+        "job_analyzer_run": ("agent", lambda: agents["job_analysis"].run(JOB_URL)),
+        "job_searcher_run": ("agent", lambda: agents["job_search"].run(FILTERS)),
+        "suitability_reporter_run": ("agent", lambda: agents["suitability_report"].run(cv, job)),
+        "cover_letter_writer_run": ("agent", lambda: agents["cover_letter"].run(cv, job)),
+        "db_save_cv_analysis": ("db", lambda: db.save_cv_analysis(unique(cv))),
+        "db_get_cv_analysis_by_id": ("db", lambda: db.get_cv_analysis_by_id(cv_id)),
+        "db_save_job_analysis": ("db", lambda: db.save_job_analysis(unique(job))),
+        "db_get_job_analysis_by_url": ("db", lambda: db.get_job_analysis_by_url(JOB_URL)),
+        "db_save_suitability_report": ("db", lambda: db.save_suitability_report(unique(report))),
+        "db_get_suitability_report_page": ("db", lambda: db.get_suitability_report_page(
+            page_size=20)),
+        "db_get_cover_letter_for": ("db", lambda: db.get_cover_letter_for(
+            cv_id, job_id, "professional")),
+    }
+
+
+def run_benchmark(stages: Optional[List[str]] = None, repeats: int = 50, workers: int = 4,
+                  llm_latency_ms: float = 0) -> Dict[str, Any]:
+    """Run the selected stages, returning the run's settings and the results per operation"""
+    stages = stages or STAGES
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # SQLite connections are per thread, so the throughput runs share one file
+        backend = SQLiteBackend(os.path.join(tmp, "benchmark.db"))
+        # Caching is off so every read reaches the backend
+        db = JobAgentDB(backend, cache=TTLCache(0), documents=DocumentCache(0))
+        try:
+            for name, (stage, fn) in _operations(tmp, db, llm_latency_ms / 1000).items():
+                if stage in stages:
+                    results[name] = {"stage": stage, **measure(fn, repeats, workers)}
+        finally:
+            db.close()
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "workers": workers,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "results": results,
+    }
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, float]],
+                        baseline: Dict[str, Dict[str, float]],
+                        tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """List the operations whose p50 latency or throughput is worse than the baseline's
+
+    tolerance is the fraction by which an operation may be worse before it's listed.
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if (stats["p50_ms"] > base["p50_ms"] * (1 + tolerance)
+                and stats["p50_ms"] - base["p50_ms"] > NOISE_FLOOR_MS):
+            regressions.append({"operation": name, "metric": "p50_ms",
+                                "baseline": base["p50_ms"], "current": stats["p50_ms"]})
+        # Compared as time per call, so the noise floor applies to throughput too
+        per_call_ms, base_per_call_ms = (1000 / stats["throughput_per_s"],
+                                         1000 / base["throughput_per_s"])
+        if (per_call_ms > base_per_call_ms * (1 + tolerance)
+                and per_call_ms - base_per_call_ms > NOISE_FLOOR_MS):
+            regressions.append({"operation": name, "metric": "throughput_per_s",
+                                "baseline": base["throughput_per_s"],
+                                "current": stats["throughput_per_s"]})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage offline")
+    parser.add_argument("--stage", action="append", choices=STAGES,
+                        help="Stage to measure, repeatable (default: all)")
+    parser.add_argument("--repeats", type=int, default=50,
+                        help="Number of calls timed per operation, sequentially and concurrently")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Threads calling each operation when measuring throughput")
+    parser.add_argument("--llm-latency-ms", type=float, default=0,
+                        help="Delay added to every recorded LLM response")
+    parser.add_argument("--output",
+                        help="Write the results as JSON here, e.g. to use as a later baseline")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Fraction by which an operation may be worse than the baseline")
+    args = parser.parse_args(argv)
+
+    run = run_benchmark(args.stage, args.repeats, args.workers, args.llm_latency_ms)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(run, file, indent=2)
+
+    print(f"{'operation':32} {'stage':6} {'p50 ms':>9} {'p95 ms':>9} {'ops/s':>10}")
+    for name, stats in run["results"].items():
+        print(f"{name:32} {stats['stage']:6} {stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} "
+              f"{stats['throughput_per_s']:10.1f}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)["results"]
+    regressions = compare_to_baseline(run["results"], baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression['operation']} {regression['metric']}: "
+              f"{regression['baseline']:.3f} -> {regression['current']:.3f}", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Measure JobAgentDB latency on each storage backend
+
+Every backend gets the same workload: single saves, bulk saves, hash
+lookups, reads by ID and the first and a deep page of a filtered listing.
+
+Usage:
+    python -m benchmarks.storage_latency [--backend sqlite --backend mongodb] [--documents 500]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.cache import DocumentCache, TTLCache
+from utils.mongodb import JobAgentDB
+from utils.stats import percentile
+from utils.storage import StorageBackend, create_backend
+from utils.storage.sqlite import SQLiteBackend
+
+OPERATIONS = ["save", "bulk_save", "get_by_id", "hash_lookup", "first_page", "deep_page"]
+
+
+def _report(i: int) -> Dict:
+    return {
+        "cv_id": str(i % 25), "job_id": str(i), "cv_name": f"Candidate {i % 25}",
+        "job_title": f"Engineer {i}", "company": "Acme" if i % 3 else "Initech",
+        "overall_match_score": i % 100,
+        "detailed_analysis": "Lorem ipsum dolor sit amet. " * 40,
+    }
+
+
+def _time(timings: List[float], fn: Callable):
+    start = time.perf_counter()
+    result = fn()
+    timings.append(time.perf_counter() - start)
+    return result
+
+
+def run_benchmark(backend: StorageBackend, documents: int = 500,
+                  repeats: int = 50) -> Dict[str, Dict[str, float]]:
+    """Run the workload on an empty backend, returning p50/p95/mean milliseconds per operation"""
+    # Caching is off so every read reaches the backend
+    db = JobAgentDB(backend, cache=TTLCache(0), documents=DocumentCache(0))
+    timings: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+
+    ids = [_time(timings["save"], lambda i=i: db.save_suitability_report(_report(i)))
+           for i in range(documents)]
+    for start in range(0, documents, 100):
+        batch = [{"personal_info": {"name": f"cv {i}"}, "content_hash": f"h{i}"}
+                 for i in range(start, start + 100)]
+        _time(timings["bulk_save"], lambda batch=batch: db.save_cv_analyses(batch))
+
+    for i in range(repeats):
+        _time(timings["get_by_id"], lambda: db.get_suitability_report_by_id(ids[i * 7 % len(ids)]))
+        _time(timings["hash_lookup"], lambda: db.get_existing_cv_hashes([f"h{i}", "missing"]))
+        _, cursor = _time(timings["first_page"],
+                          lambda: db.get_suitability_report_page(company="acme", page_size=20))
+        for _ in range(4):
+            if cursor is None:
+                break
+            _, cursor = _time(timings["deep_page"], lambda cursor=cursor: (
+                db.get_suitability_report_page(cursor, company="acme", page_size=20)))
+
+    return {
+        name: {
+            "p50_ms": statistics.median(values) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "mean_ms": statistics.fmean(values) * 1000,
+        }
+        for name, values in timings.items() if values
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare storage backend latency")
+    parser.add_argument("--backend", action="append", choices=["sqlite", "mongodb"],
+                        help="Backend to measure, repeatable (default: sqlite)")
+    parser.add_argument("--documents", type=int, default=500,
+                        help="Number of reports saved one by one before reads are timed")
+    parser.add_argument("--repeats", type=int, default=50,
+                        help="Number of times each read is timed")
+    args = parser.parse_args(argv)
+
+    for kind in args.backend or ["sqlite"]:
+        with tempfile.TemporaryDirectory() as tmp:
+            if kind == "sqlite":
+                backend = SQLiteBackend(os.path.join(tmp, "benchmark.db"))
+            else:
+                # Uses MONGODB_URI; point MONGODB_DATABASE at a scratch database
+                backend = create_backend(kind)
+            try:
+                results = run_benchmark(backend, args.documents, args.repeats)
+            finally:
+                backend.close()
+        print(kind)
+        for name, stats in results.items():
+            print(f"  {name:12} p50 {stats['p50_ms']:7.2f} ms  "
+                  f"p95 {stats['p95_ms']:7.2f} ms  mean {stats['mean_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Bulk CV ingestion from a directory or zip archive of PDFs
+
+Text extraction runs in a process pool and LLM analysis in a bounded thread
+pool. Results are written to MongoDB in batches and every written source is
+recorded in a state file, so an interrupted run picks up where it stopped.
+
+Usage:
+    python -m cli.ingest_cvs path/to/cvs [--workers 4] [--concurrency 8] [--batch-size 50]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from agents.cv_analyzer import CVAnalyzerAgent, extract_text_from_pdf
+from agents.registry import get_agent
+from utils.hashing import content_hash, normalize_text
+
+# Separates an archive path from a member name in source identifiers
+ARCHIVE_SEP = "::"
+
+
+def list_pdfs(source: str) -> List[str]:
+    """List the PDF sources in a directory tree or zip archive"""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            return sorted(
+                f"{source}{ARCHIVE_SEP}{name}" for name in archive.namelist()
+                if name.lower().endswith(".pdf")
+            )
+
+    pdfs = []
+    for root, _, files in os.walk(source):
+        pdfs.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+    return sorted(pdfs)
+
+
+def _extract(source: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Extract a source's text in a worker process, returning (source, text, error)"""
+    try:
+        if ARCHIVE_SEP in source:
+            archive_path, member = source.split(ARCHIVE_SEP, 1)
+            with zipfile.ZipFile(archive_path) as archive, archive.open(member) as file:
+                text = extract_text_from_pdf(file)
+        else:
+            text = extract_text_from_pdf(source)
+    except Exception as e:
+        return source, None, str(e)
+    if not normalize_text(text):
+        return source, None, "no extractable text"
+    return source, text, None
+
+
+def _bounded_map(executor: Executor, fn: Callable, items: Iterable,
+                 window: int) -> Iterator[Any]:
+    """Like executor.map, but submitting at most window calls ahead of the results read"""
+    futures: Deque = deque()
+    for item in items:
+        if len(futures) >= window:
+            yield futures.popleft().result()
+        futures.append(executor.submit(fn, item))
+    while futures:
+        yield futures.popleft().result()
+
+
+def load_state(state_path: str) -> Set[str]:
+    """Get the sources already written by previous runs"""
+    if not os.path.exists(state_path):
+        return set()
+    with open(state_path) as file:
+        return {json.loads(line)["source"] for line in file if line.strip()}
+
+
+class Progress:
+    """Thread-safe progress counters printed to stderr"""
+
+    def __init__(self, total: int, already_done: int):
+        self.total = total
+        self.counts = {"analyzed": 0, "skipped": 0, "failed": 0}
+        self.done = already_done
+        self._lock = threading.Lock()
+
+    def update(self, outcome: str, message: str = ""):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.done += 1
+            if message:
+                print(f"\n{message}", file=sys.stderr)
+            print(f"\r[{self.done}/{self.total}] " +
+                  ", ".join(f"{k} {v}" for k, v in self.counts.items()),
+                  end="", file=sys.stderr, flush=True)
+
+
+class BatchWriter:
+    """Buffers analyses and writes them with one bulk request per batch"""
+
+    def __init__(self, db, state_path: str, batch_size: int, progress: Progress):
+        self.db = db
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.progress = progress
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, source: str, doc: Dict[str, Any]):
+        with self._lock:
+            self._pending.append((source, doc))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def mark_done(self, sources: List[Tuple[str, str]]):
+        """Record sources that needed no write, as (source, status) pairs"""
+        with self._lock:
+            self._record([{"source": s, "status": status} for s, status in sources])
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        sources, docs = zip(*self._pending)
+        self._pending = []
+        try:
+            results = self.db.save_cv_analyses(docs, chunk_size=self.batch_size)
+        except Exception as e:
+            results = [{"id": None, "error": str(e)}] * len(docs)
+        written = []
+        for source, result in zip(sources, results):
+            if result["error"]:
+                # Left out of the state file so the next run retries it
+                self.progress.update("failed", f"{source}: {result['error']}")
+            else:
+                written.append({"source": source, "status": "analyzed", "id": result["id"]})
+                self.progress.update("analyzed")
+        # Only record sources once their analyses are safely stored
+        self._record(written)
+
+    def _record(self, entries: List[Dict[str, str]]):
+        with open(self.state_path, "a") as file:
+            for entry in entries:
+                file.write(json.dumps(entry) + "\n")
+
+
+def ingest(db, source: str, state_path: str, workers: int = 4, concurrency: int = 8,
+           batch_size: int = 50, force_refresh: bool = False,
+           agent: Optional[CVAnalyzerAgent] = None) -> Dict[str, int]:
+    """Analyze every PDF under source that previous runs haven't written yet"""
+    sources = list_pdfs(source)
+    done = load_state(state_path)
+    pending = [s for s in sources if s not in done]
+
+    agent = agent or get_agent(CVAnalyzerAgent)
+    progress = Progress(len(sources), len(sources) - len(pending))
+    writer = BatchWriter(db, state_path, batch_size, progress)
+    # Bounds in-flight LLM calls. Waiting for a slot also stops reading extraction results, and
+    # extraction only runs a window ahead of them, so texts don't pile up in memory.
+    slots = threading.BoundedSemaphore(concurrency)
+    seen_hashes: Set[str] = set()
+
+    def analyze(source: str, text: str, cv_hash: str):
+        try:
+            result = agent.analyze_cv_handler(cv_text=text)
+            writer.add(source, {**result, "content_hash": cv_hash,
+                                "source_file": os.path.basename(source)})
+        except Exception as e:
+            progress.update("failed", f"{source}: {e}")
+        finally:
+            slots.release()
+
+    def submit_batch(batch: List[Tuple[str, str, str]]):
+        stored = set() if force_refresh else db.get_existing_cv_hashes(h for _, _, h in batch)
+        skipped = []
+        for source, text, cv_hash in batch:
+            if cv_hash in stored or cv_hash in seen_hashes:
+                skipped.append((source, "skipped"))
+                progress.update("skipped")
+                continue
+            seen_hashes.add(cv_hash)
+            slots.acquire()
+            llm_pool.submit(analyze, source, text, cv_hash)
+        if skipped:
+            writer.mark_done(skipped)
+
+    with ProcessPoolExecutor(max_workers=workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as llm_pool:
+        batch: List[Tuple[str, str, str]] = []
+        window = max(workers, concurrency * 2)
+        for source, text, error in _bounded_map(extract_pool, _extract, pending, window):
+            if error:
+                progress.update("failed", f"{source}: {error}")
+                continue
+            batch.append((source, text, content_hash(text)))
+            if len(batch) >= batch_size:
+                submit_batch(batch)
+                batch = []
+        submit_batch(batch)
+
+    writer.flush()
+    print(file=sys.stderr)
+    return progress.counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or zip archive of PDF CVs")
+    parser.add_argument("source", help="Directory or .zip archive containing PDF CVs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes used for PDF text extraction")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Maximum number of simultaneous LLM calls")
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="Number of analyses written per database request")
+    parser.add_argument("--state-file",
+                        help="Progress file used to resume (default: <source>.ingest.ndjson)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-analyze CVs that already have a stored analysis")
+    args = parser.parse_args(argv)
+
+    from utils.mongodb import db
+
+    state_path = args.state_file or f"{args.source.rstrip(os.sep)}.ingest.ndjson"
+    counts = ingest(db, args.source, state_path, workers=args.workers,
+                    concurrency=args.concurrency, batch_size=args.batch_size,
+                    force_refresh=args.force)
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""Run the job agent pipeline headless: search, analyze, report and write letters
+
+Input records come from a CSV or NDJSON file, one per row or line; a line
+that isn't a JSON object is reported as a failed input and skipped:
+    {"cv_path": "cvs/ada.pdf"}                                     a CV to analyze
+    {"job_url": "https://www.linkedin.com/jobs/view/..."}          a posting to analyze
+    {"job_title": "Data Engineer", "location": "Berlin", ...}      a search whose hits are analyzed
+
+Work flows between stages as soon as it's ready: found postings are analyzed
+while the search continues, and every analyzed job is compared with every
+analyzed CV (plus any --cv-id) as both become available. Each stage runs in
+its own bounded worker pool, everything is saved with JobAgentDB, and one
+NDJSON line per finished item is written to stdout (or --output). A timing
+summary per stage is printed to stderr at the end.
+
+Usage:
+    python -m cli.pipeline inputs.csv [--stages analyze,report] [--concurrency analysis=8]
+        [--cv-id ID] [--tone professional] [--letter-min-score 70] [--output results.ndjson]
+"""
+import argparse
+import csv
+import itertools
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, IO, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from agents.cover_letter_writer import TONES
+from utils.config import TASK_WORKERS
+from utils.pipeline import (
+    analyze_cv_pdf, analyze_job_url, generate_cover_letter, generate_suitability_report,
+    search_jobs
+)
+from utils.stats import percentile
+from utils.tasks import TASK_TYPES, parse_pool_sizes
+from utils.tracing import span
+
+STAGES = ("search", "analyze", "report", "letter")
+SEARCH_FIELDS = ("job_title", "location", "experience_level", "posted_date")
+# Queued items per worker before reading more input
+READ_AHEAD_PER_WORKER = 4
+
+
+class InvalidInput(NamedTuple):
+    """An input line that couldn't be read as a record"""
+    line: int
+    error: str
+
+
+def read_inputs(path: str) -> Iterator[Any]:
+    """Read input records from a CSV file (with a header row) or an NDJSON file
+
+    NDJSON lines that aren't valid JSON are yielded as InvalidInput.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(file):
+                yield {k.strip(): v.strip() for k, v in row.items() if k and v and v.strip()}
+        else:
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield InvalidInput(number, f"invalid JSON: {e}")
+
+
+class StageTimer:
+    """Thread-safe per-stage durations, failures and wall-clock span"""
+
+    def __init__(self):
+        self._seconds: Dict[str, List[float]] = {}
+        self._failed: Dict[str, int] = {}
+        self._span: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, started: float, finished: float, failed: bool):
+        with self._lock:
+            self._seconds.setdefault(stage, []).append(finished - started)
+            self._failed[stage] = self._failed.get(stage, 0) + failed
+            first, last = self._span.get(stage, (started, finished))
+            self._span[stage] = (min(first, started), max(last, finished))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {
+                    "count": len(values),
+                    "failed": self._failed[stage],
+                    "mean_seconds": statistics.fmean(values),
+                    "p95_seconds": percentile(values, 0.95),
+                    "wall_seconds": self._span[stage][1] - self._span[stage][0],
+                }
+                for stage, values in self._seconds.items()
+            }
+
+
+class PipelineRunner:
+    """Drives records through the stages with one worker pool per kind of work
+
+    agents optionally maps a task type (see utils.tasks.TASK_TYPES) to the agent
+    that does it; the shared agents are used otherwise.
+    """
+
+    def __init__(self, db, stages: Tuple[str, ...] = STAGES,
+                 pool_sizes: Optional[Dict[str, int]] = None, tone: str = "professional",
+                 letter_min_score: float = 0, output: IO[str] = sys.stdout,
+                 agents: Optional[Dict[str, Any]] = None):
+        self.db = db
+        self.stages = stages
+        self.pool_sizes = pool_sizes or parse_pool_sizes(TASK_WORKERS)
+        self.tone = tone
+        self.letter_min_score = letter_min_score
+        self.output = output
+        self.agents = agents or {}
+        self.timer = StageTimer()
+        self.max_pending = READ_AHEAD_PER_WORKER * sum(self.pool_sizes.values())
+        self._output_lock = threading.Lock()
+
+    def _emit(self, record: Dict[str, Any]):
+        with self._output_lock:
+            self.output.write(json.dumps(record, default=str) + "\n")
+            self.output.flush()
+
+    def run(self, records: Iterator[Dict[str, Any]],
+            cv_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """Process every record, returning the timing summary per stage"""
+        executors = {
+            pool: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pipeline-{pool}")
+            for pool, workers in self.pool_sizes.items()
+        }
+        pending: Dict[Future, Tuple[str, Any]] = {}
+        # CV x job report pairs not submitted yet, so a fan-out waits for room like the input
+        fan_outs: Deque[Iterator[Tuple[str, str]]] = deque()
+        seen_cvs: Set[str] = set()
+        seen_jobs: Set[str] = set()
+        cvs_done: List[str] = list(cv_ids or [])
+        jobs_done: List[str] = []
+
+        def submit(task_type: str, item: Any, fn: Callable[[], Dict[str, Any]]):
+            pool = executors[TASK_TYPES[task_type].pool]
+            pending[pool.submit(self._timed, task_type, item, fn)] = (task_type, item)
+
+        def submit_job(job_url: str):
+            if "analyze" in self.stages and job_url and job_url not in seen_jobs:
+                seen_jobs.add(job_url)
+                submit("job_analysis", job_url, lambda: self._analyze_job(job_url))
+
+        def submit_reports(cv_ids: List[str], job_ids: List[str]):
+            if "report" in self.stages:
+                # Copied, as both lists grow while the pairs are submitted
+                fan_outs.append(itertools.product(list(cv_ids), list(job_ids)))
+
+        def fill():
+            """Submit waiting report pairs while there's room"""
+            while fan_outs and len(pending) < self.max_pending:
+                pair = next(fan_outs[0], None)
+                if pair is None:
+                    fan_outs.popleft()
+                    continue
+                submit("suitability_report", pair, lambda pair=pair: self._report(*pair))
+
+        def handle_next():
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in finished:
+                task_type, item = pending.pop(future)
+                result = future.result()
+                if result.get("error"):
+                    continue
+                if task_type == "job_search":
+                    for url in result.get("job_urls", []):
+                        submit_job(url)
+                # Different files or URLs can resolve to the same stored analysis
+                elif task_type == "cv_analysis" and result["id"] not in cvs_done:
+                    cvs_done.append(result["id"])
+                    submit_reports([result["id"]], jobs_done)
+                elif task_type == "job_analysis" and result["id"] not in jobs_done:
+                    jobs_done.append(result["id"])
+                    submit_reports(cvs_done, [result["id"]])
+                elif task_type == "suitability_report" and "letter" in self.stages:
+                    if (result.get("score") or 0) >= self.letter_min_score:
+                        cv_id, job_id = item
+                        submit("cover_letter", (cv_id, job_id),
+                               lambda cv_id=cv_id, job_id=job_id: self._letter(cv_id, job_id))
+            fill()
+
+        try:
+            for record in records:
+                # Read ahead only so far, so a large input isn't all queued in memory at once
+                while len(pending) >= self.max_pending or fan_outs:
+                    if not pending:
+                        fill()
+                        continue
+                    handle_next()
+                if not isinstance(record, dict):
+                    self._reject(record, record.error if isinstance(record, InvalidInput)
+                                 else "expected a JSON object")
+                elif record.get("cv_path"):
+                    path = record["cv_path"]
+                    if "analyze" in self.stages and path not in seen_cvs:
+                        seen_cvs.add(path)
+                        submit("cv_analysis", path, lambda path=path: self._analyze_cv(path))
+                elif record.get("job_url"):
+                    submit_job(record["job_url"])
+                elif record.get("job_title"):
+                    if "search" in self.stages:
+                        filters = {field: record.get(field, "") for field in SEARCH_FIELDS}
+                        submit("job_search", filters, lambda filters=filters: self._search(filters))
+                else:
+                    self._reject(record, "expected cv_path, job_url or job_title")
+            while pending or fan_outs:
+                if not pending:
+                    fill()
+                    continue
+                handle_next()
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+        return self.timer.summary()
+
+    def _reject(self, record: Any, error: str):
+        """Report an input record that can't be processed as a failed item"""
+        now = time.perf_counter()
+        self.timer.record("input", now, now, True)
+        self._emit({"stage": "input", "input": record, "id": None, "error": error})
+
+    def _timed(self, task_type: str, item: Any, fn: Callable[[], Dict[str, Any]]):
+        """Run one item, emitting its NDJSON line whether it succeeds or fails"""
+        started = time.perf_counter()
+        try:
+            with span(f"pipeline.{task_type}", input=str(item)):
+                result = {**fn(), "error": None}
+        except Exception as e:
+            result = {"id": None, "error": str(e) or type(e).__name__}
+        finished = time.perf_counter()
+        self.timer.record(task_type, started, finished, bool(result["error"]))
+        self._emit({"stage": task_type, "input": item, **result,
+                    "seconds": round(finished - started, 3)})
+        return result
+
+    def _search(self, filters: Dict[str, str]) -> Dict[str, Any]:
+        doc_id, results = search_jobs(self.db, filters, agent=self.agents.get("job_search"))
+        urls = [job["url"] for job in results if job.get("url") not in (None, "", "N/A")]
+        return {"id": doc_id, "job_count": len(results), "job_urls": urls}
+
+    def _analyze_cv(self, path: str) -> Dict[str, Any]:
+        doc_id, result, cached = analyze_cv_pdf(self.db, path,
+                                                agent=self.agents.get("cv_analysis"))
+        return {"id": doc_id, "cached": cached,
+                "name": result.get("personal_info", {}).get("name")}
+
+    def _analyze_job(self, job_url: str) -> Dict[str, Any]:
+        doc_id, result, cached = analyze_job_url(self.db, job_url,
+                                                 agent=self.agents.get("job_analysis"))
+        return {"id": doc_id, "cached": cached, "job_title": result.get("job_title"),
+                "company": result.get("company")}
+
+    def _report(self, cv_id: str, job_id: str) -> Dict[str, Any]:
+        doc_id, report = generate_suitability_report(
+            self.db, cv_id, job_id, agent=self.agents.get("suitability_report")
+        )
+        return {"id": doc_id, "score": report.get("overall_match_score")}
+
+    def _letter(self, cv_id: str, job_id: str) -> Dict[str, Any]:
+        doc_id, _ = generate_cover_letter(self.db, cv_id, job_id, self.tone,
+                                          agent=self.agents.get("cover_letter"))
+        return {"id": doc_id, "tone": self.tone}
+
+
+def print_summary(summary: Dict[str, Dict[str, float]], wall_seconds: float, file: IO[str]):
+    print(f"{'stage':20} {'count':>6} {'failed':>6} {'mean s':>8} {'p95 s':>8} {'wall s':>8}",
+          file=file)
+    for stage, stats in summary.items():
+        print(f"{stage:20} {stats['count']:6d} {stats['failed']:6d} {stats['mean_seconds']:8.2f} "
+              f"{stats['p95_seconds']:8.2f} {stats['wall_seconds']:8.2f}", file=file)
+    print(f"total wall time {wall_seconds:.2f} s", file=file)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run searches, analyses, reports and letters")
+    parser.add_argument("inputs",
+                        help="CSV or NDJSON file of cv_path, job_url or job_title records")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument("--concurrency", default=TASK_WORKERS,
+                        help="Workers per pool, e.g. analysis=8,report=4 (default: TASK_WORKERS)")
+    parser.add_argument("--cv-id", action="append", default=[],
+                        help="Also report on this stored CV analysis, repeatable")
+    parser.add_argument("--tone", default=TONES[0], choices=TONES,
+                        help="Tone of the cover letters")
+    parser.add_argument("--letter-min-score", type=float, default=0,
+                        help="Only write letters for reports scoring at least this")
+    parser.add_argument("--output", help="Write the NDJSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    stages = tuple(stage.strip() for stage in args.stages.split(",") if stage.strip())
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    # Letters are only written for the reports of this run
+    if "letter" in stages and "report" not in stages:
+        parser.error("the letter stage needs the report stage")
+    try:
+        pool_sizes = parse_pool_sizes(args.concurrency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    from utils.mongodb import db
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        runner = PipelineRunner(db, stages, pool_sizes, args.tone, args.letter_min_score, output)
+        summary = runner.run(read_inputs(args.inputs), args.cv_id)
+    finally:
+        if args.output:
+            output.close()
+    print_summary(summary, time.perf_counter() - start, sys.stderr)
+    return 1 if any(stats["failed"] for stats in summary.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Report how long each module takes to import
+
+Every target is imported in a fresh interpreter with ``-X importtime``, so the
+numbers are cold-start costs rather than cached ones.
+
+Usage:
+    python -m cli.profile_startup [module ...] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# What app.py imports before the first render, plus every page module
+DEFAULT_TARGETS = [
+    "streamlit",
+    "streamlit_option_menu",
+    "pages.cv_analyzer_page",
+    "pages.job_search_page",
+    "pages.job_analyzer_page",
+    "pages.suitability_report_page",
+    "pages.cover_letter_page",
+    "pages.dashboard_page",
+    "pages.traces_page",
+]
+
+# Dependencies that only some code paths need and should stay out of page imports
+HEAVY_MODULES = ["selenium", "webdriver_manager", "PyPDF2", "bs4", "agno", "openai", "pymongo"]
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_import(module: str) -> Tuple[float, Dict[str, Tuple[float, float]]]:
+    """Import a module in a fresh interpreter
+
+    Returns the wall time in seconds and, for every module imported along the
+    way, its (self, cumulative) import time in seconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.strip()}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    total = timings.get(module, (0.0, 0.0))[1]
+    return total, timings
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Report import time per module")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS,
+                        help="Modules to import (default: the app's startup modules and pages)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Number of slowest imported modules to list per target")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        total, timings = profile_import(module)
+        heavy = [name for name in HEAVY_MODULES if name in timings]
+        print(f"{module}: {total * 1000:.1f} ms")
+        if heavy:
+            print(f"  pulls in: {', '.join(heavy)}")
+        slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        for name, (self_s, cumulative_s) in slowest:
+            print(f"  {self_s * 1000:8.1f} ms self "
+                  f"{cumulative_s * 1000:8.1f} ms cumulative  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Re-check tracked job postings, re-analyzing only the ones whose description changed
+
+Every stored job URL is tracked through its newest analysis. Each posting is
+scraped again and its normalized description hash compared with the stored
+one, so the LLM is only called for postings that were actually edited.
+Closed postings are marked removed and no longer checked. Each posting's
+outcome is printed as a JSON line, followed by the counts per outcome.
+
+Usage:
+    python -m cli.refresh_jobs [--older-than-hours 24] [--limit 500] [--concurrency 2]
+"""
+import argparse
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.config import DRIVER_POOL_SIZE
+from utils.mongodb import JobAgentDB
+from utils.pipeline import REFRESH_OUTCOMES, refresh_job_analysis
+
+
+def refresh_postings(db: JobAgentDB, checked_before: Optional[datetime] = None,
+                     limit: Optional[int] = None, concurrency: int = DRIVER_POOL_SIZE,
+                     agent=None,
+                     on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+                     ) -> Dict[str, int]:
+    """Refresh the tracked postings not checked since checked_before, returning outcome counts
+
+    on_result is called with each posting's outcome as it's known.
+    """
+    tracked = db.get_tracked_job_analyses(checked_before)[:limit]
+    counts = {outcome: 0 for outcome in REFRESH_OUTCOMES}
+    lock = threading.Lock()
+
+    def refresh(stored: Dict[str, Any]):
+        try:
+            result = refresh_job_analysis(db, stored, agent=agent)
+        except Exception as e:
+            # e.g. the LLM call for a changed posting failed; the stored analysis is kept
+            result = {"outcome": "failed", "id": str(stored["_id"]),
+                      "error": str(e) or type(e).__name__}
+        result = {"job_url": stored["job_url"], **result}
+        with lock:
+            counts[result["outcome"]] += 1
+            if on_result:
+                on_result(result)
+
+    # Scrapes wait for a browser from the shared pool, so more threads than browsers don't help
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        list(executor.map(refresh, tracked))
+    return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Re-check tracked job postings, re-analyzing only the changed ones"
+    )
+    parser.add_argument("--older-than-hours", type=float, default=0,
+                        help="Skip postings checked less than this many hours ago")
+    parser.add_argument("--limit", type=int, help="Check at most this many postings")
+    parser.add_argument("--concurrency", type=int, default=DRIVER_POOL_SIZE,
+                        help="Postings checked at once")
+    args = parser.parse_args(argv)
+
+    from utils.mongodb import db
+
+    checked_before = (datetime.now() - timedelta(hours=args.older_than_hours)
+                      if args.older_than_hours else None)
+    counts = refresh_postings(db, checked_before, args.limit, args.concurrency,
+                              on_result=lambda result: print(json.dumps(result), flush=True))
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Generate suitability reports for every CV x job pair worth one, within a budget
+
+Pairs are pre-scored locally from skills and requirements overlap and
+reported on best first, until --max-tokens or --max-cost would be exceeded.
+Each finished report is printed as a JSON line with the spend so far, and a
+progress line goes to stderr. Pairs with a stored report are skipped, so
+running the same command again resumes where the last run stopped.
+--show prints the matrix (pre-score and report score of every pair) instead.
+
+Usage:
+    python -m cli.report_matrix [--cv-id ID ...] [--job-id ID ...] [--max-tokens 200000]
+        [--max-cost 5] [--concurrency 2] [--min-pre-score 30] [--dry-run | --show]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+from utils.config import TASK_WORKERS
+from utils.matrix import Budget, match_matrix, run_matrix
+from utils.tasks import parse_pool_sizes
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Report on CV x job pairs in descending pre-score order within a budget"
+    )
+    parser.add_argument("--cv-id", action="append",
+                        help="Only this stored CV analysis, repeatable (default: all)")
+    parser.add_argument("--job-id", action="append",
+                        help="Only this stored job analysis, repeatable (default: all current)")
+    parser.add_argument("--max-tokens", type=int, help="Stop before exceeding this many tokens")
+    parser.add_argument("--max-cost", type=float, help="Stop before exceeding this many dollars")
+    parser.add_argument("--concurrency", type=int,
+                        default=parse_pool_sizes(TASK_WORKERS)["report"],
+                        help="Reports generated at once (default: the report pool size)")
+    parser.add_argument("--min-pre-score", type=float, default=0,
+                        help="Never report on pairs pre-scoring below this")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true",
+                      help="Print the pairs that would be reported, at their estimated tokens")
+    mode.add_argument("--show", action="store_true",
+                      help="Print every pair's pre-score and report score, and exit")
+    args = parser.parse_args(argv)
+
+    from utils.mongodb import db
+
+    if args.show:
+        for row in match_matrix(db, args.cv_id, args.job_id):
+            print(json.dumps({k: v for k, v in row.items() if k != "estimate"}))
+        return 0
+
+    done = 0
+
+    def on_result(result: Dict[str, Any]):
+        nonlocal done
+        done += 1
+        print(json.dumps(result), flush=True)
+        spent = result["spent"]
+        print(f"[{done}] {spent['tokens']:,} tokens, ${spent['cost']:.2f} spent",
+              file=sys.stderr, flush=True)
+
+    summary = run_matrix(db, args.cv_id, args.job_id, Budget(args.max_tokens, args.max_cost),
+                         args.concurrency, args.min_pre_score, on_result=on_result,
+                         dry_run=args.dry_run)
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Apply retention policies: set TTLs, archive expired documents, or restore an archive
+
+Policies come from RETENTION (e.g. "job_searches=ttl:30,job_analyses=archive:180").
+Archives are gzip-compressed NDJSON under ARCHIVE_DIR, one directory per run.
+
+Usage:
+    python -m cli.retention archive [--collection job_analyses --older-than-days 180]
+    python -m cli.retention restore job_analyses archive/job_analyses/20240501T000000000000
+    python -m cli.retention ttl
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from utils.config import ARCHIVE_DIR
+from utils.retention import apply_ttl, archive_collection, restore_archive, run_archival
+from utils.storage import INDEXES
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Archive or restore old documents")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive = commands.add_parser("archive", help="Archive documents past their retention")
+    archive.add_argument("--collection", choices=list(INDEXES),
+                         help="Archive this collection instead of following RETENTION")
+    archive.add_argument("--older-than-days", type=float,
+                         help="Age past which documents of --collection are archived")
+    archive.add_argument("--archive-dir", default=ARCHIVE_DIR)
+
+    restore = commands.add_parser("restore", help="Load an archive back into its collection")
+    restore.add_argument("collection", choices=list(INDEXES))
+    restore.add_argument("path", help="Archive part file, or a run directory of part files")
+
+    commands.add_parser("ttl", help="Apply the TTL policies in RETENTION, removing any other TTL")
+    args = parser.parse_args(argv)
+
+    # Connecting also sets the TTLs of the policies, but never removes one
+    from utils.mongodb import db
+
+    if args.command == "archive":
+        if args.collection:
+            if args.older_than_days is None:
+                parser.error("--collection needs --older-than-days")
+            cutoff = datetime.now() - timedelta(days=args.older_than_days)
+            results = [archive_collection(db, args.collection, cutoff, args.archive_dir)]
+        else:
+            results = run_archival(db, db.retention, args.archive_dir)
+        print(json.dumps(results))
+    elif args.command == "restore":
+        print(json.dumps(restore_archive(db, args.collection, args.path)))
+    else:
+        apply_ttl(db, db.retention, clear_others=True)
+        print(json.dumps({name: policy._asdict() for name, policy in db.retention.items()}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Look up canonical skill IDs and the stored jobs requiring skills
+
+Analyses store the canonical IDs of their skills when they're saved;
+"backfill" adds them to analyses saved before that, and with --recompute
+also rewrites IDs that the current taxonomy gives differently.
+
+Usage:
+    python -m cli.skills canonicalize "Postgres" "postgresql 14" "K8s"
+    python -m cli.skills jobs postgres python
+    python -m cli.skills backfill [--recompute]
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from utils.skills import get_skill_taxonomy
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Canonical skill IDs and jobs requiring skills")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    canonicalize = commands.add_parser("canonicalize", help="Print the canonical ID of skills")
+    canonicalize.add_argument("skills", nargs="+")
+
+    jobs = commands.add_parser("jobs", help="List the job analyses requiring every skill given")
+    jobs.add_argument("skills", nargs="+", help="Skills by any name, e.g. Postgres or K8s")
+
+    backfill = commands.add_parser("backfill",
+                                   help="Store skill IDs on analyses saved without them")
+    backfill.add_argument("--recompute", action="store_true",
+                          help="Also rewrite stored IDs that differ from the current taxonomy's")
+    args = parser.parse_args(argv)
+
+    taxonomy = get_skill_taxonomy()
+    if args.command == "canonicalize":
+        for skill in args.skills:
+            skill_id = taxonomy.canonicalize(skill)
+            print(json.dumps({"skill": skill, "id": skill_id,
+                              "label": taxonomy.label(skill_id) if skill_id else None}))
+        return 0
+
+    from utils.mongodb import db
+
+    if args.command == "jobs":
+        for job in db.get_job_analyses_requiring(tuple(args.skills)):
+            print(json.dumps(job, default=str))
+    else:
+        print(json.dumps(db.backfill_skill_ids(recompute=args.recompute)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,14 @@
 import streamlit as st
+import hashlib
 import os
 import tempfile
 from datetime import datetime
-from agents.cv_analyzer import CVAnalyzerAgent
 from utils.mongodb import db
+from utils.pipeline import strip_internal_fields
+from utils.tasks import result_document, task_key
+from utils.ui import (
+    cv_label, paginated_selectbox, sticky_button, submit_task, task_outcome, task_session_key
+)
 
 def show():
     st.header("📄 CV Analysis")
@@ -16,100 +21,99 @@ def show():
         
         with col1:
             st.info(f"File uploaded: {uploaded_file.name}")
+            force_refresh = st.checkbox("Re-analyze even if this CV was analyzed before")
         
+        data = uploaded_file.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        session_key = task_session_key("cv_task", digest)
         with col2:
             if st.button("Analyze CV", type="primary"):
-                with st.spinner("Analyzing your CV..."):
-                    try:
-                        # Create temporary file for PDF processing
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                            tmp_file.write(uploaded_file.getbuffer())
-                            temp_path = tmp_file.name
-                        
-                        agent = CVAnalyzerAgent()
-                        result = agent.run(temp_path)
-                        
-                        # Clean up temp file
-                        os.unlink(temp_path)
-                        
-                        # Save to MongoDB
-                        doc_id = db.save_cv_analysis(result)
-                        
-                        st.success(f"CV analyzed successfully! Document ID: {doc_id}")
-                        
-                        st.subheader("Analysis Results")
-                        
-                        with st.expander("Personal Information"):
-                            st.json(result.get("personal_info", {}))
-                        
-                        with st.expander("Summary"):
-                            st.write(result.get("summary", ""))
-                        
-                        with st.expander("Skills"):
-                            skills = result.get("skills", {})
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.write("**Technical Skills:**")
-                                for skill in skills.get("technical", []):
-                                    st.write(f"• {skill}")
-                            with col2:
-                                st.write("**Soft Skills:**")
-                                for skill in skills.get("soft", []):
-                                    st.write(f"• {skill}")
-                            with col3:
-                                st.write("**Languages:**")
-                                for lang in skills.get("languages", []):
-                                    st.write(f"• {lang}")
-                        
-                        with st.expander("Experience"):
-                            for exp in result.get("experience", []):
-                                st.write(f"**{exp.get('position', '')}** at {exp.get('company', '')}")
-                                st.write(f"📅 {exp.get('duration', '')} | 📍 {exp.get('location', '')}")
-                                for resp in exp.get("responsibilities", []):
-                                    st.write(f"• {resp}")
-                                st.write("---")
-                        
-                        with st.expander("Education"):
-                            for edu in result.get("education", []):
-                                st.write(f"**{edu.get('degree', '')}**")
-                                st.write(f"{edu.get('institution', '')} | {edu.get('graduation_date', '')}")
-                                if edu.get("gpa"):
-                                    st.write(f"GPA: {edu.get('gpa')}")
-                                st.write("---")
-                        
-                        with st.expander("Full JSON Data"):
-                            st.json(result)
-                        
-                    except Exception as e:
-                        st.error(f"Error analyzing CV: {str(e)}")
+                # Kept until the task has read it; the same upload maps to the same file
+                pdf_path = os.path.join(tempfile.gettempdir(), f"job_agent_cv_{digest}.pdf")
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+                    tmp_file.write(data)
+                os.replace(tmp_file.name, pdf_path)
+                submit_task(
+                    session_key, "cv_analysis",
+                    {"pdf_path": pdf_path, "force_refresh": force_refresh, "delete_pdf": True},
+                    key=task_key("cv_analysis", {"sha256": digest, "force_refresh": force_refresh})
+                )
+    
+        task = task_outcome(session_key, "Error analyzing CV")
+        if task:
+            doc_id = task["result"]["id"]
+            if task["result"]["cached"]:
+                st.success(f"This CV was analyzed before, loaded stored analysis. Document ID: {doc_id}")
+            else:
+                st.success(f"CV analyzed successfully! Document ID: {doc_id}")
+            stored = result_document(db, task)
+            if stored:
+                _show_analysis(strip_internal_fields(stored))
     
     st.markdown("---")
     st.subheader("📁 Previously Analyzed CVs")
     
-    cv_analyses = db.get_cv_analyses()
-    if cv_analyses:
-        # Create display options with timestamp and name
-        options = []
-        for analysis in cv_analyses:
-            created_at = analysis["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-            name = analysis.get("personal_info", {}).get("name", "Unknown")
-            option = f"{created_at} - {name}"
-            options.append((option, str(analysis["_id"])))
-        
-        selected = st.selectbox(
-            "Select a CV analysis to view:",
-            options,
-            format_func=lambda x: x[0]
-        )
-        
-        if st.button("Load Selected Analysis"):
-            doc_id = selected[1]
-            data = db.get_cv_analysis_by_id(doc_id)
-            if data:
-                # Remove MongoDB specific fields for display
-                data.pop("_id", None)
-                data.pop("created_at", None)
-                data.pop("type", None)
-                st.json(data)
-    else:
-        st.info("No previous CV analyses found.")
\ No newline at end of file
+    name = st.text_input("Search by name", key="cv_history_name")
+    selected = paginated_selectbox(
+        "cv_history",
+        "Select a CV analysis to view:",
+        lambda cursor, page_size: db.get_cv_analysis_page(cursor, page_size, name=name),
+        cv_label,
+        filters={"name": name},
+        empty_message="No previous CV analyses found."
+    )
+    
+    if selected and sticky_button("Load Selected Analysis", "cv_history_load", selected[1]):
+        doc_id = selected[1]
+        data = db.get_cv_analysis_by_id(doc_id)
+        if data:
+            # Remove MongoDB specific fields for display
+            data.pop("_id", None)
+            data.pop("created_at", None)
+            data.pop("type", None)
+            st.json(data)
+
+
+def _show_analysis(result):
+    st.subheader("Analysis Results")
+
+    with st.expander("Personal Information"):
+        st.json(result.get("personal_info", {}))
+
+    with st.expander("Summary"):
+        st.write(result.get("summary", ""))
+
+    with st.expander("Skills"):
+        skills = result.get("skills", {})
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.write("**Technical Skills:**")
+            for skill in skills.get("technical", []):
+                st.write(f"• {skill}")
+        with col2:
+            st.write("**Soft Skills:**")
+            for skill in skills.get("soft", []):
+                st.write(f"• {skill}")
+        with col3:
+            st.write("**Languages:**")
+            for lang in skills.get("languages", []):
+                st.write(f"• {lang}")
+
+    with st.expander("Experience"):
+        for exp in result.get("experience", []):
+            st.write(f"**{exp.get('position', '')}** at {exp.get('company', '')}")
+            st.write(f"📅 {exp.get('duration', '')} | 📍 {exp.get('location', '')}")
+            for resp in exp.get("responsibilities", []):
+                st.write(f"• {resp}")
+            st.write("---")
+
+    with st.expander("Education"):
+        for edu in result.get("education", []):
+            st.write(f"**{edu.get('degree', '')}**")
+            st.write(f"{edu.get('institution', '')} | {edu.get('graduation_date', '')}")
+            if edu.get("gpa"):
+                st.write(f"GPA: {edu.get('gpa')}")
+            st.write("---")
+
+    with st.expander("Full JSON Data"):
+        st.json(result)
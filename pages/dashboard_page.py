@@ -0,0 +1,93 @@
+import streamlit as st
+from datetime import date, datetime, time, timedelta
+from utils.mongodb import SKILL_TYPES, db
+
+# Windows start at midnight so that reruns on the same day reuse cached results
+TIME_WINDOWS = {"All time": None, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}
+
+COLLECTION_LABELS = {
+    "cv_analyses": "CV analyses",
+    "job_searches": "Job searches",
+    "job_analyses": "Job analyses",
+    "suitability_reports": "Suitability reports",
+    "cover_letters": "Cover letters",
+}
+
+
+def window_start(days):
+    if days is None:
+        return None
+    return datetime.combine(date.today() - timedelta(days=days), time())
+
+
+def show():
+    import pandas as pd
+
+    st.header("📈 Dashboard")
+    st.write("Trends across your saved analyses, reports and cover letters.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        window = st.selectbox("Time window", list(TIME_WINDOWS), key="dashboard_window")
+    since = window_start(TIME_WINDOWS[window])
+
+    by_company = db.get_report_scores_by_company(since=since)
+    companies = [row["key"] for row in by_company if row["key"]]
+    with col2:
+        company = st.selectbox("Company", ["All companies"] + companies, key="dashboard_company")
+    company = None if company == "All companies" else company
+    with col3:
+        period = st.selectbox("Group activity by", ["day", "week", "month"], index=1,
+                              key="dashboard_period")
+
+    st.subheader("Activity")
+    activity = db.get_activity_by_period(period, since=since)
+    counts = {
+        COLLECTION_LABELS[collection]: {row["period"]: row["count"] for row in rows}
+        for collection, rows in activity.items()
+    }
+    totals = st.columns(len(counts))
+    for column, (label, per_period) in zip(totals, counts.items()):
+        column.metric(label, sum(per_period.values()))
+    if any(counts.values()):
+        st.bar_chart(pd.DataFrame(counts).fillna(0).sort_index())
+
+    st.subheader("Suitability scores")
+    if not by_company:
+        st.info("No suitability reports in this time window yet.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Score distribution**")
+        histogram = db.get_report_score_histogram(since=since, company=company)
+        st.bar_chart(pd.DataFrame(
+            {"Reports": [bucket["count"] for bucket in histogram]},
+            index=[f"{bucket['min']}-{bucket['max'] - 1}" for bucket in histogram]
+        ))
+    with col2:
+        st.write("**Scores per company**")
+        st.dataframe(pd.DataFrame([
+            {"Company": row["key"] or "Unknown", "Reports": row["count"],
+             "Average": round(row["avg"], 1) if row["avg"] is not None else None,
+             "Min": row["min"], "Max": row["max"]}
+            for row in by_company
+        ]), hide_index=True)
+
+    st.subheader("Skills")
+    skill_type = st.radio("Skill type", SKILL_TYPES, horizontal=True, key="dashboard_skill_type",
+                          format_func=lambda value: value.replace("_", " ").capitalize())
+    col1, col2 = st.columns(2)
+    for column, outcome, title in ((col1, "missing", "Most often missing"),
+                                   (col2, "matched", "Most often matched")):
+        with column:
+            st.write(f"**{title}**")
+            skills = db.get_top_report_skills(outcome, skill_type, limit=15, since=since,
+                                              company=company)
+            if skills:
+                st.bar_chart(pd.DataFrame(
+                    {"Reports": [skill["count"] for skill in skills]},
+                    index=[skill["value"] for skill in skills]
+                ))
+            else:
+                st.info("No skills recorded yet.")
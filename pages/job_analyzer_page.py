@@ -1,103 +1,117 @@
 import streamlit as st
 from datetime import datetime
-from agents.job_analyzer import JobAnalyzerAgent
 from utils.mongodb import db
+from utils.pipeline import strip_internal_fields
+from utils.tasks import result_document
+from utils.ui import (
+    format_created_at, job_label, paginated_selectbox, sticky_button, submit_task, task_outcome,
+    task_session_key
+)
 
 def show():
     st.header("🔬 Job Posting Analysis")
     st.write("Analyze a LinkedIn job posting by entering its URL.")
     
     job_url = st.text_input("LinkedIn Job URL", placeholder="https://www.linkedin.com/jobs/view/...")
+    force_refresh = st.checkbox("Re-analyze even if this posting was analyzed before")
     
+    session_key = task_session_key("job_task", job_url)
     if st.button("Analyze Job Posting", type="primary"):
         if job_url:
-            with st.spinner("Analyzing job posting..."):
-                try:
-                    agent = JobAnalyzerAgent()
-                    result = agent.run(job_url)
-                    
-                    # Save to MongoDB
-                    result["job_url"] = job_url
-                    doc_id = db.save_job_analysis(result)
-                    
-                    st.success(f"Job analyzed successfully! Document ID: {doc_id}")
-                    
-                    st.subheader("Analysis Results")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write(f"**Job Title:** {result.get('job_title', 'N/A')}")
-                        st.write(f"**Company:** {result.get('company', 'N/A')}")
-                        st.write(f"**Location:** {result.get('location', 'N/A')}")
-                    with col2:
-                        st.write(f"**Employment Type:** {result.get('employment_type', 'N/A')}")
-                        st.write(f"**Experience Level:** {result.get('experience_level', 'N/A')}")
-                        st.write(f"**Remote Options:** {result.get('remote_options', 'N/A')}")
-                    
-                    with st.expander("Required Skills"):
-                        skills = result.get("required_skills", {})
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.write("**Technical Skills:**")
-                            for skill in skills.get("technical", []):
-                                st.write(f"• {skill}")
-                        with col2:
-                            st.write("**Soft Skills:**")
-                            for skill in skills.get("soft", []):
-                                st.write(f"• {skill}")
-                    
-                    with st.expander("Responsibilities"):
-                        for resp in result.get("responsibilities", []):
-                            st.write(f"• {resp}")
-                    
-                    with st.expander("Requirements"):
-                        for req in result.get("requirements", []):
-                            st.write(f"• {req}")
-                    
-                    with st.expander("Benefits"):
-                        for benefit in result.get("benefits", []):
-                            st.write(f"• {benefit}")
-                    
-                    with st.expander("Key Qualifications"):
-                        for qual in result.get("key_qualifications", []):
-                            st.write(f"• {qual}")
-                    
-                    with st.expander("Full JSON Data"):
-                        st.json(result)
-                        
-                except Exception as e:
-                    st.error(f"Error analyzing job: {str(e)}")
+            submit_task(session_key, "job_analysis",
+                        {"job_url": job_url, "force_refresh": force_refresh})
         else:
             st.warning("Please enter a LinkedIn job URL.")
     
+    task = task_outcome(session_key, "Error analyzing job") if job_url else None
+    if task:
+        doc_id = task["result"]["id"]
+        if task["result"]["cached"]:
+            st.success(f"This posting was analyzed before, loaded stored analysis. Document ID: {doc_id}")
+        else:
+            st.success(f"Job analyzed successfully! Document ID: {doc_id}")
+        stored = result_document(db, task)
+        if stored:
+            _show_analysis(strip_internal_fields(stored))
+    elif job_url and session_key not in st.session_state:
+        stored = db.get_job_analysis_by_url(job_url)
+        if stored:
+            st.info(f"Showing the analysis of this posting from {format_created_at(stored)}.")
+            _show_analysis(strip_internal_fields(stored))
+    
     st.markdown("---")
     st.subheader("📁 Previously Analyzed Jobs")
     
-    job_analyses = db.get_job_analyses()
-    if job_analyses:
-        # Create display options with timestamp and job details
-        options = []
-        for analysis in job_analyses:
-            created_at = analysis["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-            job_title = analysis.get("job_title", "Unknown")
-            company = analysis.get("company", "Unknown")
-            option = f"{created_at} - {job_title} at {company}"
-            options.append((option, str(analysis["_id"])))
-        
-        selected = st.selectbox(
-            "Select a job analysis to view:",
-            options,
-            format_func=lambda x: x[0]
-        )
-        
-        if st.button("Load Selected Analysis"):
-            doc_id = selected[1]
-            data = db.get_job_analysis_by_id(doc_id)
-            if data:
-                # Remove MongoDB specific fields for display
-                data.pop("_id", None)
-                data.pop("created_at", None)
-                data.pop("type", None)
-                st.json(data)
-    else:
-        st.info("No previous job analyses found.")
\ No newline at end of file
+    col1, col2 = st.columns(2)
+    with col1:
+        title = st.text_input("Search by job title", key="job_history_title")
+    with col2:
+        company = st.text_input("Search by company", key="job_history_company")
+    selected = paginated_selectbox(
+        "job_history",
+        "Select a job analysis to view:",
+        lambda cursor, page_size: db.get_job_analysis_page(
+            cursor, page_size, title=title, company=company
+        ),
+        job_label,
+        filters={"title": title, "company": company},
+        empty_message="No previous job analyses found."
+    )
+    
+    if selected and sticky_button("Load Selected Analysis", "job_history_load", selected[1]):
+        doc_id = selected[1]
+        data = db.get_job_analysis_by_id(doc_id)
+        if data:
+            st.json(strip_internal_fields(data))
+            if data.get("raw_content"):
+                with st.expander("Scraped job description"):
+                    st.text(data["raw_content"])
+
+
+def _show_analysis(result):
+    st.subheader("Analysis Results")
+    if result.get("posting_status") == "removed":
+        st.warning("LinkedIn no longer accepts applications for this posting.")
+    elif result.get("posting_status") == "changed":
+        st.warning("This posting was edited since, and a newer analysis of it is stored.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write(f"**Job Title:** {result.get('job_title', 'N/A')}")
+        st.write(f"**Company:** {result.get('company', 'N/A')}")
+        st.write(f"**Location:** {result.get('location', 'N/A')}")
+    with col2:
+        st.write(f"**Employment Type:** {result.get('employment_type', 'N/A')}")
+        st.write(f"**Experience Level:** {result.get('experience_level', 'N/A')}")
+        st.write(f"**Remote Options:** {result.get('remote_options', 'N/A')}")
+
+    with st.expander("Required Skills"):
+        skills = result.get("required_skills", {})
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("**Technical Skills:**")
+            for skill in skills.get("technical", []):
+                st.write(f"• {skill}")
+        with col2:
+            st.write("**Soft Skills:**")
+            for skill in skills.get("soft", []):
+                st.write(f"• {skill}")
+
+    with st.expander("Responsibilities"):
+        for resp in result.get("responsibilities", []):
+            st.write(f"• {resp}")
+
+    with st.expander("Requirements"):
+        for req in result.get("requirements", []):
+            st.write(f"• {req}")
+
+    with st.expander("Benefits"):
+        for benefit in result.get("benefits", []):
+            st.write(f"• {benefit}")
+
+    with st.expander("Key Qualifications"):
+        for qual in result.get("key_qualifications", []):
+            st.write(f"• {qual}")
+
+    with st.expander("Full JSON Data"):
+        st.json(result)
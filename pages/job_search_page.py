@@ -1,7 +1,11 @@
 import streamlit as st
 from datetime import datetime
-from agents.job_searcher import JobSearchAgent
 from utils.mongodb import db
+from utils.tasks import result_document
+from utils.ui import (
+    job_search_label, paginated_selectbox, sticky_button, submit_task, task_outcome,
+    task_session_key
+)
 
 def show():
     st.header("🔍 LinkedIn Job Search")
@@ -26,77 +30,62 @@ def show():
         
         submitted = st.form_submit_button("Search Jobs", type="primary")
     
+    filters = {
+        "job_title": job_title,
+        "location": location,
+        "experience_level": experience_level,
+        "posted_date": posted_date
+    }
+    # Form values only change on submit, so reruns keep showing the last search
+    session_key = task_session_key("search_task", *filters.values())
     if submitted and job_title:
-        with st.spinner("Searching for jobs..."):
-            try:
-                filters = {
-                    "job_title": job_title,
-                    "location": location,
-                    "experience_level": experience_level,
-                    "posted_date": posted_date
-                }
-                
-                agent = JobSearchAgent()
-                results = agent.run(filters)
-                
-                if results:
-                    # Save to MongoDB
-                    search_data = {
-                        "filters": filters,
-                        "results": results,
-                        "job_count": len(results)
-                    }
-                    doc_id = db.save_job_search(search_data)
-                    
-                    st.success(f"Found {len(results)} jobs! Document ID: {doc_id}")
-                    
-                    st.subheader("Search Results")
-                    
-                    for idx, job in enumerate(results, 1):
-                        with st.expander(f"{idx}. {job.get('title', 'N/A')} at {job.get('company', 'N/A')}"):
-                            col1, col2 = st.columns([3, 1])
-                            with col1:
-                                st.write(f"**Location:** {job.get('location', 'N/A')}")
-                                st.write(f"**Posted:** {job.get('posted_date', 'N/A')}")
-                                st.write(f"**Experience Level:** {job.get('experience_level', 'N/A')}")
-                            with col2:
-                                if job.get('url') != 'N/A':
-                                    st.link_button("View Job", job.get('url'))
-                else:
-                    st.warning("No jobs found. Try adjusting your search criteria.")
-                    
-            except Exception as e:
-                st.error(f"Error searching jobs: {str(e)}")
+        submit_task(session_key, "job_search", {"filters": filters})
     elif submitted:
         st.warning("Please enter a job title to search.")
     
+    task = task_outcome(session_key, "Error searching jobs", render_partial=_show_results)
+    if task:
+        search = result_document(db, task)
+        if search:
+            results = search.get("results", [])
+            st.success(f"Found {len(results)} jobs! Document ID: {task['result']['id']}")
+            
+            st.subheader("Search Results")
+            _show_results(results)
+        else:
+            st.warning("No jobs found. Try adjusting your search criteria.")
+    
     st.markdown("---")
     st.subheader("📁 Previous Job Searches")
     
-    job_searches = db.get_job_searches()
-    if job_searches:
-        # Create display options with timestamp and search criteria
-        options = []
-        for search in job_searches:
-            created_at = search["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-            job_title = search.get("filters", {}).get("job_title", "Unknown")
-            job_count = search.get("job_count", 0)
-            option = f"{created_at} - {job_title} ({job_count} jobs)"
-            options.append((option, str(search["_id"])))
-        
-        selected = st.selectbox(
-            "Select a job search to view:",
-            options,
-            format_func=lambda x: x[0]
-        )
-        
-        if st.button("Load Selected Search"):
-            doc_id = selected[1]
-            data = db.get_job_search_by_id(doc_id)
-            if data:
-                results = data.get("results", [])
-                st.write(f"Found {len(results)} jobs in this search:")
-                for idx, job in enumerate(results, 1):
-                    st.write(f"{idx}. **{job.get('title')}** at {job.get('company')} - {job.get('location')}")
-    else:
-        st.info("No previous job searches found.")
\ No newline at end of file
+    title = st.text_input("Search by job title", key="search_history_title")
+    selected = paginated_selectbox(
+        "search_history",
+        "Select a job search to view:",
+        lambda cursor, page_size: db.get_job_search_page(cursor, page_size, title=title),
+        job_search_label,
+        filters={"title": title},
+        empty_message="No previous job searches found."
+    )
+    
+    if selected and sticky_button("Load Selected Search", "search_history_load", selected[1]):
+        doc_id = selected[1]
+        data = db.get_job_search_by_id(doc_id)
+        if data:
+            results = data.get("results", [])
+            st.write(f"Found {len(results)} jobs in this search:")
+            for idx, job in enumerate(results, 1):
+                st.write(f"{idx}. **{job.get('title')}** at {job.get('company')} - {job.get('location')}")
+
+
+def _show_results(results):
+    for idx, job in enumerate(results, 1):
+        with st.expander(f"{idx}. {job.get('title', 'N/A')} at {job.get('company', 'N/A')}"):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**Location:** {job.get('location', 'N/A')}")
+                st.write(f"**Posted:** {job.get('posted_date', 'N/A')}")
+                st.write(f"**Experience Level:** {job.get('experience_level', 'N/A')}")
+            with col2:
+                if job.get('url') != 'N/A':
+                    st.link_button("View Job", job.get('url'))
@@ -1,203 +1,190 @@
 import streamlit as st
 from datetime import datetime
-from agents.suitability_reporter import SuitabilityReporterAgent
 from utils.mongodb import db
+from utils.tasks import result_document
+from utils.ui import (
+    cv_label, format_created_at, job_label, paginated_selectbox, report_label, sticky_button,
+    submit_task, task_outcome, task_session_key
+)
 
 def show():
     st.header("📊 Job Suitability Report")
     st.write("Generate a detailed suitability report by comparing your CV with a job posting.")
     
-    # Get CV and Job analyses from MongoDB
-    cv_analyses = db.get_cv_analyses()
-    job_analyses = db.get_job_analyses()
-    
-    if not cv_analyses or not job_analyses:
+    # Check there is something to compare without loading any listing
+    if not db.get_cv_analysis_page(page_size=1)[0] or not db.get_job_analysis_page(page_size=1)[0]:
         st.warning("Please analyze at least one CV and one job posting first.")
         return
     
-    # Create display options for CV analyses
-    cv_options = []
-    for analysis in cv_analyses:
-        created_at = analysis["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-        name = analysis.get("personal_info", {}).get("name", "Unknown")
-        option = f"{created_at} - {name}"
-        cv_options.append((option, str(analysis["_id"]), analysis))
-    
-    # Create display options for job analyses
-    job_options = []
-    for analysis in job_analyses:
-        created_at = analysis["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-        job_title = analysis.get("job_title", "Unknown")
-        company = analysis.get("company", "Unknown")
-        option = f"{created_at} - {job_title} at {company}"
-        job_options.append((option, str(analysis["_id"]), analysis))
-    
     col1, col2 = st.columns(2)
     
     with col1:
-        selected_cv = st.selectbox(
+        cv_name = st.text_input("Search CVs by name", key="report_cv_name")
+        selected_cv = paginated_selectbox(
+            "report_cv",
             "Select CV Analysis:",
-            cv_options,
-            format_func=lambda x: x[0]
+            lambda cursor, page_size: db.get_cv_analysis_page(cursor, page_size, name=cv_name),
+            cv_label,
+            filters={"name": cv_name}
         )
     
     with col2:
-        selected_job = st.selectbox(
+        job_query = st.text_input("Search jobs by title", key="report_job_title")
+        selected_job = paginated_selectbox(
+            "report_job",
             "Select Job Analysis:",
-            job_options,
-            format_func=lambda x: x[0]
+            lambda cursor, page_size: db.get_job_analysis_page(cursor, page_size, title=job_query),
+            job_label,
+            filters={"title": job_query}
         )
     
-    if st.button("Generate Suitability Report", type="primary"):
-        with st.spinner("Generating suitability report..."):
-            try:
-                # Get the full data from selected options
-                cv_data = selected_cv[2]
-                job_data = selected_job[2]
-                
-                # Remove MongoDB fields
-                cv_data_clean = {k: v for k, v in cv_data.items() if k not in ["_id", "created_at", "type"]}
-                job_data_clean = {k: v for k, v in job_data.items() if k not in ["_id", "created_at", "type"]}
-                
-                agent = SuitabilityReporterAgent()
-                report = agent.run(cv_data_clean, job_data_clean)
-                
-                # Add reference to source documents
-                report["cv_id"] = selected_cv[1]
-                report["job_id"] = selected_job[1]
-                report["cv_name"] = cv_data.get("personal_info", {}).get("name", "Unknown")
-                report["job_title"] = job_data.get("job_title", "Unknown")
-                report["company"] = job_data.get("company", "Unknown")
-                
-                # Save to MongoDB
-                doc_id = db.save_suitability_report(report)
-                
-                st.success(f"Report generated successfully! Document ID: {doc_id}")
-                
-                st.subheader("Suitability Report")
-                
-                score = report.get("overall_match_score", 0)
-                col1, col2, col3 = st.columns([1, 2, 1])
-                with col2:
-                    st.metric("Overall Match Score", f"{score}%")
-                    if score >= 80:
-                        st.success("Excellent match!")
-                    elif score >= 60:
-                        st.info("Good match with some gaps")
-                    else:
-                        st.warning("Consider improving key areas")
-                
-                st.write(f"**Summary:** {report.get('summary', '')}")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    with st.expander("🌟 Strengths"):
-                        for strength in report.get("strengths", []):
-                            relevance_color = {
-                                "high": "🟢",
-                                "medium": "🟡",
-                                "low": "🔵"
-                            }
-                            st.write(f"{relevance_color.get(strength.get('relevance', 'medium'))} **{strength.get('category', '')}**")
-                            st.write(strength.get('description', ''))
-                            st.write("---")
-                
-                with col2:
-                    with st.expander("📈 Areas for Improvement"):
-                        for gap in report.get("gaps", []):
-                            st.write(f"**{gap.get('requirement', '')}**")
-                            st.write(f"Current: {gap.get('current_level', '')}")
-                            st.write(f"Required: {gap.get('required_level', '')}")
-                            st.write(f"💡 {gap.get('improvement_suggestion', '')}")
-                            st.write("---")
-                
-                with st.expander("🎯 Skill Analysis"):
-                    skills = report.get("skill_matches", {})
-                    tech_skills = skills.get("technical_skills", {})
-                    soft_skills = skills.get("soft_skills", {})
-                    
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.write("**Matched Technical Skills:**")
-                        for skill in tech_skills.get("matched", []):
-                            st.write(f"✅ {skill}")
-                    with col2:
-                        st.write("**Missing Technical Skills:**")
-                        for skill in tech_skills.get("missing", []):
-                            st.write(f"❌ {skill}")
-                    with col3:
-                        st.write("**Additional Skills You Have:**")
-                        for skill in tech_skills.get("additional", []):
-                            st.write(f"➕ {skill}")
-                
-                with st.expander("💼 Experience Analysis"):
-                    exp_analysis = report.get("experience_analysis", {})
-                    st.write(f"**Years Required:** {exp_analysis.get('years_required', 'N/A')}")
-                    st.write(f"**Years You Have:** {exp_analysis.get('years_possessed', 'N/A')}")
-                    st.write("**Relevant Experience:**")
-                    for exp in exp_analysis.get("relevant_experience", []):
-                        st.write(f"• {exp}")
-                
-                with st.expander("🎓 Recommendations"):
-                    for rec in report.get("recommendations", []):
-                        priority_emoji = {
-                            "high": "🔴",
-                            "medium": "🟡",
-                            "low": "🟢"
-                        }
-                        st.write(f"{priority_emoji.get(rec.get('priority', 'medium'))} **{rec.get('action', '')}**")
-                        st.write(f"Timeframe: {rec.get('timeframe', '')}")
-                        st.write("---")
-                
-                with st.expander("🗣️ Interview Preparation"):
-                    prep = report.get("interview_preparation", {})
-                    
-                    st.write("**Likely Questions:**")
-                    for q in prep.get("likely_questions", []):
-                        st.write(f"• {q}")
-                    
-                    st.write("\n**Key Talking Points:**")
-                    for point in prep.get("talking_points", []):
-                        st.write(f"• {point}")
-                    
-                    st.write("\n**Areas to Emphasize:**")
-                    for area in prep.get("areas_to_emphasize", []):
-                        st.write(f"• {area}")
-                
-            except Exception as e:
-                st.error(f"Error generating report: {str(e)}")
+    if selected_cv and selected_job:
+        cv_id, job_id = selected_cv[1], selected_job[1]
+        session_key = task_session_key("report_task", cv_id, job_id)
+        # Show the pair's newest report rather than generate it again on every visit
+        stored = None
+        if session_key not in st.session_state:
+            stored = db.get_suitability_report_for(cv_id, job_id)
+        regenerate = stored is not None or session_key in st.session_state
+        label = "Regenerate Suitability Report" if regenerate else "Generate Suitability Report"
+        if st.button(label, type="primary", key="generate_report"):
+            submit_task(session_key, "suitability_report", {"cv_id": cv_id, "job_id": job_id})
+            stored = None
+        
+        task = task_outcome(session_key, "Error generating report")
+        if task:
+            report = result_document(db, task)
+            if report:
+                st.success(f"Report generated successfully! Document ID: {task['result']['id']}")
+                _show_report(report)
+        elif stored:
+            st.info(f"Showing the report generated on {format_created_at(stored)}.")
+            _show_report(stored)
     
     st.markdown("---")
     st.subheader("📁 Previous Reports")
     
-    reports = db.get_suitability_reports()
-    if reports:
-        # Create display options with timestamp and details
-        options = []
-        for report in reports:
-            created_at = report["created_at"].strftime("%Y-%m-%d %H:%M:%S")
-            cv_name = report.get("cv_name", "Unknown")
-            job_title = report.get("job_title", "Unknown")
-            company = report.get("company", "Unknown")
-            score = report.get("overall_match_score", 0)
-            option = f"{created_at} - {cv_name} for {job_title} at {company} ({score}%)"
-            options.append((option, str(report["_id"])))
-        
-        selected = st.selectbox(
-            "Select a report to view:",
-            options,
-            format_func=lambda x: x[0]
-        )
-        
-        if st.button("Load Selected Report"):
-            doc_id = selected[1]
-            data = db.get_suitability_report_by_id(doc_id)
-            if data:
-                # Remove MongoDB specific fields for display
-                data.pop("_id", None)
-                data.pop("created_at", None)
-                data.pop("type", None)
-                st.json(data)
-    else:
-        st.info("No previous reports found.")
\ No newline at end of file
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        name = st.text_input("Search by CV name", key="report_history_name")
+    with col2:
+        company = st.text_input("Search by company", key="report_history_company")
+    with col3:
+        min_score, max_score = st.slider("Match score", 0, 100, (0, 100),
+                                         key="report_history_score")
+    selected = paginated_selectbox(
+        "report_history",
+        "Select a report to view:",
+        lambda cursor, page_size: db.get_suitability_report_page(
+            cursor, page_size, name=name, company=company,
+            min_score=min_score if min_score > 0 else None,
+            max_score=max_score if max_score < 100 else None
+        ),
+        report_label,
+        filters={"name": name, "company": company,
+                 "score": (min_score, max_score) if (min_score, max_score) != (0, 100) else None},
+        empty_message="No previous reports found."
+    )
+    
+    if selected and sticky_button("Load Selected Report", "report_history_load", selected[1]):
+        doc_id = selected[1]
+        data = db.get_suitability_report_by_id(doc_id)
+        if data:
+            # Remove MongoDB specific fields for display
+            data.pop("_id", None)
+            data.pop("created_at", None)
+            data.pop("type", None)
+            st.json(data)
+
+
+def _show_report(report):
+    st.subheader("Suitability Report")
+
+    score = report.get("overall_match_score", 0)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.metric("Overall Match Score", f"{score}%")
+        if score >= 80:
+            st.success("Excellent match!")
+        elif score >= 60:
+            st.info("Good match with some gaps")
+        else:
+            st.warning("Consider improving key areas")
+
+    st.write(f"**Summary:** {report.get('summary', '')}")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        with st.expander("🌟 Strengths"):
+            for strength in report.get("strengths", []):
+                relevance_color = {
+                    "high": "🟢",
+                    "medium": "🟡",
+                    "low": "🔵"
+                }
+                st.write(f"{relevance_color.get(strength.get('relevance', 'medium'))} **{strength.get('category', '')}**")
+                st.write(strength.get('description', ''))
+                st.write("---")
+
+    with col2:
+        with st.expander("📈 Areas for Improvement"):
+            for gap in report.get("gaps", []):
+                st.write(f"**{gap.get('requirement', '')}**")
+                st.write(f"Current: {gap.get('current_level', '')}")
+                st.write(f"Required: {gap.get('required_level', '')}")
+                st.write(f"💡 {gap.get('improvement_suggestion', '')}")
+                st.write("---")
+
+    with st.expander("🎯 Skill Analysis"):
+        skills = report.get("skill_matches", {})
+        tech_skills = skills.get("technical_skills", {})
+        soft_skills = skills.get("soft_skills", {})
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.write("**Matched Technical Skills:**")
+            for skill in tech_skills.get("matched", []):
+                st.write(f"✅ {skill}")
+        with col2:
+            st.write("**Missing Technical Skills:**")
+            for skill in tech_skills.get("missing", []):
+                st.write(f"❌ {skill}")
+        with col3:
+            st.write("**Additional Skills You Have:**")
+            for skill in tech_skills.get("additional", []):
+                st.write(f"➕ {skill}")
+
+    with st.expander("💼 Experience Analysis"):
+        exp_analysis = report.get("experience_analysis", {})
+        st.write(f"**Years Required:** {exp_analysis.get('years_required', 'N/A')}")
+        st.write(f"**Years You Have:** {exp_analysis.get('years_possessed', 'N/A')}")
+        st.write("**Relevant Experience:**")
+        for exp in exp_analysis.get("relevant_experience", []):
+            st.write(f"• {exp}")
+
+    with st.expander("🎓 Recommendations"):
+        for rec in report.get("recommendations", []):
+            priority_emoji = {
+                "high": "🔴",
+                "medium": "🟡",
+                "low": "🟢"
+            }
+            st.write(f"{priority_emoji.get(rec.get('priority', 'medium'))} **{rec.get('action', '')}**")
+            st.write(f"Timeframe: {rec.get('timeframe', '')}")
+            st.write("---")
+
+    with st.expander("🗣️ Interview Preparation"):
+        prep = report.get("interview_preparation", {})
+
+        st.write("**Likely Questions:**")
+        for q in prep.get("likely_questions", []):
+            st.write(f"• {q}")
+
+        st.write("\n**Key Talking Points:**")
+        for point in prep.get("talking_points", []):
+            st.write(f"• {point}")
+
+        st.write("\n**Areas to Emphasize:**")
+        for area in prep.get("areas_to_emphasize", []):
+            st.write(f"• {area}")
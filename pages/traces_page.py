@@ -0,0 +1,70 @@
+import streamlit as st
+from datetime import datetime
+from utils.config import TRACE_FILE
+from utils.tracing import read_traces, waterfall_rows
+
+# Spans read from the end of the trace file
+MAX_SPANS = 20000
+
+
+def _trace_label(spans):
+    rows = waterfall_rows(spans)
+    root = rows[0]
+    started = datetime.fromtimestamp(root["start"]).strftime("%Y-%m-%d %H:%M:%S")
+    total_ms = max(row["offset_ms"] + row["duration_ms"] for row in rows)
+    errors = sum(1 for row in rows if row["error"])
+    flag = f" · {errors} errors" if errors else ""
+    return f"{started} · {root['name']} · {total_ms / 1000:.2f} s · {len(rows)} spans{flag}"
+
+
+def show():
+    import altair as alt
+    import pandas as pd
+
+    st.header("🧭 Traces")
+    st.write("Where the time went in recent tasks: scrapes, LLM calls, parsing and database calls.")
+
+    if not TRACE_FILE:
+        st.info("Tracing is off. Set TRACE_FILE (e.g. TRACE_FILE=traces.jsonl) and restart the app.")
+        return
+    traces = read_traces(TRACE_FILE, MAX_SPANS)
+    if not traces:
+        st.info(f"No traces recorded in {TRACE_FILE} yet.")
+        return
+
+    index = st.selectbox("Trace", range(len(traces)), key="trace_index",
+                         format_func=lambda i: _trace_label(traces[i]))
+    rows = waterfall_rows(traces[index])
+    frame = pd.DataFrame([
+        {
+            # Numbered so that repeated names keep their own row, in order
+            "span": f"{n:03d} {'  ' * row['depth']}{row['name']}",
+            "kind": row["name"].split(".")[0],
+            "start_ms": row["offset_ms"],
+            "end_ms": row["offset_ms"] + row["duration_ms"],
+            "duration_ms": row["duration_ms"],
+            "self_ms": row["self_ms"],
+            "error": row["error"] or "",
+            "attributes": ", ".join(f"{k}={v}" for k, v in row["attributes"].items()),
+        }
+        for n, row in enumerate(rows)
+    ])
+
+    st.subheader("Waterfall")
+    chart = alt.Chart(frame).mark_bar().encode(
+        x=alt.X("start_ms:Q", title="ms since the trace started"),
+        x2="end_ms:Q",
+        y=alt.Y("span:N", sort=None, title=None),
+        color=alt.Color("kind:N", title="Kind"),
+        tooltip=["span", "duration_ms", "self_ms", "attributes", "error"],
+    ).properties(height=max(120, 22 * len(frame)))
+    st.altair_chart(chart)
+
+    st.subheader("Self time by span")
+    by_name = frame.assign(name=[row["name"] for row in rows]).groupby("name").agg(
+        calls=("span", "count"), self_ms=("self_ms", "sum"), total_ms=("duration_ms", "sum")
+    ).sort_values("self_ms", ascending=False)
+    st.dataframe(by_name)
+
+    with st.expander("Spans"):
+        st.dataframe(frame.drop(columns=["kind"]), hide_index=True)
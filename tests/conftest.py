@@ -0,0 +1,42 @@
+import functools
+import os
+import sys
+
+import mongomock
+import pytest
+from mongomock.collection import BulkOperationBuilder
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _ignore_sort(method):
+    # pymongo >= 4.11 passes a sort option to bulk update/replace ops that mongomock doesn't know
+    @functools.wraps(method)
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+BulkOperationBuilder.add_update = _ignore_sort(BulkOperationBuilder.add_update)
+BulkOperationBuilder.add_replace = _ignore_sort(BulkOperationBuilder.add_replace)
+
+
+@pytest.fixture(params=["mongodb", "sqlite"])
+def backend(request):
+    """An empty storage backend of each kind, none of which needs a database server"""
+    from utils.storage.mongo import MongoBackend, MongoDB
+    from utils.storage.sqlite import SQLiteBackend
+
+    if request.param == "mongodb":
+        return MongoBackend(MongoDB(client=mongomock.MongoClient()))
+    return SQLiteBackend(":memory:")
+
+
+@pytest.fixture
+def db(backend):
+    """A JobAgentDB on each storage backend, so tests using it double as a conformance suite"""
+    from utils.mongodb import JobAgentDB
+
+    db = JobAgentDB(backend)
+    yield db
+    db.close()
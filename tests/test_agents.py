@@ -0,0 +1,35 @@
+import pytest
+
+from agents import base_agent, registry
+from agents.base_agent import BaseAgent
+from agents.cover_letter_writer import CoverLetterWriterAgent
+from agents.suitability_reporter import SuitabilityReporterAgent
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(base_agent, "OPENAI_API_KEY", "test-key")
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def test_tools_are_discovered_once_per_class():
+    first = SuitabilityReporterAgent()
+    second = SuitabilityReporterAgent()
+
+    assert BaseAgent._tool_attr_names[SuitabilityReporterAgent] == ["generate_report"]
+    assert [tool.name for tool in second.tools] == ["generate_report"]
+    # Each instance still gets a Function bound to its own handler
+    assert first.tools[0] is first.generate_report
+    assert second.tools[0] is second.generate_report
+
+
+def test_registry_shares_one_agent_per_class():
+    agent = registry.get_agent(CoverLetterWriterAgent)
+
+    assert registry.get_agent(CoverLetterWriterAgent) is agent
+    assert registry.get_agent(SuitabilityReporterAgent) is not agent
+    assert set(registry.construction_times()) == {
+        "CoverLetterWriterAgent", "SuitabilityReporterAgent"
+    }
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+
+
+def report(company, score, missing=(), matched=()):
+    return {"cv_name": "Ada", "company": company, "overall_match_score": score,
+            "skill_matches": {"technical_skills": {"missing": list(missing),
+                                                   "matched": list(matched)}}}
+
+
+@pytest.fixture
+def reports(db):
+    db.save_suitability_reports([
+        report("Acme", 85, missing=["Kubernetes", "Go"], matched=["Python"]),
+        report("Acme", 40, missing=["kubernetes"], matched=["Python", "SQL"]),
+        report("Initech", 100, matched=["python"]),
+        report("Initech", "n/a", missing=["Go", 7]),
+        {"cv_name": "Grace", "overall_match_score": 9},
+    ])
+    return db
+
+
+def test_top_skills_are_counted_case_insensitively(reports):
+    missing = reports.get_top_report_skills("missing")
+    assert [(s["value"].lower(), s["count"]) for s in missing] == [("go", 2), ("kubernetes", 2)]
+    matched = reports.get_top_report_skills("matched", limit=1)
+    assert [(s["value"].lower(), s["count"]) for s in matched] == [("python", 3)]
+    assert reports.get_top_report_skills("missing", company="Initech") == [
+        {"value": "Go", "count": 1}
+    ]
+
+
+def test_score_histogram_includes_empty_and_perfect_buckets(reports):
+    histogram = reports.get_report_score_histogram(bucket_size=25)
+    assert [(b["min"], b["max"], b["count"]) for b in histogram] == [
+        (0, 25, 1), (25, 50, 1), (50, 75, 0), (75, 101, 2)
+    ]
+
+
+def test_scores_by_company_skip_non_numeric_scores(reports):
+    rows = {row["key"]: row for row in reports.get_report_scores_by_company()}
+    assert rows["Acme"] == {"key": "Acme", "count": 2, "avg": 62.5, "min": 40, "max": 85}
+    assert (rows["Initech"]["count"], rows["Initech"]["avg"]) == (2, 100)
+    assert rows[None]["count"] == 1
+
+
+def test_activity_by_period_and_time_window(db):
+    db.backend.bulk_save("job_searches", [
+        {"created_at": datetime(2024, 5, day, 12), "job_count": 1} for day in (12, 13, 19, 20)
+    ] + [{"created_at": datetime(2024, 6, 3, 9), "job_count": 1}])
+
+    weekly = db.get_activity_by_period("week")["job_searches"]
+    assert weekly == [{"period": "2024-05-06", "count": 1}, {"period": "2024-05-13", "count": 2},
+                      {"period": "2024-05-20", "count": 1}, {"period": "2024-06-03", "count": 1}]
+    monthly = db.get_activity_by_period("month", since=datetime(2024, 5, 19))["job_searches"]
+    assert monthly == [{"period": "2024-05", "count": 2}, {"period": "2024-06", "count": 1}]
+    assert db.get_activity_by_period("day")["cover_letters"] == []
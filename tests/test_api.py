@@ -0,0 +1,153 @@
+import os
+import tempfile
+import threading
+
+import pytest
+
+pytest.importorskip("starlette")
+from starlette.testclient import TestClient
+
+from api.server import create_app, validate_params
+from utils.tasks import TaskQueue, TaskType
+
+
+class FakeAnalysis:
+    """Saves a job analysis once released, recording the params it was given"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.params = []
+
+    def __call__(self, db, params, progress):
+        self.params.append(params)
+        self.release.wait(5)
+        doc_id = db.save_job_analysis({"job_title": "Engineer", "job_url": params["job_url"]})
+        return {"collection": "job_analyses", "id": doc_id}
+
+
+def read_cv(db, params, progress):
+    try:
+        with open(params["pdf_path"], "rb") as file:
+            return {"size": len(file.read())}
+    finally:
+        if params.get("delete_pdf"):
+            os.unlink(params["pdf_path"])
+
+
+@pytest.fixture
+def analysis():
+    return FakeAnalysis()
+
+
+@pytest.fixture
+def client(db, analysis):
+    queue = TaskQueue(db, pool_sizes={"analysis": 1}, max_pending=2, task_types={
+        "job_analysis": TaskType("analysis", analysis),
+        "cv_analysis": TaskType("analysis", read_cv),
+    })
+    with TestClient(create_app(queue)) as client:
+        yield client
+    analysis.release.set()
+    queue.shutdown()
+
+
+def submit_job(client, url="https://jobs/1"):
+    return client.post("/tasks", json={"task_type": "job_analysis", "params": {"job_url": url}})
+
+
+def test_validate_params():
+    assert validate_params("cover_letter", {"cv_id": "a", "job_id": "b"})
+    bad = [
+        ("cv_analysis", {"pdf_path": "/etc/passwd"}),
+        ("job_analysis", {}),
+        ("job_analysis", {"job_url": "https://jobs/1", "force_refresh": "yes"}),
+        ("job_search", {"filters": {"location": "Berlin"}}),
+        ("cover_letter", {"cv_id": "a", "job_id": "b", "tone": "rude"}),
+        ("suitability_report", {"cv_id": "a", "job_id": "b", "extra": 1}),
+    ]
+    bad += [(["job_analysis"], {"job_url": "https://jobs/1"}), ({}, {})]
+    for task_type, params in bad:
+        with pytest.raises(ValueError):
+            validate_params(task_type, params)
+
+
+def test_submit_long_poll_and_fetch_result(client, analysis):
+    response = submit_job(client)
+    assert response.status_code == 202
+    task_id = response.json()["task_id"]
+    assert client.get(f"/tasks/{task_id}/result").status_code == 409
+    # Times out while the task is still running
+    assert client.get(f"/tasks/{task_id}?wait=0.1").json()["status"] in ("queued", "running")
+
+    threading.Timer(0.1, analysis.release.set).start()
+    task = client.get(f"/tasks/{task_id}?wait=5").json()
+    assert task["status"] == "done" and task["finished_at"]
+
+    result = client.get(f"/tasks/{task_id}/result").json()
+    assert result["job_title"] == "Engineer" and result["id"] == task["result"]["id"]
+    assert "content_hash" not in result
+
+
+def test_full_queue_answers_429(client):
+    assert submit_job(client, "https://jobs/1").status_code == 202
+    # A duplicate shares the unfinished task instead of taking a slot
+    assert submit_job(client, "https://jobs/1").status_code == 202
+    assert submit_job(client, "https://jobs/2").status_code == 202
+    response = submit_job(client, "https://jobs/3")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+    assert client.get("/health").json()["pools"] == {"analysis": {"workers": 1, "pending": 2}}
+
+
+def test_bad_requests(client):
+    assert client.post("/tasks", content=b"not json").status_code == 400
+    assert client.post("/tasks", json={"task_type": "job_analysis"}).status_code == 400
+    assert client.post("/cv-analyses", content=b"").status_code == 400
+    assert client.get("/tasks/0123456789abcdef01234567").status_code == 404
+    assert client.get("/tasks/not-an-id").status_code == 404
+    unhashable = {"task_type": ["job_analysis"], "params": {"job_url": "https://jobs/1"}}
+    assert client.post("/tasks", json=unhashable).status_code == 400
+
+
+def test_database_errors_are_not_reported_as_missing_tasks(client, monkeypatch):
+    def fail(self, task_id):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(TaskQueue, "get", fail)
+
+    with pytest.raises(RuntimeError):
+        client.get("/tasks/0123456789abcdef01234567")
+
+
+def test_cv_upload_is_analyzed_and_deleted(client):
+    response = client.post("/cv-analyses", content=b"%PDF-1.4 fake")
+    assert response.status_code == 202
+    task = client.get(f"/tasks/{response.json()['task_id']}?wait=5").json()
+    assert task["status"] == "done" and task["result"] == {"size": 13}
+
+
+def uploads():
+    return {name for name in os.listdir(tempfile.gettempdir()) if name.startswith("job_agent_cv_")}
+
+
+def test_identical_uploads_never_share_a_file(db, analysis):
+    queue = TaskQueue(db, pool_sizes={"analysis": 1}, max_pending=5, task_types={
+        "job_analysis": TaskType("analysis", analysis),
+        "cv_analysis": TaskType("analysis", read_cv),
+    })
+    with TestClient(create_app(queue)) as client:
+        # Held behind a job analysis, so every upload's task is unfinished at once
+        assert submit_job(client).status_code == 202
+        normal = client.post("/cv-analyses", content=b"%PDF-1.4 same").json()["task_id"]
+        forced = client.post("/cv-analyses?force_refresh=true", content=b"%PDF-1.4 same")
+        forced = forced.json()["task_id"]
+        saved = uploads()
+        assert client.post("/cv-analyses", content=b"%PDF-1.4 same").json()["task_id"] == normal
+        assert uploads() == saved
+        analysis.release.set()
+
+        # Two tasks, as the dedup key includes force_refresh, each deleting only its own file
+        assert forced != normal
+        for task_id in (normal, forced):
+            task = client.get(f"/tasks/{task_id}?wait=5").json()
+            assert task["status"] == "done" and task["result"] == {"size": 13}
+    queue.shutdown()
@@ -0,0 +1,104 @@
+import threading
+
+from utils.cache import DocumentCache, TTLCache
+
+
+def test_hits_until_invalidated():
+    cache = TTLCache(ttl_seconds=60)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {"items": [len(loads)]}
+
+    first = cache.get_or_load("cv_analyses", "page", load)
+    first["items"].append("mutated by caller")
+    assert cache.get_or_load("cv_analyses", "page", load) == {"items": [1]}
+
+    cache.invalidate("job_analyses")
+    assert cache.get_or_load("cv_analyses", "page", load) == {"items": [1]}
+
+    cache.invalidate("cv_analyses")
+    assert cache.get_or_load("cv_analyses", "page", load) == {"items": [2]}
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_expired_and_disabled_entries_reload():
+    cache = TTLCache(ttl_seconds=0)
+    values = iter(range(10))
+    assert cache.get_or_load("ns", "k", lambda: next(values)) == 0
+    assert cache.get_or_load("ns", "k", lambda: next(values)) == 1
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = TTLCache(ttl_seconds=60)
+    loading, invalidated = threading.Event(), threading.Event()
+
+    def slow_load():
+        loading.set()
+        invalidated.wait(5)
+        return "stale"
+
+    thread = threading.Thread(target=cache.get_or_load, args=("ns", "k", slow_load))
+    thread.start()
+    loading.wait(5)
+    cache.invalidate("ns")
+    invalidated.set()
+    thread.join()
+
+    assert cache.get_or_load("ns", "k", lambda: "fresh") == "fresh"
+
+
+def test_size_is_bounded():
+    cache = TTLCache(ttl_seconds=60, max_entries=3)
+    for i in range(10):
+        cache.get_or_load("ns", i, lambda: i)
+    assert cache.stats()["entries"] == 3
+
+
+def test_documents_are_evicted_least_recently_used_first():
+    cache = DocumentCache(max_bytes=3000)
+    doc = {"text": "x" * 900}
+    for key in ("a", "b", "c"):
+        cache.get_or_load("docs", key, lambda: dict(doc))
+    cache.get_or_load("docs", "a", lambda: "reloaded")
+    cache.get_or_load("docs", "d", lambda: dict(doc))
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= 3000
+    assert cache.get_or_load("docs", "a", lambda: "reloaded") == doc
+    assert cache.get_or_load("docs", "b", lambda: "reloaded") == "reloaded"
+
+
+def test_documents_are_discarded_and_oversized_ones_skipped():
+    cache = DocumentCache(max_bytes=1000)
+    cache.get_or_load("docs", "a", lambda: {"n": 1})
+    cache.get_or_load("docs", "b", lambda: {"n": 1})
+    cache.discard("docs", "a")
+    assert cache.get_or_load("docs", "a", lambda: {"n": 2}) == {"n": 2}
+    assert cache.get_or_load("docs", "b", lambda: {"n": 2}) == {"n": 1}
+
+    cache.get_or_load("docs", "big", lambda: "x" * 2000)
+    assert cache.get_or_load("docs", "big", lambda: "fresh") == "fresh"
+    assert cache.get_or_load("docs", "none", lambda: None) is None
+    assert cache.stats()["entries"] == 3
+
+    cache.invalidate("docs")
+    assert cache.stats()["entries"] == 0
+    assert DocumentCache(max_bytes=0).get_or_load("docs", "a", lambda: 1) == 1
+
+
+def test_document_cache_ttl_comes_from_config(backend, monkeypatch):
+    from utils import mongodb
+
+    monkeypatch.setattr(mongodb, "DOC_CACHE_TTL_SECONDS", 0)
+    db = mongodb.JobAgentDB(backend)
+    doc_id = db.save_job_analysis({"job_title": "Engineer"})
+    db.get_job_analysis_by_id(doc_id)
+    backend.update("job_analyses", doc_id, {"job_title": "Changed elsewhere"})
+
+    assert db.documents.ttl_seconds == 0
+    assert db.get_job_analysis_by_id(doc_id)["job_title"] == "Changed elsewhere"
+    assert db.documents.stats()["entries"] == 0
+    db.close()
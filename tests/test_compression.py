@@ -0,0 +1,59 @@
+import pytest
+
+from utils.compression import (
+    COMPRESSED_SUBTYPE, check_codec, compress_fields, decompress_fields, is_compressed
+)
+
+LETTER = "Dear hiring manager,\n" + "I would love to build reliable data pipelines at Acme. " * 60
+REPORT_GAPS = [{"requirement": f"Skill {i}", "current_level": "basic", "required_level": "expert",
+                "improvement_suggestion": "Build a side project using it. " * 3} for i in range(20)]
+
+
+def test_large_fields_are_stored_compressed_and_read_back_transparently(db):
+    letter_id = db.save_cover_letter({"cv_name": "Ada", "full_text": LETTER, "tone": "formal"})
+    report_id = db.save_suitability_report({"cv_name": "Ada", "overall_match_score": 70,
+                                            "gaps": REPORT_GAPS, "summary": "Short"})
+
+    stored = db.backend.find_by_id("cover_letters", letter_id)
+    assert stored["full_text"].subtype == COMPRESSED_SUBTYPE
+    assert len(stored["full_text"]) * 4 < len(LETTER)
+    assert db.get_cover_letter_by_id(letter_id)["full_text"] == LETTER
+    assert db.get_cover_letters()[0]["full_text"] == LETTER
+
+    stored = db.backend.find_by_id("suitability_reports", report_id)
+    assert is_compressed(stored["gaps"])
+    # Small values aren't worth compressing
+    assert stored["summary"] == "Short"
+    assert db.get_suitability_report_by_id(report_id)["gaps"] == REPORT_GAPS
+    [summary] = db.get_cover_letter_summaries()
+    assert "full_text" not in summary
+
+
+def test_upserts_and_bulk_saves_compress_too(db):
+    raw = "<html>" + "Senior Python engineer wanted. " * 100 + "</html>"
+    db.save_job_analyses([{"job_title": "Engineer", "raw_content": raw, "content_hash": "h"}])
+    db.save_job_analysis({"job_title": "Engineer II", "raw_content": raw, "content_hash": "h"})
+
+    stored = db.backend.find_one("job_analyses", {"content_hash": "h"})
+    assert is_compressed(stored["raw_content"])
+    loaded = db.get_job_analysis_by_hash("h")
+    assert (loaded["job_title"], loaded["raw_content"]) == ("Engineer II", raw)
+
+
+def test_compression_can_be_turned_off():
+    doc = {"full_text": LETTER}
+    assert compress_fields(doc, ["full_text"], "none") == doc
+    assert decompress_fields(compress_fields(doc, ["full_text"], "zlib")) == doc
+    with pytest.raises(ValueError):
+        check_codec("lz4")
+
+
+def test_zstd_needs_zstandard():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError):
+            check_codec("zstd")
+    else:
+        doc = {"full_text": LETTER}
+        assert decompress_fields(compress_fields(doc, ["full_text"], "zstd")) == doc
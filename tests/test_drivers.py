@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from agents.drivers import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_drivers_are_reused():
+    started = []
+    pool = DriverPool(size=2, factory=lambda: started.append(FakeDriver()) or started[-1])
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        assert second is first
+    assert len(started) == 1
+    pool.close()
+    assert first.quit_called
+
+
+def test_callers_wait_for_a_free_driver():
+    pool = DriverPool(size=1, factory=FakeDriver)
+    borrowed = []
+
+    def borrow():
+        with pool.driver() as driver:
+            borrowed.append(driver)
+
+    with pool.driver() as held:
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+    thread.join(5)
+    assert borrowed == [held]
+
+
+def test_driver_is_discarded_when_its_use_fails():
+    pool = DriverPool(size=1, factory=FakeDriver)
+    with pytest.raises(RuntimeError):
+        with pool.driver() as broken:
+            raise RuntimeError("tab crashed")
+    assert broken.quit_called
+    with pool.driver() as driver:
+        assert driver is not broken
+
+
+@pytest.mark.parametrize("error", [KeyboardInterrupt, SystemExit])
+def test_slot_is_returned_whatever_ends_the_use(error):
+    pool = DriverPool(size=1, factory=FakeDriver)
+    with pytest.raises(error):
+        with pool.driver() as broken:
+            raise error()
+    assert broken.quit_called
+    # Would wait forever if the slot had leaked
+    borrowed = []
+
+    def borrow():
+        with pool.driver() as driver:
+            borrowed.append(driver)
+
+    thread = threading.Thread(target=borrow, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert len(borrowed) == 1 and borrowed[0] is not broken
@@ -0,0 +1,105 @@
+import os
+
+import mongomock
+import pytest
+
+from utils.mongodb import JobAgentDB
+from utils.storage import INDEXES
+from utils.storage.mongo import MongoBackend, MongoDB
+from utils.storage.sqlite import SQLiteBackend
+
+
+def test_ensure_indexes_is_idempotent(db):
+    first = db.ensure_indexes()
+    second = db.ensure_indexes()
+
+    assert first == second
+    assert set(first) == set(INDEXES)
+    assert all(first.values())
+
+
+def test_mongodb_hash_index_is_partial_and_unique():
+    backend = MongoBackend(MongoDB(client=mongomock.MongoClient()))
+    JobAgentDB(backend)
+    index = backend.collection("cv_analyses").index_information()["content_hash_1"]
+    assert index["unique"]
+    assert "partialFilterExpression" in index
+
+
+def sqlite_plan(backend, sql, params=()):
+    return " ".join(row[-1] for row in backend._execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_sqlite_queries_use_indexes():
+    backend = SQLiteBackend()
+    JobAgentDB(backend)
+
+    listing = sqlite_plan(backend, "SELECT id FROM cover_letters ORDER BY created_at DESC, id DESC")
+    assert "cover_letters_created_at__id" in listing
+    assert "TEMP B-TREE" not in listing
+    lookup = sqlite_plan(backend, "SELECT id FROM suitability_reports "
+                                  "WHERE json_extract(doc, '$.job_id') = ?", ("7",))
+    assert "USING INDEX suitability_reports_job_id" in lookup
+    by_hash = sqlite_plan(backend, "SELECT id FROM cv_analyses WHERE content_hash = ?", ("h",))
+    assert "USING INDEX" in by_hash
+
+
+@pytest.fixture(scope="module")
+def live_db():
+    """A JobAgentDB on a real server, since explain() needs the query planner"""
+    uri = os.getenv("MONGODB_TEST_URI")
+    if not uri:
+        pytest.skip("set MONGODB_TEST_URI to run explain() checks against a local MongoDB")
+    from pymongo import MongoClient
+
+    client = MongoClient(uri, serverSelectionTimeoutMS=2000)
+    client.drop_database("job_agent_index_test")
+    mongo = MongoDB(client=client)
+    mongo.db = client["job_agent_index_test"]
+    db = JobAgentDB(MongoBackend(mongo))
+    for i in range(50):
+        db.save_cv_analysis({"personal_info": {"name": f"cv {i}"}, "content_hash": f"h{i}"})
+        db.save_job_analysis({"job_title": f"job {i}", "job_url": f"https://example.com/{i}"})
+        db.save_suitability_report({"cv_id": str(i % 5), "job_id": str(i)})
+        db.save_cover_letter({"cv_id": str(i % 5), "job_id": str(i)})
+    yield db
+    client.drop_database("job_agent_index_test")
+    client.close()
+
+
+def plan_stages(plan):
+    """Get every stage name in a winning plan tree"""
+    stages = [plan.get("stage")]
+    for child in plan.get("inputStages", []) + [plan.get("inputStage", {})]:
+        if child:
+            stages.extend(plan_stages(child))
+    return stages
+
+
+def winning_stages(cursor):
+    explanation = cursor.explain()["queryPlanner"]["winningPlan"]
+    # Newer servers wrap the classic plan when the slot-based engine is used
+    return plan_stages(explanation.get("queryPlan", explanation))
+
+
+@pytest.mark.parametrize("collection", list(INDEXES))
+def test_listings_use_index_without_in_memory_sort(live_db, collection):
+    cursor = live_db.backend.collection(collection).find({}).sort(
+        [("created_at", -1), ("_id", -1)]).limit(20)
+    stages = winning_stages(cursor)
+    assert "IXSCAN" in stages
+    assert "SORT" not in stages
+
+
+@pytest.mark.parametrize("collection, query", [
+    ("cv_analyses", {"content_hash": "h7"}),
+    ("job_analyses", {"job_url": "https://example.com/7"}),
+    ("suitability_reports", {"cv_id": "3"}),
+    ("suitability_reports", {"job_id": "7"}),
+    ("cover_letters", {"cv_id": "3", "job_id": "7"}),
+    ("cover_letters", {"job_id": "7"}),
+])
+def test_lookups_use_index(live_db, collection, query):
+    stages = winning_stages(live_db.backend.collection(collection).find(query))
+    assert "IXSCAN" in stages
+    assert "COLLSCAN" not in stages
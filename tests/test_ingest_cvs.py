@@ -0,0 +1,115 @@
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from cli import ingest_cvs
+from cli.ingest_cvs import ingest, list_pdfs, load_state
+
+
+def make_pdf(text):
+    """Build a minimal single-page PDF containing the given text"""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+class FakeCVAgent:
+    def __init__(self, fail_on=()):
+        self.seen = []
+        self.fail_on = fail_on
+
+    def analyze_cv_handler(self, cv_text):
+        if any(marker in cv_text for marker in self.fail_on):
+            raise RuntimeError("rate limited")
+        self.seen.append(cv_text)
+        return {"personal_info": {"name": cv_text.strip()}}
+
+
+def test_ingest_directory_and_resume(tmp_path, db):
+    cvs = tmp_path / "cvs"
+    cvs.mkdir()
+    for name in ("Ada", "Grace", "Alan"):
+        (cvs / f"{name}.pdf").write_bytes(make_pdf(name))
+    (cvs / "copy_of_ada.pdf").write_bytes(make_pdf("Ada"))
+    state = str(tmp_path / "state.ndjson")
+
+    agent = FakeCVAgent(fail_on=("Alan",))
+    counts = ingest(db, str(cvs), state, workers=2, concurrency=2, batch_size=2, agent=agent)
+    assert counts == {"analyzed": 2, "skipped": 1, "failed": 1}
+    assert db.backend.count("cv_analyses") == 2
+    assert len(load_state(state)) == 3
+
+    # The failed CV is retried on the next run, everything else is left alone
+    agent = FakeCVAgent()
+    counts = ingest(db, str(cvs), state, workers=2, concurrency=2, batch_size=2, agent=agent)
+    assert counts == {"analyzed": 1, "skipped": 0, "failed": 0}
+    assert [text.strip() for text in agent.seen] == ["Alan"]
+    assert db.backend.count("cv_analyses") == 3
+
+
+def test_list_pdfs_in_archive(tmp_path, db):
+    archive_path = tmp_path / "cvs.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("batch/Ada.pdf", make_pdf("Ada"))
+        archive.writestr("notes.txt", "not a cv")
+
+    sources = list_pdfs(str(archive_path))
+    assert sources == [f"{archive_path}::batch/Ada.pdf"]
+
+    counts = ingest(db, str(archive_path), str(tmp_path / "state.ndjson"), workers=1,
+                    agent=FakeCVAgent())
+    assert counts["analyzed"] == 1
+    assert db.backend.find_one("cv_analyses", {})["source_file"] == "Ada.pdf"
+
+
+def test_extraction_keeps_only_a_window_ahead_of_analysis(tmp_path, db, monkeypatch):
+    cvs = tmp_path / "cvs"
+    cvs.mkdir()
+    for n in range(40):
+        (cvs / f"cv{n:02d}.pdf").write_bytes(make_pdf(f"Candidate {n}"))
+    extracted = []
+    extract = ingest_cvs._extract
+
+    def counting_extract(source):
+        extracted.append(source)
+        return extract(source)
+
+    class SlowCVAgent(FakeCVAgent):
+        def __init__(self):
+            super().__init__()
+            self.ahead = []
+            self.lock = threading.Lock()
+
+        def analyze_cv_handler(self, cv_text):
+            time.sleep(0.005)
+            with self.lock:
+                self.ahead.append(len(extracted) - len(self.seen))
+                return super().analyze_cv_handler(cv_text)
+
+    # Threads share the counter, where worker processes wouldn't
+    monkeypatch.setattr(ingest_cvs, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(ingest_cvs, "_extract", counting_extract)
+    agent = SlowCVAgent()
+    counts = ingest(db, str(cvs), str(tmp_path / "state.ndjson"), workers=1, concurrency=1,
+                    batch_size=1, agent=agent)
+
+    assert counts["analyzed"] == 40
+    # The extraction window, the batch being submitted and the call being made
+    assert max(agent.ahead) <= 4
@@ -0,0 +1,75 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from agents import base_agent
+from agents.drivers import DriverPool
+from agents.job_searcher import JobSearchAgent
+from benchmarks.pipeline_stages import RecordedDriver
+from utils import pipeline
+from utils.pipeline import search_jobs
+
+
+def results_page(numbers):
+    cards = "".join(
+        f'<div class="base-card"><h3 class="base-search-card__title">Job {n}</h3>'
+        f'<a class="base-card__full-link" href="https://jobs/{n}"></a></div>'
+        for n in numbers
+    )
+    return f"<html><body>{cards}</body></html>"
+
+
+class PagedResults:
+    """Stands in for the driver pool, serving results pages of 3 jobs out of 7"""
+
+    def __init__(self):
+        self.starts = []
+
+    def page_source(self, url, ready_selector=None):
+        start = int(parse_qs(urlparse(url).query).get("start", ["0"])[0])
+        self.starts.append(start)
+        # Past the end, the last results are shown again
+        return results_page(range(min(start, 4), min(start + 3, 7)))
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(base_agent, "OPENAI_API_KEY", "test-key")
+    return JobSearchAgent(driver_pool=PagedResults())
+
+
+def test_jobs_are_yielded_before_the_next_page_loads(agent):
+    jobs = agent.iter_jobs({"job_title": "Engineer"}, max_results=50)
+    assert next(jobs)["url"] == "https://jobs/0"
+    assert agent.driver_pool.starts == [0]
+
+    rest = list(jobs)
+    assert [job["title"] for job in rest] == [f"Job {n}" for n in range(1, 7)]
+    # The page after the last one repeats it, which ends the search
+    assert agent.driver_pool.starts == [0, 3, 6, 9]
+
+
+def test_search_stops_at_max_results(agent):
+    assert len(list(agent.iter_jobs({"job_title": "Engineer"}, max_results=4))) == 4
+    assert agent.driver_pool.starts == [0, 3]
+
+
+def test_search_is_reported_as_it_goes_and_saved_once_complete(db, agent, monkeypatch):
+    monkeypatch.setattr(pipeline, "SEARCH_REPORT_EVERY", 4)
+    seen = []
+    doc_id, results = search_jobs(db, {"job_title": "Engineer"}, agent=agent,
+                                  on_results=lambda jobs: seen.append(len(jobs)))
+    # The first job, then every fourth, then the rest once the search ends
+    assert len(results) == 7 and seen == [1, 5, 7]
+    assert db.get_job_search_by_id(doc_id)["job_count"] == len(results)
+    assert db.backend.count("job_searches", {}) == 1
+
+
+def test_pages_are_read_once_the_results_appear():
+    pool = DriverPool(size=1, factory=lambda: RecordedDriver({"search": results_page([1])}),
+                      settle_seconds=60)
+    started = time.perf_counter()
+    html = pool.page_source("https://www.linkedin.com/jobs/search/?keywords=x",
+                            ready_selector="div.base-card")
+    assert "Job 1" in html and time.perf_counter() - started < 5
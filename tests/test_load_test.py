@@ -0,0 +1,21 @@
+import utils.mongodb
+from benchmarks.load_test import run_load_test
+from streamlit.runtime import Runtime
+
+
+def test_concurrent_sessions_render_pages_and_finish_tasks():
+    db_before = utils.mongodb._db_instance
+    run = run_load_test(sessions=[2], steps=["dashboard", "suitability_report"],
+                        llm_latency_ms=0, scrape_latency_ms=0, poll_seconds=0.05,
+                        task_timeout_seconds=30)
+
+    (level,) = run["levels"]
+    assert level["errors"] == 0, level["error_samples"]
+    assert level["sessions"] == 2 and level["tasks"] == 2
+    # The dashboard, then the report page before and after picking the session's CV
+    assert level["renders"] >= 6
+    assert level["render_p50_ms"] <= level["render_p95_ms"] <= level["render_p99_ms"]
+    assert level["cpu_percent"] > 0 and level["rss_peak_mb"] >= level["rss_mean_mb"] > 0
+    # The stand-ins are gone once the run is over
+    assert utils.mongodb._db_instance is db_before
+    assert Runtime._instance is None
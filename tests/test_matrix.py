@@ -0,0 +1,112 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from agents.suitability_reporter import SuitabilityReporterAgent
+from utils.matrix import Budget, cv_profile, job_profile, match_matrix, pre_score, run_matrix
+
+USAGE = {"prompt_tokens": 800, "completion_tokens": 200, "total_tokens": 1000}
+
+
+class MeteredLLM:
+    """Answers every report with one score, reporting fixed token usage"""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs) -> SimpleNamespace:
+        with self.lock:
+            self.calls += 1
+        message = SimpleNamespace(content=json.dumps({"overall_match_score": 70}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                               usage=SimpleNamespace(**USAGE))
+
+
+@pytest.fixture
+def reporter():
+    agent = SuitabilityReporterAgent()
+    agent.client = MeteredLLM()
+    return agent
+
+
+def seed(db):
+    cv = db.save_cv_analysis({"personal_info": {"name": "Ada"},
+                              "skills": {"technical": ["Python", "SQL"], "soft": ["Teamwork"]}})
+    jobs = [
+        db.save_job_analysis({"job_title": "Data Engineer", "requirements": ["Strong SQL"],
+                              "required_skills": {"technical": ["Python", "SQL"]}}),
+        db.save_job_analysis({"job_title": "Backend", "required_skills":
+                              {"technical": ["Python", "Go"], "soft": ["teamwork"]}}),
+        db.save_job_analysis({"job_title": "Designer", "required_skills":
+                              {"technical": ["Figma"]}}),
+    ]
+    return cv, jobs
+
+
+def test_pre_score_weights_covered_skills_and_requirements():
+    cv = cv_profile({"skills": {"technical": ["Python", "Machine Learning"]},
+                     "experience": [{"responsibilities": ["Built Kafka pipelines"]}]})
+
+    assert pre_score(cv, job_profile({"required_skills": {"technical": ["python 3.12"]}})) == 100
+    assert pre_score(cv, job_profile({"nice_to_have_skills": ["ML"]})) == 100
+    # Found in the CV's text rather than its skill list
+    assert pre_score(cv, job_profile({"required_skills": {"technical": ["Kafka"]}})) == 100
+    job = job_profile({"required_skills": {"technical": ["Python", "Rust"]},
+                       "requirements": ["Experience with machine learning in production"]})
+    assert pre_score(cv, job) == 62.5
+    assert pre_score(cv, job_profile({})) == 0
+
+
+def test_reports_best_pairs_first_and_resumes_within_budget(db, reporter):
+    cv, (data, backend, designer) = seed(db)
+    results = []
+
+    summary = run_matrix(db, budget=Budget(max_tokens=2500), concurrency=1, agent=reporter,
+                         on_result=results.append)
+
+    # Each report is estimated at about 2,000 tokens, so after the first one's 1,000 none fit
+    assert [r["job_id"] for r in results] == [data]
+    assert results[0]["tokens"] == USAGE and results[0]["spent"]["tokens"] == 1000
+    assert summary["reported"] == 1 and summary["over_budget"] == 2
+    assert db.get_suitability_report_for(cv, data)["pre_score"] == 100
+
+    summary = run_matrix(db, min_pre_score=10, agent=reporter, on_result=results.append)
+
+    assert summary["existing"] == 1 and summary["reported"] == 1 and summary["below_min"] == 1
+    assert [r["job_id"] for r in results] == [data, backend]
+    assert reporter.client.calls == 2
+
+    rows = match_matrix(db, [cv])
+    assert [(row["job_id"], row["score"]) for row in rows] == [
+        (data, 70), (backend, 70), (designer, None)
+    ]
+    assert [row["pre_score"] for row in rows] == [100, 57.1, 0]
+
+
+def test_cost_budget_and_dry_run(db, reporter):
+    seed(db)
+    budget = Budget(max_cost=0.5, prompt_price=0.01, completion_price=0.03)
+    planned = []
+
+    summary = run_matrix(db, budget=budget, agent=reporter, on_result=planned.append,
+                         dry_run=True)
+
+    assert reporter.client.calls == 0 and db.get_report_matrix() == []
+    assert summary["reported"] == len(planned) > 0
+    assert summary["spent"]["cost"] <= 0.5
+    assert summary["reported"] + summary["over_budget"] == 3
+
+
+def test_matrix_never_loads_scraped_postings(db, monkeypatch):
+    seed(db)
+    db.save_job_analysis({"job_title": "Scraped", "raw_content": "Posting " * 1000,
+                          "required_skills": {"technical": ["SQL"]}})
+    monkeypatch.setattr(db, "get_job_analyses", lambda: pytest.fail("loaded full job analyses"))
+    rows = match_matrix(db)
+    assert len(rows) == 4
+    # Left out of the report prompt, so it doesn't count towards the estimate either
+    assert max(row["estimate"]["prompt_tokens"] for row in rows) < 1000
@@ -0,0 +1,63 @@
+import tracemalloc
+
+import pytest
+
+from utils.memory import MemoryProfiler, deep_sizeof
+
+
+@pytest.fixture
+def profiler():
+    was_tracing = tracemalloc.is_tracing()
+    yield MemoryProfiler(enabled=True, max_sessions=2)
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+def test_renders_are_accounted_per_session(profiler):
+    kept = []
+    with profiler.render("s1", "Dashboard", {"rows": kept}):
+        kept.extend(bytearray(1024) for _ in range(100))
+    with profiler.render("s1", "Cover Letter", {}):
+        pass
+
+    report = profiler.session_report("s1")
+    assert report["renders"] == 2
+    assert report["retained_bytes"] >= 100 * 1024
+    assert report["peak_bytes"] >= 100 * 1024
+    assert report["session_state_bytes"] == deep_sizeof({})
+    assert report["pages"]["Dashboard"]["retained_bytes"] >= 100 * 1024
+    assert report["pages"]["Cover Letter"]["renders"] == 1
+
+    dashboard = report["pages"]["Dashboard"]
+    assert dashboard["renders"] == 1 and dashboard["peak_bytes"] >= 100 * 1024
+
+
+def test_top_sites_point_at_the_allocating_line(profiler):
+    kept = []
+    with profiler.render("s1", "Dashboard", {"rows": kept}):
+        kept.extend(bytearray(1024) for _ in range(100))
+    render = profiler.session_report("s1")["last_render"]
+    assert "test_memory.py" in render["top_sites"][0]["site"]
+    assert render["session_state_bytes"] >= 100 * 1024
+
+
+def test_least_recently_rendered_sessions_are_dropped(profiler):
+    for session_id in ("s1", "s2", "s1", "s3"):
+        with profiler.render(session_id, "Dashboard"):
+            pass
+    assert profiler.session_report("s2") is None
+    assert set(profiler.report()["sessions"]) == {"s1", "s3"}
+    assert profiler.report()["traced_bytes"] > 0
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = MemoryProfiler(enabled=False)
+    with profiler.render("s1", "Dashboard"):
+        pass
+    assert profiler.session_report("s1") is None
+    assert profiler.report()["sessions"] == {}
+
+
+def test_deep_sizeof_follows_containers_once():
+    shared = ["x" * 1000]
+    assert deep_sizeof({"a": shared, "b": shared}) < deep_sizeof({"a": shared, "b": ["x" * 1000]})
@@ -0,0 +1,132 @@
+import pytest
+
+from utils.hashing import content_hash
+from utils.pipeline import (
+    analyze_cv_pdf, analyze_job_url, generate_cover_letter, generate_suitability_report
+)
+
+
+class FakeCVAgent:
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def extract_text_from_pdf(self, pdf_path):
+        return self.text
+
+    def analyze_cv_handler(self, cv_text):
+        self.calls += 1
+        return {"personal_info": {"name": "Ada"}, "skills": {"technical": ["Python"]}}
+
+
+class FakeJobAgent:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def scrape_job_content(self, url):
+        return self.content
+
+    def analyze_job_handler(self, job_content):
+        self.calls += 1
+        return {"job_title": "Engineer", "company": "Acme"}
+
+
+class FakeWriterAgent:
+    def __init__(self):
+        self.calls = []
+
+    def run(self, cv_analysis, job_analysis, tone="professional"):
+        self.calls.append((cv_analysis, job_analysis, tone))
+        return {"full_text": f"Dear {job_analysis['company']}", "overall_match_score": 70}
+
+
+def test_content_hash_ignores_layout():
+    assert content_hash("Senior  Engineer\n\nPython ") == content_hash("Senior Engineer Python")
+    assert content_hash("Senior Engineer") != content_hash("Junior Engineer")
+
+
+def test_repeat_cv_is_served_from_database(db):
+    agent = FakeCVAgent("Ada Lovelace\nPython")
+    first_id, first, cached = analyze_cv_pdf(db, "a.pdf", agent=agent)
+    assert not cached
+
+    second_id, second, cached = analyze_cv_pdf(db, "b.pdf", agent=agent)
+    assert cached
+    assert second_id == first_id
+    assert second == first
+    assert agent.calls == 1
+    assert db.backend.count("cv_analyses") == 1
+
+
+def test_force_refresh_replaces_stored_cv(db):
+    agent = FakeCVAgent("Ada Lovelace\nPython")
+    first_id, _, _ = analyze_cv_pdf(db, "a.pdf", agent=agent)
+    second_id, _, cached = analyze_cv_pdf(db, "a.pdf", force_refresh=True, agent=agent)
+
+    assert not cached
+    assert second_id == first_id
+    assert agent.calls == 2
+    assert db.backend.count("cv_analyses") == 1
+
+
+def test_repeat_job_is_served_from_database(db):
+    agent = FakeJobAgent("We are hiring a Python engineer")
+    first_id, _, _ = analyze_job_url(db, "https://example.com/1", agent=agent)
+    second_id, result, cached = analyze_job_url(db, "https://example.com/1", agent=agent)
+
+    assert cached
+    assert second_id == first_id
+    assert result["job_url"] == "https://example.com/1"
+    assert "raw_content" not in result
+    assert db.get_job_analysis_by_id(first_id)["raw_content"] == "We are hiring a Python engineer"
+    assert agent.calls == 1
+
+
+def test_repost_of_a_known_description_is_saved_for_its_own_url(db):
+    agent = FakeJobAgent("We are hiring a Python engineer")
+    first_id, _, _ = analyze_job_url(db, "https://example.com/1", agent=agent)
+    repost_id, result, cached = analyze_job_url(db, "https://example.com/2", agent=agent)
+    again_id, _, _ = analyze_job_url(db, "https://example.com/2", agent=agent)
+
+    assert cached and agent.calls == 1
+    assert repost_id != first_id and again_id == repost_id
+    assert result["job_url"] == "https://example.com/2"
+    assert str(db.get_job_analysis_by_url("https://example.com/2")["_id"]) == repost_id
+    assert db.get_job_analysis_by_id(first_id)["job_url"] == "https://example.com/1"
+    assert {d["job_url"] for d in db.get_tracked_job_analyses()} == {
+        "https://example.com/1", "https://example.com/2"
+    }
+
+
+def test_cvs_without_text_are_rejected(db):
+    agent = FakeCVAgent(" \n ")
+    with pytest.raises(ValueError, match="No extractable text"):
+        analyze_cv_pdf(db, "scan.pdf", agent=agent)
+    assert agent.calls == 0 and db.backend.count("cv_analyses") == 0
+
+
+def test_failed_scrapes_are_not_deduplicated(db):
+    agent = FakeJobAgent("Could not extract job description")
+    analyze_job_url(db, "https://example.com/1", agent=agent)
+    analyze_job_url(db, "https://example.com/2", agent=agent)
+
+    assert agent.calls == 2
+    assert db.backend.count("job_analyses") == 2
+
+
+def test_generated_results_are_found_by_their_inputs(db):
+    cv_id = db.save_cv_analysis({"personal_info": {"name": "Ada"}, "content_hash": "cv"})
+    job_id = db.save_job_analysis({"job_title": "Engineer", "company": "Acme", "job_url": "u"})
+    agent = FakeWriterAgent()
+
+    report_id, report = generate_suitability_report(db, cv_id, job_id, agent=agent)
+    assert (report["cv_name"], report["company"]) == ("Ada", "Acme")
+    # The agents see the analyses without database bookkeeping
+    assert "_id" not in agent.calls[0][0] and "created_at" not in agent.calls[0][1]
+    assert str(db.get_suitability_report_for(cv_id, job_id)["_id"]) == report_id
+
+    letter_id, _ = generate_cover_letter(db, cv_id, job_id, "friendly", agent=agent)
+    assert str(db.get_cover_letter_for(cv_id, job_id, "friendly")["_id"]) == letter_id
+    assert db.get_cover_letter_for(cv_id, job_id, "professional") is None
+    assert str(db.get_job_analysis_by_url("u")["_id"]) == job_id
@@ -0,0 +1,40 @@
+import json
+
+from agents.cv_analyzer import extract_text_from_pdf
+from benchmarks.pipeline_stages import (
+    BASELINE_FILE, STAGES, compare_to_baseline, make_pdf, run_benchmark
+)
+
+
+def test_benchmark_measures_every_stage_offline():
+    run = run_benchmark(repeats=2, workers=2)
+    with open(BASELINE_FILE, encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    assert {stats["stage"] for stats in run["results"].values()} == set(STAGES)
+    for stats in run["results"].values():
+        assert 0 <= stats["p50_ms"] <= stats["p95_ms"] and stats["throughput_per_s"] > 0
+    assert run["meta"]["repeats"] == 2
+    # The committed reference covers every operation
+    assert set(baseline["results"]) == set(run["results"])
+
+
+def test_generated_pdf_is_readable(tmp_path):
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(make_pdf(["Ada Lovelace", "Senior (Data) Engineer"]))
+    text = extract_text_from_pdf(str(path))
+    assert "Ada Lovelace" in text and "Senior (Data) Engineer" in text
+
+
+def test_regressions_beyond_tolerance_are_flagged():
+    baseline = {"parse": {"p50_ms": 10.0, "throughput_per_s": 100.0},
+                "prompt": {"p50_ms": 0.01, "throughput_per_s": 100000.0}}
+    results = {"parse": {"p50_ms": 14.0, "throughput_per_s": 70.0},
+               # Three times slower, but by less than the noise floor
+               "prompt": {"p50_ms": 0.03, "throughput_per_s": 33000.0},
+               "new": {"p50_ms": 1.0, "throughput_per_s": 1.0}}
+    regressions = compare_to_baseline(results, baseline, tolerance=0.25)
+    assert [(r["operation"], r["metric"]) for r in regressions] == [
+        ("parse", "p50_ms"), ("parse", "throughput_per_s")
+    ]
+    assert compare_to_baseline(results, baseline, tolerance=0.5) == []
@@ -0,0 +1,143 @@
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cli import pipeline
+from cli.pipeline import InvalidInput, PipelineRunner, main, read_inputs
+
+
+class FakeSearchAgent:
+    def iter_jobs(self, filters):
+        for n in (1, 2):
+            yield {"title": filters["job_title"], "url": f"https://jobs/{n}"}
+
+
+class FakeCVAgent:
+    def extract_text_from_pdf(self, pdf_path):
+        if "missing" in pdf_path:
+            raise FileNotFoundError(pdf_path)
+        return pdf_path
+
+    def analyze_cv_handler(self, cv_text):
+        return {"personal_info": {"name": cv_text}}
+
+
+class FakeJobAgent:
+    def scrape_job_content(self, url):
+        return f"Posting at {url}"
+
+    def analyze_job_handler(self, job_content):
+        return {"job_title": "Engineer", "company": job_content[-1]}
+
+
+class FakeWriterAgent:
+    def run(self, cv_analysis, job_analysis, tone="professional"):
+        # Scores 90 for the first posting and 40 for the others
+        score = 90 if job_analysis["company"] == "1" else 40
+        return {"overall_match_score": score, "full_text": "Dear team"}
+
+
+AGENTS = {
+    "job_search": FakeSearchAgent(), "cv_analysis": FakeCVAgent(),
+    "job_analysis": FakeJobAgent(), "suitability_report": FakeWriterAgent(),
+    "cover_letter": FakeWriterAgent(),
+}
+
+
+def test_read_inputs_from_csv_and_ndjson(tmp_path):
+    csv_path = tmp_path / "in.csv"
+    csv_path.write_text("cv_path,job_url\nada.pdf,\n,https://jobs/1\n")
+    assert list(read_inputs(str(csv_path))) == [{"cv_path": "ada.pdf"},
+                                                {"job_url": "https://jobs/1"}]
+    ndjson_path = tmp_path / "in.ndjson"
+    ndjson_path.write_text('{"job_title": "Engineer"}\n\n{"cv_path": "a.pdf"}\n{"cv_path"\n')
+    records = list(read_inputs(str(ndjson_path)))
+    assert records[:2] == [{"job_title": "Engineer"}, {"cv_path": "a.pdf"}]
+    assert isinstance(records[2], InvalidInput) and records[2].line == 4
+
+
+def test_runs_every_stage_end_to_end(db):
+    records = [
+        {"cv_path": "ada.pdf"}, {"cv_path": "grace.pdf"}, {"cv_path": "missing.pdf"},
+        {"job_title": "Engineer"},
+        # Also found by the search, so analyzed once
+        {"job_url": "https://jobs/1"},
+        {"name": "no usable field"},
+        ["not", "an", "object"],
+        InvalidInput(9, "invalid JSON"),
+    ]
+    output = io.StringIO()
+    runner = PipelineRunner(db, pool_sizes={"analysis": 2, "search": 1, "report": 2, "letter": 1},
+                            letter_min_score=80, output=output, agents=AGENTS)
+    summary = runner.run(iter(records))
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    by_stage = {}
+    for line in lines:
+        by_stage.setdefault(line["stage"], []).append(line)
+    assert [line["error"] for line in by_stage["input"]] == [
+        "expected cv_path, job_url or job_title", "expected a JSON object", "invalid JSON"
+    ]
+    assert [line["error"] is None for line in by_stage["cv_analysis"]].count(True) == 2
+    assert len(by_stage["job_analysis"]) == 2
+    # Every analyzed CV against every analyzed job, and letters only for the good matches
+    assert len(by_stage["suitability_report"]) == 4
+    assert len(by_stage["cover_letter"]) == 2
+
+    assert db.backend.count("suitability_reports") == 4
+    assert db.backend.count("cover_letters") == 2
+    assert summary["cv_analysis"]["count"] == 3 and summary["cv_analysis"]["failed"] == 1
+    assert set(summary) == {"input", "job_search", "cv_analysis", "job_analysis",
+                            "suitability_report", "cover_letter"}
+    assert summary["input"]["failed"] == 3
+
+
+def test_stages_can_be_limited(db):
+    cv_id = db.save_cv_analysis({"personal_info": {"name": "Stored"}})
+    output = io.StringIO()
+    runner = PipelineRunner(db, stages=("analyze", "report"), output=output, agents=AGENTS)
+    summary = runner.run(iter([{"job_url": "https://jobs/1"}, {"job_title": "Engineer"}]),
+                         cv_ids=[cv_id])
+    assert set(summary) == {"job_analysis", "suitability_report"}
+    assert db.get_suitability_report_page()[0][0]["cv_name"] == "Stored"
+
+
+def test_report_fan_out_waits_for_room(db, monkeypatch):
+    outstanding = []
+    lock = threading.Lock()
+
+    class CountingExecutor(ThreadPoolExecutor):
+        """Tracks how many futures of every pool are unfinished"""
+
+        def submit(self, *args, **kwargs):
+            with lock:
+                outstanding.append(outstanding[-1] + 1 if outstanding else 1)
+            future = super().submit(*args, **kwargs)
+            future.add_done_callback(finished)
+            return future
+
+    def finished(_):
+        with lock:
+            outstanding.append(outstanding[-1] - 1)
+
+    monkeypatch.setattr(pipeline, "ThreadPoolExecutor", CountingExecutor)
+    cv_ids = [db.save_cv_analysis({"personal_info": {"name": f"CV {n}"}}) for n in range(6)]
+    runner = PipelineRunner(db, stages=("analyze", "report"), output=io.StringIO(),
+                            pool_sizes={"analysis": 1, "report": 1}, agents=AGENTS)
+    summary = runner.run(iter([{"job_url": "https://jobs/1"}, {"job_url": "https://jobs/2"}]),
+                         cv_ids=cv_ids)
+    assert summary["suitability_report"]["count"] == 12
+    assert db.backend.count("suitability_reports") == 12
+    assert max(outstanding) <= runner.max_pending == 8
+
+
+@pytest.mark.parametrize("argv", [
+    ["in.ndjson", "--stages", "analyze,letter"],
+    ["in.ndjson", "--tone", "rude"],
+])
+def test_invalid_options_are_rejected(argv):
+    with pytest.raises(SystemExit):
+        main(argv)
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from agents.job_analyzer import NO_DESCRIPTION, POSTING_REMOVED, parse_job_description
+from cli.refresh_jobs import refresh_postings
+from utils.hashing import content_hash
+from utils.pipeline import analyze_job_url
+
+
+class FakeJobAgent:
+    """Serves the current description of each posting, counting LLM analyses"""
+
+    def __init__(self, postings):
+        self.postings = postings
+        self.analyzed = []
+
+    def scrape_job_content(self, url):
+        return self.postings[url]
+
+    def analyze_job_handler(self, job_content):
+        self.analyzed.append(job_content)
+        return {"job_title": job_content.split(":")[0], "company": "Acme"}
+
+
+def track(db, url, text):
+    return db.save_job_analysis({"job_title": text.split(":")[0], "job_url": url,
+                                 "raw_content": text, "content_hash": content_hash(text)})
+
+
+def test_only_changed_postings_are_analyzed_again(db):
+    same = track(db, "https://jobs/1", "Engineer: Python")
+    edited = track(db, "https://jobs/2", "Analyst: SQL")
+    closed = track(db, "https://jobs/3", "Designer: Figma")
+    broken = track(db, "https://jobs/4", "Manager: Jira")
+    agent = FakeJobAgent({
+        # Whitespace differences are normalized away
+        "https://jobs/1": "Engineer:   Python\n",
+        "https://jobs/2": "Senior Analyst: SQL, dbt",
+        "https://jobs/3": POSTING_REMOVED,
+        "https://jobs/4": NO_DESCRIPTION,
+    })
+    results = []
+
+    counts = refresh_postings(db, agent=agent, on_result=results.append)
+
+    assert counts == {"unchanged": 1, "changed": 1, "removed": 1, "failed": 1}
+    assert agent.analyzed == ["Senior Analyst: SQL, dbt"]
+    assert db.get_job_analysis_by_id(same)["checked_at"] is not None
+
+    newest = db.get_job_analysis_by_url("https://jobs/2")
+    assert newest["job_title"] == "Senior Analyst" and str(newest["previous_id"]) == edited
+    old = db.get_job_analysis_by_id(edited)
+    assert (old["posting_status"], old["superseded_by"]) == ("changed", str(newest["_id"]))
+
+    assert db.get_job_analysis_by_id(closed)["posting_status"] == "removed"
+    assert db.get_job_analysis_by_id(broken)["check_error"] == NO_DESCRIPTION
+    assert {r["job_url"]: r["outcome"] for r in results}["https://jobs/4"] == "failed"
+
+    # Removed postings drop out, and failed checks don't count as checked
+    assert db.get_job_analysis_by_id(broken).get("checked_at") is None
+    tracked = {d["job_url"] for d in db.get_tracked_job_analyses()}
+    assert tracked == {"https://jobs/1", "https://jobs/2", "https://jobs/4"}
+    assert db.get_tracked_job_analyses(datetime.now() - timedelta(hours=1)) == []
+
+
+def test_closed_postings_are_recognized():
+    page = ('<figure class="closed-job"><figcaption>No longer accepting applications'
+            '</figcaption></figure><div class="description__text">Old text</div>')
+    assert parse_job_description(page) == POSTING_REMOVED
+    assert parse_job_description('<div class="description__text">Open</div>') == "Open"
+    # Only the banner counts, not a description mentioning the phrase
+    page = ('<div class="description__text">Applications received after Friday: '
+            'No longer accepting applications for the spring intake</div>')
+    assert parse_job_description(page).startswith("Applications received")
+
+
+def test_reverted_and_shared_descriptions_reuse_stored_analyses(db):
+    first = track(db, "https://jobs/1", "Engineer: Python")
+    other = track(db, "https://jobs/2", "Analyst: SQL")
+    agent = FakeJobAgent({"https://jobs/1": "Engineer: Python, Go",
+                          "https://jobs/2": "Analyst: SQL"})
+    refresh_postings(db, agent=agent)
+    edited = str(db.get_job_analysis_by_url("https://jobs/1")["_id"])
+
+    # Back to the first description, then onto the other posting's
+    agent.postings["https://jobs/1"] = "Engineer: Python"
+    assert refresh_postings(db, agent=agent)["changed"] == 1
+    current = db.get_job_analysis_by_url("https://jobs/1")
+    assert str(current["_id"]) == first and current.get("superseded_by") is None
+    assert str(current["previous_id"]) == edited
+    assert db.get_job_analysis_by_id(edited)["superseded_by"] == first
+
+    agent.postings["https://jobs/1"] = "Analyst: SQL"
+    assert refresh_postings(db, agent=agent)["changed"] == 1
+    current = db.get_job_analysis_by_url("https://jobs/1")
+    assert current["job_title"] == "Analyst" and str(current["_id"]) not in (first, other)
+    untouched = db.get_job_analysis_by_url("https://jobs/2")
+    assert str(untouched["_id"]) == other and untouched.get("previous_id") is None
+    assert agent.analyzed == ["Engineer: Python, Go"]
+
+    tracked = {d["job_url"]: str(d["_id"]) for d in db.get_tracked_job_analyses()}
+    assert tracked == {"https://jobs/1": str(current["_id"]), "https://jobs/2": other}
+
+
+def test_closed_postings_are_not_analyzed(db):
+    agent = FakeJobAgent({"https://jobs/1": POSTING_REMOVED})
+
+    with pytest.raises(ValueError, match=POSTING_REMOVED):
+        analyze_job_url(db, "https://jobs/1", agent=agent)
+    assert agent.analyzed == []
+    assert db.get_job_analysis_by_url("https://jobs/1") is None
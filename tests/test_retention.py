@@ -0,0 +1,110 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.retention import (
+    RetentionPolicy, apply_ttl, archive_collection, parse_retention, restore_archive, run_archival
+)
+from utils.storage.mongo import MongoBackend
+
+
+def save_aged(db, collection, ages_in_days, **fields):
+    now = datetime.now().replace(microsecond=0)
+    return db.backend.bulk_save(collection, [
+        {"created_at": now - timedelta(days=age), "age": age, **fields} for age in ages_in_days
+    ])
+
+
+def test_parse_retention():
+    assert parse_retention(" job_searches=ttl:30, job_analyses=ARCHIVE:180 ") == {
+        "job_searches": RetentionPolicy("ttl", 30.0),
+        "job_analyses": RetentionPolicy("archive", 180.0),
+    }
+    assert parse_retention("") == {}
+    for spec in ("job_searches=30", "job_searches=delete:30", "jobs=ttl:30"):
+        with pytest.raises(ValueError):
+            parse_retention(spec)
+
+
+def test_archive_and_restore_round_trip(db, tmp_path):
+    save_aged(db, "job_analyses", [400, 300, 200, 10], job_title="Engineer")
+    before = {str(doc["_id"]): doc for doc in db.get_job_analyses()}
+    assert len(db.get_job_analysis_page()[0]) == 4
+
+    result = archive_collection(db, "job_analyses", datetime.now() - timedelta(days=100),
+                                str(tmp_path), batch_size=2)
+    assert result["archived"] == 3
+    assert sorted(os.listdir(result["path"])) == ["part-00001.ndjson.gz", "part-00002.ndjson.gz"]
+    with gzip.open(os.path.join(result["path"], "part-00001.ndjson.gz"), "rt") as file:
+        assert '"$oid"' in file.readline()
+    # Listings are served fresh after the archive removed documents
+    assert [doc["age"] for doc in db.get_job_analyses()] == [10]
+    assert len(db.get_job_analysis_page()[0]) == 1
+
+    assert restore_archive(db, "job_analyses", result["path"]) == {"restored": 3, "skipped": 0}
+    assert restore_archive(db, "job_analyses", result["path"]) == {"restored": 0, "skipped": 3}
+    assert {str(doc["_id"]): doc for doc in db.get_job_analyses()} == before
+
+
+def test_run_archival_follows_archive_policies_only(db, tmp_path):
+    save_aged(db, "job_searches", [40, 5])
+    save_aged(db, "cover_letters", [40, 5])
+    policies = parse_retention("job_searches=archive:30,cover_letters=ttl:30")
+
+    results = run_archival(db, policies, str(tmp_path))
+    assert [(r["collection"], r["archived"]) for r in results] == [("job_searches", 1)]
+    assert db.backend.count("job_searches") == 1
+    assert db.backend.count("cover_letters") == 2
+
+
+def test_apply_ttl_expires_old_documents(db):
+    save_aged(db, "job_searches", [40, 5])
+    apply_ttl(db, parse_retention("job_searches=ttl:30"))
+
+    if isinstance(db.backend, MongoBackend):
+        # The server deletes expired documents in the background
+        index = db.backend.collection("job_searches").index_information()["created_at_1"]
+        assert index["expireAfterSeconds"] == 30 * 86400
+        apply_ttl(db, {})
+        assert index == db.backend.collection("job_searches").index_information()["created_at_1"]
+        apply_ttl(db, {}, clear_others=True)
+        assert "created_at_1" not in db.backend.collection("job_searches").index_information()
+    else:
+        assert [doc["age"] for doc in db.get_job_searches()] == [5]
+
+
+def test_tasks_expire_unless_retention_says_otherwise(backend):
+    from utils.mongodb import JobAgentDB
+
+    assert JobAgentDB(backend).retention == {"tasks": RetentionPolicy("ttl", 7.0)}
+    db = JobAgentDB(backend, retention="tasks=archive:30,job_searches=ttl:30")
+    assert db.retention["tasks"] == RetentionPolicy("archive", 30.0)
+    assert "tasks" not in JobAgentDB(backend, task_retention_days=0).retention
+
+    save_aged(db, "tasks", [10, 1], status="succeeded")
+    db = JobAgentDB(backend)
+    if isinstance(db.backend, MongoBackend):
+        index = db.backend.collection("tasks").index_information()["created_at_1"]
+        assert index["expireAfterSeconds"] == 7 * 86400
+    else:
+        assert [doc["age"] for doc in db.get_tasks()] == [1]
+
+
+def test_connecting_without_a_policy_keeps_existing_ttls(backend, monkeypatch):
+    from utils.mongodb import JobAgentDB
+    from utils.storage import sqlite
+
+    monkeypatch.setattr(sqlite, "TTL_PURGE_INTERVAL_SECONDS", 0)
+    JobAgentDB(backend, retention="job_searches=ttl:30")
+    # e.g. a CLI run whose environment lacks the app's RETENTION
+    db = JobAgentDB(backend, retention="")
+
+    if isinstance(db.backend, MongoBackend):
+        index = db.backend.collection("job_searches").index_information()["created_at_1"]
+        assert index["expireAfterSeconds"] == 30 * 86400
+    else:
+        save_aged(db, "job_searches", [40, 5])
+        db.save_job_search({"filters": {}, "results": []})
+        assert sorted(doc.get("age", 0) for doc in db.get_job_searches()) == [0, 5]
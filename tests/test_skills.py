@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from utils.skills import SkillTaxonomy, get_skill_taxonomy
+
+
+@pytest.mark.parametrize("names, skill_id", [
+    (["Postgres", "PostgreSQL", "postgresql 14", "Experience with PostgreSQL"], "postgresql"),
+    (["K8s", "Kubernetes (EKS)"], "kubernetes"),
+    (["GitHub Actions", "CI/CD"], "ci-cd"),
+    (["Node.js", "NodeJS"], "node.js"),
+    ([".NET Core", "ASP.NET"], ".net"),
+    (["C/C++", "C++17"], "c++"),
+    # Unknown skills still group, without their versions
+    (["Apache Beam 2", "apache beam"], "apache-beam"),
+    # Other words make a different skill, rather than the alias among them
+    (["React Native"], "react-native"),
+    (["Azure DevOps"], "azure-devops"),
+    (["Excel VBA", "excel vba 7"], "excel-vba"),
+    (["Strong Python skills", "Proficiency in Python 3"], "python"),
+])
+def test_aliases_canonicalize_to_one_id(names, skill_id):
+    taxonomy = get_skill_taxonomy()
+    assert {taxonomy.canonicalize(name) for name in names} == {skill_id}
+
+
+def test_short_aliases_only_match_whole_names():
+    taxonomy = SkillTaxonomy({"r": ["R"], "go": ["Go"]})
+
+    assert taxonomy.canonicalize("R") == "r"
+    assert taxonomy.canonicalize("R&D") == "r-d"
+    assert taxonomy.canonicalize("Go to market") == "go-to-market"
+    assert taxonomy.canonicalize_all(["Go", "golang", "14", None, "GO"]) == ["go", "golang"]
+
+
+def test_analyses_are_saved_with_skill_ids_and_found_by_any_alias(db):
+    data = db.save_job_analysis({"job_title": "Data Engineer", "required_skills": {
+        "technical": ["Postgres", "Python 3"]}, "nice_to_have_skills": ["k8s"]})
+    db.save_job_analysis({"job_title": "DBA", "required_skills": {"technical": ["PostgreSQL 15"]}})
+    db.save_job_analysis({"job_title": "Designer", "required_skills": {"technical": ["Figma"]}})
+    cv = db.save_cv_analysis({"skills": {"technical": ["postgresql", "Python"]}})
+
+    stored = db.get_job_analysis_by_id(data)
+    assert stored["required_skill_ids"] == ["postgresql", "python"]
+    assert stored["nice_to_have_skill_ids"] == ["kubernetes"]
+    assert db.get_cv_analysis_by_id(cv)["skill_ids"] == ["postgresql", "python"]
+
+    titles = [job["job_title"] for job in db.get_job_analyses_requiring(("psql",))]
+    assert titles == ["DBA", "Data Engineer"]
+    both = db.get_job_analyses_requiring(("Postgres", "python"))
+    assert [job["job_title"] for job in both] == ["Data Engineer"]
+    assert both[0]["required_skill_ids"] == ["postgresql", "python"]
+    assert db.get_job_analyses_requiring(("Kubernetes",)) == []
+
+
+def test_backfill_adds_skill_ids_to_older_analyses(db):
+    # Saved as an older version would have, straight through the backend
+    old_id = db.backend.insert("job_analyses", {
+        "created_at": datetime.now(),
+        "job_title": "Old", "required_skills": {"technical": ["Golang"]},
+    })
+    db.save_job_analysis({"job_title": "New", "required_skills": {"technical": ["Go"]}})
+
+    assert db.backfill_skill_ids() == {"cv_analyses": 0, "job_analyses": 1}
+    assert db.get_job_analysis_by_id(old_id)["required_skill_ids"] == ["go"]
+    assert len(db.get_job_analyses_requiring(("go",))) == 2
+    assert db.backfill_skill_ids() == {"cv_analyses": 0, "job_analyses": 0}
+
+
+def test_backfill_recompute_rewrites_outdated_skill_ids(db):
+    doc_id = db.save_job_analysis({"job_title": "Mobile", "required_skills": {
+        "technical": ["React Native", "TypeScript"]}})
+    other = db.save_job_analysis({"job_title": "Web", "required_skills": {
+        "technical": ["React"]}})
+    # As canonicalized before "React Native" was told apart from React
+    db.backend.update("job_analyses", doc_id, {"required_skill_ids": ["react", "typescript"]})
+
+    assert db.backfill_skill_ids() == {"cv_analyses": 0, "job_analyses": 0}
+    assert db.backfill_skill_ids(recompute=True) == {"cv_analyses": 0, "job_analyses": 1}
+    assert db.get_job_analysis_by_id(doc_id)["required_skill_ids"] == ["react-native",
+                                                                        "typescript"]
+    assert [str(job["_id"]) for job in db.get_job_analyses_requiring(("react",))] == [other]
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+from cli.profile_startup import PROJECT_ROOT, profile_import
+
+
+def imported_modules(statement):
+    result = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print('\\n'.join(sys.modules))"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        env={"PATH": "", "MONGODB_URI": ""}
+    )
+    return set(result.stdout.split())
+
+
+def test_pages_import_without_scraping_or_database_dependencies():
+    # With MONGODB_URI unset, connecting on import would raise
+    modules = imported_modules("import pages.job_search_page, pages.cover_letter_page")
+    for heavy in ("selenium", "webdriver_manager", "bs4", "PyPDF2", "openai", "agno", "pymongo"):
+        assert heavy not in modules
+
+
+def test_cache_stats_do_not_connect():
+    statement = ("from utils import mongodb; assert mongodb.cache_stats() is None; "
+                 "assert mongodb._db_instance is None")
+    assert "pymongo" not in imported_modules(statement)
+
+
+def test_profile_import_reports_cumulative_time():
+    total, timings = profile_import("utils.hashing")
+    assert total > 0
+    assert timings["utils.hashing"][1] == total
+    assert "hashlib" in timings
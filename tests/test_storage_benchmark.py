@@ -0,0 +1,9 @@
+from benchmarks.storage_latency import OPERATIONS, run_benchmark
+
+
+def test_benchmark_times_every_operation(backend):
+    results = run_benchmark(backend, documents=120, repeats=3)
+
+    assert set(results) == set(OPERATIONS)
+    for stats in results.values():
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"]
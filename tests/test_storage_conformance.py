@@ -0,0 +1,168 @@
+"""Behaviour every storage backend must share; the db fixture runs each test on all of them"""
+from datetime import datetime
+
+
+def test_summaries_only_carry_label_fields(db):
+    cv_id = db.save_cv_analysis({
+        "personal_info": {"name": "Ada", "email": "ada@example.com"},
+        "experience": [{"position": "Engineer"}],
+    })
+    db.save_cover_letter({"cv_name": "Ada", "job_title": "Engineer", "company": "Acme",
+                          "tone": "friendly", "full_text": "Dear hiring manager"})
+
+    [cv] = db.get_cv_analysis_summaries()
+    assert str(cv["_id"]) == cv_id
+    assert cv["personal_info"] == {"name": "Ada"}
+    assert set(cv) == {"_id", "created_at", "personal_info"}
+
+    [letter] = db.get_cover_letter_summaries()
+    assert "full_text" not in letter
+    assert letter["tone"] == "friendly"
+
+    assert db.get_cv_analysis_by_id(cv_id)["experience"] == [{"position": "Engineer"}]
+
+
+def test_summaries_are_newest_first(db):
+    for title in ("first", "second", "third"):
+        db.save_job_analysis({"job_title": title, "company": "Acme"})
+
+    titles = [doc["job_title"] for doc in db.get_job_analysis_summaries()]
+    assert titles == ["third", "second", "first"]
+
+
+def test_keyset_pages_cover_every_document_once(db):
+    for i in range(7):
+        db.save_suitability_report({"cv_name": f"cv {i}", "company": "Acme" if i % 2 else "Initech",
+                                    "overall_match_score": i * 10})
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = db.get_suitability_report_page(cursor, page_size=3)
+        seen.extend(doc["cv_name"] for doc in page)
+        if cursor is None:
+            break
+    assert seen == [f"cv {i}" for i in reversed(range(7))]
+
+
+def test_pages_filter_on_the_server(db):
+    for i in range(6):
+        db.save_suitability_report({"cv_name": f"cv {i}", "company": "Acme" if i % 2 else "Initech",
+                                    "overall_match_score": i * 10})
+
+    page, cursor = db.get_suitability_report_page(company="acme", min_score=20)
+    assert [doc["cv_name"] for doc in page] == ["cv 5", "cv 3"]
+    assert cursor is None
+
+    page, _ = db.get_suitability_report_page(name="CV 4", max_score=40)
+    assert [doc["cv_name"] for doc in page] == ["cv 4"]
+
+    # Regex metacharacters in a search are matched literally
+    assert db.get_suitability_report_page(name="cv.*")[0] == []
+
+
+def test_bulk_save_reports_ids_and_errors_per_item(db):
+    existing_id = db.save_cover_letter({"full_text": "first"})
+    stored_cv = db.save_cv_analysis({"personal_info": {"name": "Ada"}, "summary": "old",
+                                     "content_hash": "ada"})
+
+    results = db.save_cover_letters([
+        {"full_text": "second"},
+        {"_id": db.get_cover_letter_by_id(existing_id)["_id"], "full_text": "clash"},
+        {"full_text": "third"},
+    ], chunk_size=2)
+    assert [bool(r["id"]) for r in results] == [True, False, True]
+    assert [bool(r["error"]) for r in results] == [False, True, False]
+    assert db.backend.count("cover_letters") == 3
+
+    results = db.save_cv_analyses([
+        {"personal_info": {"name": "Ada L."}, "content_hash": "ada"},
+        {"personal_info": {"name": "Grace"}, "content_hash": "grace"},
+    ])
+    assert results[0] == {"id": stored_cv, "error": None}
+    assert results[1]["id"] and results[1]["error"] is None
+    assert db.get_cv_analysis_by_id(stored_cv)["personal_info"]["name"] == "Ada L."
+    assert "summary" not in db.get_cv_analysis_by_id(stored_cv)
+    assert db.backend.count("cv_analyses") == 2
+
+
+def test_listing_reads_are_cached_until_a_save(db):
+    db.save_job_analysis({"job_title": "first", "company": "Acme"})
+    assert len(db.get_job_analysis_page()[0]) == 1
+    assert len(db.get_job_analysis_page()[0]) == 1
+    hits = db.cache.stats()["hits"]
+    assert hits >= 1
+
+    db.save_job_analysis({"job_title": "second", "company": "Acme"})
+    assert len(db.get_job_analysis_page()[0]) == 2
+    assert db.cache.stats()["hits"] == hits
+
+
+def test_documents_round_trip_nested_values(db):
+    applied = datetime(2024, 5, 17, 9, 30)
+    doc_id = db.save_job_search({
+        "filters": {"job_title": "Engineer", "remote": True},
+        "jobs": [{"title": "Engineer", "applied_at": applied, "salary": 85000.5}],
+        "job_count": 1,
+    })
+
+    doc = db.get_job_search_by_id(doc_id)
+    assert str(doc["_id"]) == doc_id
+    assert doc["type"] == "job_search"
+    assert doc["jobs"] == [{"title": "Engineer", "applied_at": applied, "salary": 85000.5}]
+    assert doc["filters"]["remote"] is True
+    assert [str(d["_id"]) for d in db.get_job_searches()] == [doc_id]
+
+
+def test_listings_can_leave_fields_out(db):
+    doc_id = db.save_job_analysis({"job_title": "Engineer", "company": {"name": "Acme"},
+                                   "raw_content": "A long scraped posting"})
+
+    docs = db.get_job_analyses_without_content()
+    assert [str(doc["_id"]) for doc in docs] == [doc_id]
+    assert "raw_content" not in docs[0]
+    assert docs[0]["company"] == {"name": "Acme"} and docs[0]["type"] == "job_analysis"
+    assert db.get_job_analysis_by_id(doc_id)["raw_content"] == "A long scraped posting"
+
+
+def test_hash_lookups_and_upserts(db):
+    first = db.save_job_analysis({"job_title": "Engineer", "job_url": "u1", "content_hash": "h1",
+                                  "superseded_by": "x"})
+    second = db.save_job_analysis({"job_title": "Engineer II", "job_url": "u2",
+                                   "content_hash": "h1"})
+
+    assert first == second
+    stored = db.get_job_analysis_by_hash("h1")
+    # The stored document is replaced, so fields missing from the new save are gone
+    assert (stored["job_title"], stored["job_url"]) == ("Engineer II", "u2")
+    assert "superseded_by" not in stored
+    assert db.backend.find_one("job_analyses", {"job_url": "u2"})["_id"] == stored["_id"]
+    assert db.get_existing_cv_hashes(["h1"]) == set()
+    assert db.backend.count("job_analyses", {"job_title": "Engineer II"}) == 1
+
+
+def test_update_sets_top_level_fields(db):
+    task_id = db.save_task({"status": "queued", "params": {"n": 1}, "result": None})
+    assert db.update_task(task_id, {"status": "done", "result": {"id": "x"}})
+    task = db.get_task_by_id(task_id)
+    assert (task["status"], task["result"], task["params"]) == ("done", {"id": "x"}, {"n": 1})
+    assert task["updated_at"] >= task["created_at"]
+    assert [str(t["_id"]) for t in db.get_tasks("done")] == [task_id]
+    assert not db.update_task("0" * 24, {"status": "done"})
+
+
+def test_documents_are_cached_until_replaced(db):
+    first = db.save_suitability_report({"cv_id": "c", "job_id": "j", "overall_match": 60})
+    assert db.get_suitability_report_for("c", "j")["overall_match"] == 60
+    assert db.get_suitability_report_for("c", "j")["overall_match"] == 60
+    assert db.documents.stats()["hits"] >= 1
+
+    second = db.save_suitability_report({"cv_id": "c", "job_id": "j", "overall_match": 80})
+    newest = db.get_suitability_report_for("c", "j")
+    assert (str(newest["_id"]), newest["overall_match"]) == (second, 80)
+    assert db.get_suitability_report_by_id(first)["overall_match"] == 60
+
+    job_id = db.save_job_analysis({"job_title": "Engineer", "content_hash": "h1"})
+    assert db.get_job_analysis_by_id(job_id)["job_title"] == "Engineer"
+    db.save_job_analysis({"job_title": "Senior Engineer", "content_hash": "h1"})
+    assert db.get_job_analysis_by_id(job_id)["job_title"] == "Senior Engineer"
+    assert db.get_cover_letter_for("c", job_id, "formal") is None
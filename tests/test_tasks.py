@@ -0,0 +1,151 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from utils.tasks import QueueFull, TaskQueue, TaskType, parse_pool_sizes
+
+
+def wait_for(queue, task_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = queue.get(task_id)
+        if task["status"] in ("done", "failed"):
+            return task
+        time.sleep(0.01)
+    raise AssertionError(f"task {task_id} did not finish")
+
+
+class Gate:
+    """A task body that blocks until released, tracking how many run at once"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, db, params, progress):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        progress("Halfway", partial={"seen": params["n"]})
+        self.release.wait(5)
+        with self._lock:
+            self.running -= 1
+        return {"n": params["n"]}
+
+
+@pytest.fixture
+def gate():
+    return Gate()
+
+
+@pytest.fixture
+def queue(db, gate):
+    def fail(db, params, progress):
+        raise RuntimeError("scrape blocked")
+
+    queue = TaskQueue(db, pool_sizes={"slow": 1, "other": 2}, task_types={
+        "slow": TaskType("slow", gate), "fail": TaskType("other", fail),
+    })
+    yield queue
+    gate.release.set()
+    queue.shutdown()
+
+
+def test_parse_pool_sizes():
+    sizes = parse_pool_sizes("analysis=4, search=3")
+    assert sizes["analysis"] == 4 and sizes["search"] == 3 and sizes["report"] == 2
+    for spec in ("analysis", "analysis=0", "scraping=2"):
+        with pytest.raises(ValueError):
+            parse_pool_sizes(spec)
+
+
+def test_task_state_is_persisted(queue, gate, db):
+    task_id = queue.submit("slow", {"n": 1})
+    gate.release.set()
+    task = wait_for(queue, task_id)
+    assert task["status"] == "done"
+    assert task["result"] == {"n": 1}
+    assert task["progress"] == "Halfway" and task["partial"] == {"seen": 1}
+    assert task["started_at"] <= task["finished_at"]
+    assert db.get_tasks("done")[0]["_id"] == task["_id"]
+
+
+def test_identical_submissions_share_a_task(queue, gate):
+    first = queue.submit("slow", {"n": 1})
+    assert queue.submit("slow", {"n": 1}) == first
+    other = queue.submit("slow", {"n": 2})
+    assert other != first
+    gate.release.set()
+    wait_for(queue, first)
+    wait_for(queue, other)
+    # Once finished, the same submission runs again
+    assert queue.submit("slow", {"n": 1}) != first
+
+
+def test_pool_bounds_concurrency(queue, gate):
+    ids = [queue.submit("slow", {"n": n}) for n in range(3)]
+    time.sleep(0.1)
+    statuses = sorted(queue.get(task_id)["status"] for task_id in ids)
+    assert statuses == ["queued", "queued", "running"]
+    gate.release.set()
+    for task_id in ids:
+        wait_for(queue, task_id)
+    assert gate.peak == 1
+
+
+def test_failure_is_recorded(queue):
+    task = wait_for(queue, queue.submit("fail", {}))
+    assert task["status"] == "failed"
+    assert task["error"] == "scrape blocked"
+
+
+def test_tasks_of_exited_processes_are_failed(db, queue):
+    # Above the largest PID Linux hands out
+    owner = {"host": socket.gethostname(), "pid": 2 ** 22 + 1}
+    task_id = db.save_task({"task_type": "slow", "task_key": "k", "status": "running",
+                            "owner": owner})
+    assert queue.fail_interrupted() == 1
+    assert queue.get(task_id)["status"] == "failed"
+
+
+def test_full_pool_rejects_new_tasks(db, gate):
+    queue = TaskQueue(db, pool_sizes={"slow": 1}, task_types={"slow": TaskType("slow", gate)},
+                      max_pending=2)
+    try:
+        first = queue.submit("slow", {"n": 1})
+        queue.submit("slow", {"n": 2})
+        with pytest.raises(QueueFull):
+            queue.submit("slow", {"n": 3})
+        # A duplicate of an unfinished task still gets its ID
+        assert queue.submit("slow", {"n": 1}) == first
+        assert queue.stats() == {"slow": {"workers": 1, "pending": 2}}
+    finally:
+        gate.release.set()
+        queue.shutdown()
+    assert queue.stats()["slow"]["pending"] == 0
+
+
+def test_tasks_the_executor_refuses_are_failed_and_released(db, gate):
+    queue = TaskQueue(db, pool_sizes={"slow": 1}, task_types={"slow": TaskType("slow", gate)},
+                      max_pending=1)
+    queue.shutdown()
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            queue.submit("slow", {"n": 1})
+    assert queue.stats() == {"slow": {"workers": 1, "pending": 0}}
+    tasks = db.get_tasks()
+    assert len(tasks) == 2 and {task["status"] for task in tasks} == {"failed"}
+
+
+def test_watchers_are_called_when_a_task_finishes(queue, gate):
+    task_id = queue.submit("slow", {"n": 1})
+    finished = threading.Event()
+    assert queue.on_finished(task_id, finished.set)
+    gate.release.set()
+    assert finished.wait(5)
+    assert queue.get(task_id)["status"] == "done"
+    assert not queue.on_finished(task_id, finished.set)
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agents import base_agent
+from agents.suitability_reporter import SuitabilityReporterAgent
+from utils import tracing
+from utils.tracing import JsonlExporter, MemoryExporter, Tracer, read_traces, waterfall_rows
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = MemoryExporter()
+    monkeypatch.setattr(tracing, "_tracer", Tracer(exporter))
+    return exporter
+
+
+def by_name(exporter):
+    return {s["name"]: s for s in exporter.spans}
+
+
+def test_nested_spans_form_one_trace(exporter):
+    with tracing.span("task", task_id="t1"):
+        with tracing.span("step") as step:
+            step.set(size=3)
+        with pytest.raises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("bad page")
+    spans = by_name(exporter)
+
+    assert [s["name"] for s in exporter.spans] == ["step", "failing", "task"]
+    assert {s["trace_id"] for s in exporter.spans} == {spans["task"]["trace_id"]}
+    assert spans["step"]["parent_id"] == spans["task"]["span_id"]
+    assert spans["task"]["parent_id"] is None
+    assert spans["step"]["attributes"] == {"size": 3}
+    assert spans["failing"]["error"] == "ValueError: bad page"
+    assert spans["task"]["duration_ms"] >= spans["step"]["duration_ms"]
+
+
+def test_disabled_tracer_records_nothing(monkeypatch):
+    monkeypatch.setattr(tracing, "_tracer", Tracer())
+    with tracing.span("task") as current:
+        tracing.annotate(ignored=True)
+    assert current is None
+
+
+def test_database_calls_record_results_and_cache_hits(exporter, db):
+    db.save_cv_analysis({"personal_info": {"name": "Ada"}})
+    with tracing.span("request"):
+        db.get_cv_analysis_page(page_size=5)
+        db.get_cv_analysis_page(page_size=5)
+    spans = [s for s in exporter.spans if s["name"] == "db.get_cv_analysis_page"]
+
+    assert [s["attributes"] for s in spans] == [{"cache_hit": False, "results": 1},
+                                                {"cache_hit": True, "results": 1}]
+    # Calls outside any trace, like a page polling a task, don't start one
+    assert "db.save_cv_analysis" not in by_name(exporter)
+    db.get_task_by_id("0" * 24)
+    assert len(exporter.spans) == 3
+
+
+def test_llm_calls_record_token_usage(exporter, monkeypatch):
+    monkeypatch.setattr(base_agent, "OPENAI_API_KEY", "test-key")
+    response = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content='{"overall_match_score": 70}'))],
+        usage=SimpleNamespace(prompt_tokens=900, completion_tokens=100, total_tokens=1000),
+    )
+    agent = SuitabilityReporterAgent()
+    agent.client = SimpleNamespace(chat=SimpleNamespace(
+        completions=SimpleNamespace(create=lambda **kwargs: response)))
+
+    assert agent.run({"skills": []}, {"job_title": "Engineer"}) == {"overall_match_score": 70}
+    spans = by_name(exporter)
+    assert spans["prompt.build"]["attributes"]["chars"] > 0
+    llm = spans["llm.chat_completion"]["attributes"]
+    assert llm["total_tokens"] == 1000 and llm["agent"] == "Suitability Reporter"
+
+
+def test_trace_file_round_trip(tmp_path, monkeypatch):
+    path = str(tmp_path / "traces.jsonl")
+    monkeypatch.setattr(tracing, "_tracer", Tracer(JsonlExporter(path)))
+    for task in ("first", "second"):
+        with tracing.span(task):
+            with tracing.span("child"):
+                pass
+    with open(path, "a") as file:
+        file.write('{"trace_id": "cut short')
+
+    traces = read_traces(path)
+    assert [spans[0]["name"] for spans in traces] == ["second", "first"]
+    rows = waterfall_rows(traces[0])
+    assert [(row["name"], row["depth"]) for row in rows] == [("second", 0), ("child", 1)]
+    assert rows[0]["self_ms"] <= rows[0]["duration_ms"]
+    # The cut-short line is one of the last three
+    assert read_traces(path, max_spans=3) == traces[:1]
@@ -0,0 +1,173 @@
+import copy
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """Thread-safe read-through cache with short-lived entries grouped by namespace
+
+    Invalidating a namespace drops its entries and bumps its generation, so a
+    load that started before the invalidation can't store a stale result.
+    Values are deep-copied in and out so callers may mutate what they get.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._generations: Dict[str, int] = {}
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, namespace: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Get a cached value, calling loader and caching its result on a miss"""
+        if self.ttl_seconds <= 0:
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None and entry[0] > now:
+                self._counters["hits"] += 1
+                return copy.deepcopy(entry[1])
+            self._counters["misses"] += 1
+            generation = self._generations.get(namespace, 0)
+
+        value = loader()
+
+        with self._lock:
+            if self._generations.get(namespace, 0) == generation:
+                if len(self._entries) >= self.max_entries:
+                    self._evict(now)
+                self._entries[(namespace, key)] = (now + self.ttl_seconds, copy.deepcopy(value))
+        return value
+
+    def invalidate(self, namespace: str):
+        """Drop every entry in a namespace, e.g. after a write to its collection"""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._counters["invalidations"] += 1
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        with self._lock:
+            for namespace in {k[0] for k in self._entries}:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss/invalidation counters, the entry count and the hit rate"""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+            }
+
+    def _evict(self, now: float):
+        # Drop expired entries first, then the ones closest to expiring
+        expired = [k for k, (expires, _) in self._entries.items() if expires <= now]
+        for cache_key in expired:
+            del self._entries[cache_key]
+        if len(self._entries) >= self.max_entries:
+            by_expiry = sorted(self._entries, key=lambda k: self._entries[k][0])
+            for cache_key in by_expiry[:len(self._entries) - self.max_entries + 1]:
+                del self._entries[cache_key]
+
+
+class DocumentCache:
+    """Thread-safe LRU cache of full documents, bounded by their approximate size in bytes
+
+    Shared by every session, so pages can keep only document IDs and resolve
+    them here on demand. Entries also expire after ttl_seconds, which covers
+    documents that expire in the database without a write through this
+    process. Like TTLCache, invalidation bumps a generation so that a racing
+    load isn't stored, and values are deep-copied in and out.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float = 300):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # (namespace, key) -> (expires, size, value), least recently used first
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._generations: Dict[str, int] = {}
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, namespace: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Get a cached document, calling loader and caching its result on a miss"""
+        if self.max_bytes <= 0 or self.ttl_seconds <= 0:
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end((namespace, key))
+                self._counters["hits"] += 1
+                return copy.deepcopy(entry[2])
+            self._counters["misses"] += 1
+            generation = self._generations.get(namespace, 0)
+
+        value = loader()
+        if value is None:
+            return None
+        # The pickled size tracks the in-memory size closely enough to budget by
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if self._generations.get(namespace, 0) == generation:
+                self._remove((namespace, key))
+                self._entries[(namespace, key)] = (now + self.ttl_seconds, size,
+                                                   copy.deepcopy(value))
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self._counters["evictions"] += 1
+        return value
+
+    def discard(self, namespace: str, key: Hashable):
+        """Drop one document, e.g. after it was replaced"""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._remove((namespace, key))
+
+    def invalidate(self, namespace: str):
+        """Drop every document in a namespace, e.g. after documents were deleted"""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._counters["invalidations"] += 1
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                self._remove(cache_key)
+
+    def clear(self):
+        with self._lock:
+            for namespace in {k[0] for k in self._entries}:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Get the counters, the entry count, the bytes held and the hit rate"""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, cache_key: Tuple[str, Hashable]):
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
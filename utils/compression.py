@@ -0,0 +1,93 @@
+"""Transparent compression of large document fields
+
+A compressed field keeps its name and holds a binary value of BSON subtype
+COMPRESSED_SUBTYPE: a one-byte codec ID followed by the compressed JSON
+encoding of the original value. Only values of at least MIN_COMPRESS_BYTES
+are compressed, and reading handles compressed and plain values alike.
+"""
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+# Large bodies per collection; the fields used by listings and analytics stay plain
+COMPRESSED_FIELDS = {
+    "job_analyses": ["raw_content"],
+    "suitability_reports": [
+        "summary", "strengths", "gaps", "experience_analysis", "education_match",
+        "recommendations", "interview_preparation",
+    ],
+    "cover_letters": ["full_text"],
+}
+
+CODECS = ("none", "zlib", "zstd")
+# User-defined BSON binary subtype marking a compressed value
+COMPRESSED_SUBTYPE = 0x80
+# Below this a compressed value plus its header is rarely smaller than the original
+MIN_COMPRESS_BYTES = 256
+
+_CODEC_IDS = {"zlib": 1, "zstd": 2}
+_CODEC_NAMES = {codec_id: name for name, codec_id in _CODEC_IDS.items()}
+
+
+def check_codec(codec: str):
+    """Raise if a codec is unknown, or needs a package that isn't installed"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec {codec!r} (expected one of {CODECS})")
+    if codec == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ImportError("zstd compression needs the zstandard package: "
+                              "pip install zstandard, or set COMPRESSION=zlib")
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def compress_fields(doc: Dict[str, Any], fields: List[str], codec: str) -> Dict[str, Any]:
+    """Return a copy of a document with its large fields compressed"""
+    if codec == "none" or not fields:
+        return doc
+    from bson import Binary
+
+    packed = dict(doc)
+    for field in fields:
+        value = packed.get(field)
+        if value is None or is_compressed(value):
+            continue
+        data = json.dumps(value, ensure_ascii=False).encode()
+        if len(data) < MIN_COMPRESS_BYTES:
+            continue
+        compressed = bytes([_CODEC_IDS[codec]]) + _compress(data, codec)
+        if len(compressed) < len(data):
+            packed[field] = Binary(compressed, COMPRESSED_SUBTYPE)
+    return packed
+
+
+def decompress_fields(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Return a copy of a document with every compressed field restored"""
+    if doc is None:
+        return None
+    compressed = [field for field, value in doc.items() if is_compressed(value)]
+    if not compressed:
+        return doc
+    unpacked = dict(doc)
+    for field in compressed:
+        value = bytes(unpacked[field])
+        unpacked[field] = json.loads(_decompress(value[1:], _CODEC_NAMES[value[0]]))
+    return unpacked
+
+
+def is_compressed(value: Any) -> bool:
+    return getattr(value, "subtype", None) == COMPRESSED_SUBTYPE
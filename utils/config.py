@@ -5,4 +5,48 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MONGODB_URI = os.getenv("MONGODB_URI")
-MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "job_agent")
\ No newline at end of file
+MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "job_agent")
+
+# How long listing and lookup results are reused before MongoDB is queried again (0 disables)
+DB_CACHE_TTL_SECONDS = float(os.getenv("DB_CACHE_TTL_SECONDS", "10"))
+# Megabytes of full documents kept in memory, shared by every session, least recently used
+# dropped first (0 disables)
+DOC_CACHE_MB = float(os.getenv("DOC_CACHE_MB", "64"))
+# Seconds a cached document is kept, which bounds how stale a document changed or expired in
+# the database by another process can be (0 disables)
+DOC_CACHE_TTL_SECONDS = float(os.getenv("DOC_CACHE_TTL_SECONDS", "300"))
+
+# Where documents are stored: "mongodb" (MONGODB_URI) or "sqlite" (a local file at SQLITE_PATH)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongodb").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "job_agent.db")
+
+# Per-collection retention, e.g. "job_searches=ttl:30,job_analyses=archive:180" (see utils.retention)
+RETENTION = os.getenv("RETENTION", "")
+# Where the archive policies write compressed NDJSON files
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+# Codec for large stored fields such as cover letter texts: "zlib", "zstd" (needs zstandard) or "none"
+COMPRESSION = os.getenv("COMPRESSION", "zlib").lower()
+
+# Worker threads per background task pool, e.g. "analysis=2,search=1,report=2,letter=2" (see utils.tasks)
+TASK_WORKERS = os.getenv("TASK_WORKERS", "")
+# Unfinished tasks each pool accepts before new submissions are turned away (0 for no limit)
+TASK_QUEUE_LIMIT = int(os.getenv("TASK_QUEUE_LIMIT", "50"))
+# Days tasks are kept before they expire, unless RETENTION gives "tasks" a policy (0 keeps them)
+TASK_RETENTION_DAYS = float(os.getenv("TASK_RETENTION_DAYS", "7"))
+# Headless Chrome instances kept running for scraping, shared by every search and job analysis
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+# Jobs a search collects, reading further results pages until it has as many
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "10"))
+
+# Dollars per 1,000 prompt and completion tokens, for report matrix cost budgets (see utils.matrix)
+LLM_PROMPT_PRICE_PER_1K = float(os.getenv("LLM_PROMPT_PRICE_PER_1K", "0.01"))
+LLM_COMPLETION_PRICE_PER_1K = float(os.getenv("LLM_COMPLETION_PRICE_PER_1K", "0.03"))
+
+# JSON file of {"skill ID": ["alias", ...]} adding to the built-in skill taxonomy (see utils.skills)
+SKILL_ALIASES_FILE = os.getenv("SKILL_ALIASES_FILE", "")
+
+# JSON lines file that tracing spans are appended to (empty disables tracing, see utils.tracing)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Measure the memory each page render allocates, per session (slow, see utils.memory)
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "").lower() in ("1", "true", "yes")
@@ -0,0 +1,283 @@
+"""Suitability reports for a whole CV x job matrix, under a token and cost budget
+
+Every pair gets a cheap local pre-score from how much of the job's skills
+and requirements the CV covers. Full LLM reports are then generated in
+descending pre-score order, a few at a time, for as long as the budget lasts:
+each report's tokens are estimated from its prompt before it's started and
+replaced by the usage the API reports once it's done. Reports are saved as
+they finish and pairs that already have one are skipped, so a run that was
+interrupted or ran out of budget is resumed by running it again.
+"""
+import json
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from agents.base_agent import count_tokens
+from agents.suitability_reporter import SYSTEM_PROMPT, build_report_prompt
+from utils.config import LLM_COMPLETION_PRICE_PER_1K, LLM_PROMPT_PRICE_PER_1K
+from utils.mongodb import JobAgentDB
+from utils.pipeline import generate_suitability_report, strip_internal_fields
+from utils.skills import get_skill_taxonomy
+
+# Weight of each kind of job requirement in the pre-score
+REQUIRED_TECHNICAL_WEIGHT = 3
+REQUIREMENT_WEIGHT = 2
+REQUIRED_SOFT_WEIGHT = 1
+NICE_TO_HAVE_WEIGHT = 1
+
+# Rough characters per token of English and JSON prompts
+CHARS_PER_TOKEN = 4
+# Completion tokens assumed for a report until the API reports the real count
+REPORT_COMPLETION_TOKENS = 1500
+
+# What became of each pair in a run
+MATRIX_OUTCOMES = ("reported", "failed", "existing", "below_min", "over_budget")
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+Words = Tuple[str, ...]
+# A CV's skill terms, every word it contains and the canonical IDs of its skills
+CVProfile = Tuple[Set[Words], Set[str], Set[str]]
+# A job's (weight, canonical skill ID or None for a requirement sentence, words) entries
+JobProfile = List[Tuple[int, Optional[str], Words]]
+
+
+def _words(text: Any) -> Words:
+    return tuple(_WORD.findall(text.casefold())) if isinstance(text, str) else ()
+
+
+def _strings(values: Any) -> List[str]:
+    return [value for value in values if isinstance(value, str)] if isinstance(values, list) else []
+
+
+def cv_profile(cv: Dict[str, Any]) -> CVProfile:
+    """Get the skill terms a CV lists, every word it contains and its canonical skill IDs"""
+    skills = cv.get("skills") or {}
+    terms = _strings(skills.get("technical")) + _strings(skills.get("soft"))
+    terms += _strings(skills.get("languages")) + _strings(cv.get("certifications"))
+    texts = [cv.get("summary")]
+    for project in cv.get("projects") or []:
+        terms += _strings(project.get("technologies"))
+        texts.append(project.get("description"))
+    for job in cv.get("experience") or []:
+        texts.append(job.get("position"))
+        texts.extend(_strings(job.get("responsibilities")))
+
+    term_words = {words for words in map(_words, terms) if words}
+    all_words = {word for words in term_words for word in words}
+    for text in texts:
+        all_words.update(_words(text))
+    return term_words, all_words, set(get_skill_taxonomy().canonicalize_all(terms))
+
+
+def job_profile(job: Dict[str, Any]) -> JobProfile:
+    """Get what a job asks for, as (weight, skill ID, words) entries
+
+    Skills are single terms the CV should have, under any of their names;
+    requirements are sentences that should mention one of the CV's skills.
+    """
+    taxonomy = get_skill_taxonomy()
+    required = job.get("required_skills") or {}
+    entries = []
+    for weight, is_skill, values in (
+        (REQUIRED_TECHNICAL_WEIGHT, True, required.get("technical")),
+        (REQUIRED_SOFT_WEIGHT, True, required.get("soft")),
+        (NICE_TO_HAVE_WEIGHT, True, job.get("nice_to_have_skills")),
+        (REQUIREMENT_WEIGHT, False, job.get("requirements")),
+        (REQUIREMENT_WEIGHT, False, job.get("key_qualifications")),
+    ):
+        for value in _strings(values):
+            words = _words(value)
+            if words:
+                entries.append((weight, taxonomy.canonicalize(value) if is_skill else None, words))
+    return entries
+
+
+def pre_score(cv: CVProfile, job: JobProfile) -> float:
+    """Score 0-100 for the weighted share of a job profile a CV profile covers"""
+    terms, words, skill_ids = cv
+    total = matched = 0
+    for weight, skill_id, entry in job:
+        total += weight
+        if skill_id:
+            covered = skill_id in skill_ids or entry in terms or set(entry) <= words
+        else:
+            covered = any(set(term) <= set(entry) for term in terms)
+        matched += weight if covered else 0
+    return round(100 * matched / total, 1) if total else 0.0
+
+
+def _prompt_chars(doc: Dict[str, Any]) -> int:
+    # The report prompt embeds each document as indented JSON
+    return len(json.dumps(strip_internal_fields(doc), indent=2, default=str))
+
+
+class Budget:
+    """Tokens and dollars a run may spend, counting the reports in flight at their estimate"""
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None,
+                 prompt_price: float = LLM_PROMPT_PRICE_PER_1K,
+                 completion_price: float = LLM_COMPLETION_PRICE_PER_1K):
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.prompt_price = prompt_price
+        self.completion_price = completion_price
+        self.spent = {"prompt_tokens": 0, "completion_tokens": 0}
+        self.reserved = {"prompt_tokens": 0, "completion_tokens": 0}
+
+    def cost(self, tokens: Dict[str, int]) -> float:
+        return (tokens["prompt_tokens"] * self.prompt_price
+                + tokens["completion_tokens"] * self.completion_price) / 1000
+
+    def fits(self, estimate: Dict[str, int]) -> bool:
+        """Check whether a report estimated to use these tokens can still be started"""
+        committed = {field: self.spent[field] + self.reserved[field] + estimate[field]
+                     for field in self.spent}
+        if self.max_tokens is not None and sum(committed.values()) > self.max_tokens:
+            return False
+        return self.max_cost is None or self.cost(committed) <= self.max_cost
+
+    def reserve(self, estimate: Dict[str, int]):
+        for field in self.reserved:
+            self.reserved[field] += estimate[field]
+
+    def settle(self, estimate: Dict[str, int], used: Optional[Dict[str, int]]):
+        """Replace a finished report's reservation with the tokens it used
+
+        The estimate stands in when the API reported no usage.
+        """
+        used = used if used and used.get("total_tokens") else estimate
+        for field in self.spent:
+            self.reserved[field] -= estimate[field]
+            self.spent[field] += used[field]
+
+    def report(self) -> Dict[str, Any]:
+        return {"tokens": sum(self.spent.values()), **self.spent,
+                "cost": round(self.cost(self.spent), 4),
+                "max_tokens": self.max_tokens, "max_cost": self.max_cost}
+
+
+def _load(ids: Optional[Iterable[str]], load_one: Callable[[str], Optional[Dict]],
+          load_all: Callable[[], List[Dict]]) -> List[Dict[str, Any]]:
+    if ids is None:
+        return load_all()
+    docs = []
+    for doc_id in ids:
+        doc = load_one(doc_id)
+        if doc is None:
+            raise ValueError(f"Analysis {doc_id} not found")
+        docs.append(doc)
+    return docs
+
+
+def match_matrix(db: JobAgentDB, cv_ids: Optional[List[str]] = None,
+                 job_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Get every CV and job pair with its pre-score and newest report, best pre-score first
+
+    Without IDs, every stored CV and every current job analysis is included;
+    analyses of removed or since edited postings are left out. Each row has
+    cv_id, job_id, pre_score, report_id, score (the report's overall match
+    score) and estimate, the tokens a report is expected to use.
+    """
+    cvs = _load(cv_ids, db.get_cv_analysis_by_id, db.get_cv_analyses)
+    # The scraped posting isn't part of the prompt, so it's never loaded or decompressed
+    jobs = _load(job_ids, db.get_job_analysis_by_id, lambda: [
+        job for job in db.get_job_analyses_without_content()
+        if job.get("posting_status") in (None, "open")
+    ])
+    reports = {(doc.get("cv_id"), doc.get("job_id")): doc for doc in db.get_report_matrix()}
+    base_chars = len(SYSTEM_PROMPT) + len(build_report_prompt({}, {}))
+
+    job_profiles = [(str(job["_id"]), job_profile(job), _prompt_chars(job)) for job in jobs]
+    rows = []
+    for cv in cvs:
+        cv_id, profile, cv_chars = str(cv["_id"]), cv_profile(cv), _prompt_chars(cv)
+        for job_id, job, job_chars in job_profiles:
+            report = reports.get((cv_id, job_id))
+            rows.append({
+                "cv_id": cv_id,
+                "job_id": job_id,
+                "pre_score": pre_score(profile, job),
+                "report_id": str(report["_id"]) if report else None,
+                "score": report.get("overall_match_score") if report else None,
+                "estimate": {
+                    "prompt_tokens": (base_chars + cv_chars + job_chars) // CHARS_PER_TOKEN,
+                    "completion_tokens": REPORT_COMPLETION_TOKENS,
+                },
+            })
+    rows.sort(key=lambda row: row["pre_score"], reverse=True)
+    return rows
+
+
+def run_matrix(db: JobAgentDB, cv_ids: Optional[List[str]] = None,
+               job_ids: Optional[List[str]] = None, budget: Optional[Budget] = None,
+               concurrency: int = 2, min_pre_score: float = 0, agent=None,
+               on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+               dry_run: bool = False) -> Dict[str, Any]:
+    """Generate the missing reports of a matrix, best pre-score first, until the budget is spent
+
+    Pairs scoring below min_pre_score are never reported. Once the next pair
+    doesn't fit the budget, even after the reports in flight have settled,
+    it and every pair after it are left for a later run. on_result is called
+    with each finished report, which includes the running spend. With
+    dry_run, no report is generated and each pair that would be is passed
+    to on_result at its estimate.
+    """
+    budget = budget or Budget()
+    counts = {outcome: 0 for outcome in MATRIX_OUTCOMES}
+    pending: Dict[Future, Dict[str, Any]] = {}
+
+    def generate(row: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict], Dict, str]:
+        with count_tokens() as used:
+            try:
+                doc_id, report = generate_suitability_report(
+                    db, row["cv_id"], row["job_id"], agent=agent,
+                    fields={"pre_score": row["pre_score"]}
+                )
+                return doc_id, report, used, ""
+            except Exception as e:
+                return None, None, used, str(e) or type(e).__name__
+
+    def finish(row: Dict[str, Any], doc_id: Optional[str], report: Optional[Dict],
+               used: Optional[Dict[str, int]], error: str):
+        budget.settle(row["estimate"], used)
+        counts["failed" if error else "reported"] += 1
+        if on_result:
+            on_result({
+                "cv_id": row["cv_id"], "job_id": row["job_id"], "pre_score": row["pre_score"],
+                "id": doc_id, "score": report.get("overall_match_score") if report else None,
+                "error": error or None, "tokens": used, "spent": budget.report(),
+            })
+
+    def handle_next():
+        finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in finished:
+            finish(pending.pop(future), *future.result())
+
+    rows = match_matrix(db, cv_ids, job_ids)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency),
+                            thread_name_prefix="matrix-report") as executor:
+        exhausted = False
+        for row in rows:
+            if row["report_id"]:
+                counts["existing"] += 1
+                continue
+            if row["pre_score"] < min_pre_score:
+                counts["below_min"] += 1
+                continue
+            # What's in flight may turn out cheaper than estimated, so settle it before giving up
+            while pending and (len(pending) >= concurrency or not budget.fits(row["estimate"])):
+                handle_next()
+            exhausted = exhausted or not budget.fits(row["estimate"])
+            if exhausted:
+                counts["over_budget"] += 1
+                continue
+            budget.reserve(row["estimate"])
+            if dry_run:
+                finish(row, None, None, None, "")
+            else:
+                pending[executor.submit(generate, row)] = row
+        while pending:
+            handle_next()
+    return {"pairs": len(rows), **counts, "spent": budget.report()}
@@ -0,0 +1,171 @@
+"""Per-session memory accounting for the Streamlit app, from tracemalloc snapshots
+
+With MEMORY_PROFILING on, every page render is wrapped in a pair of
+tracemalloc snapshots. The difference is recorded against the session that
+rendered, together with the size of that session's state and the source
+lines that allocated the most. tracemalloc is process-wide, so renders of
+other sessions running at the same time show up in each other's figures;
+the per-session totals are still what to compare across sessions and pages.
+Tracing every allocation slows the app down, so it's meant for diagnosis
+rather than left on.
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.config import MEMORY_PROFILING
+
+# Sessions remembered, least recently rendered dropped first
+MAX_SESSIONS = 500
+# Allocation sites kept per render
+TOP_SITES = 10
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate the bytes held by an object and everything it contains"""
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        try:
+            size += sys.getsizeof(current)
+        except TypeError:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.append(vars(current))
+    return size
+
+
+def _compare(after: tracemalloc.Snapshot,
+             before: tracemalloc.Snapshot) -> List[tracemalloc.StatisticDiff]:
+    # The snapshots themselves are allocated by tracemalloc, which would dwarf the page
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    return after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+
+
+def _top_sites(stats: List[tracemalloc.StatisticDiff]) -> List[Dict[str, Any]]:
+    return [
+        {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+        for stat in sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:TOP_SITES]
+        if stat.size_diff > 0
+    ]
+
+
+class MemoryProfiler:
+    """Records the memory each page render allocated, per session"""
+
+    def __init__(self, enabled: bool = MEMORY_PROFILING, max_sessions: int = MAX_SESSIONS):
+        self.enabled = enabled
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def render(self, session_id: str, page: str,
+               session_state: Optional[Any] = None) -> Iterator[None]:
+        """Measure one render of a page; session_state is sized once the render is done"""
+        if not self.enabled:
+            yield
+            return
+        before = tracemalloc.take_snapshot()
+        traced_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            stats = _compare(tracemalloc.take_snapshot(), before)
+            state_bytes = deep_sizeof(dict(session_state)) if session_state is not None else 0
+            self._record(session_id, {
+                "page": page,
+                # Still held once the render is done, e.g. cached data and session state
+                "retained_bytes": sum(stat.size_diff for stat in stats),
+                # Highest point above the starting level while rendering
+                "peak_bytes": max(peak - traced_before, 0),
+                "session_state_bytes": state_bytes,
+                "seconds": round(seconds, 4),
+                "top_sites": _top_sites(stats),
+            })
+
+    def _record(self, session_id: str, render: Dict[str, Any]):
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or {
+                "renders": 0, "retained_bytes": 0, "peak_bytes": 0, "pages": {}
+            }
+            session["renders"] += 1
+            session["retained_bytes"] += render["retained_bytes"]
+            session["peak_bytes"] = max(session["peak_bytes"], render["peak_bytes"])
+            session["session_state_bytes"] = render["session_state_bytes"]
+            session["last_render"] = render
+            page = session["pages"].setdefault(render["page"], {"renders": 0, "retained_bytes": 0,
+                                                                "peak_bytes": 0})
+            page["renders"] += 1
+            page["retained_bytes"] += render["retained_bytes"]
+            page["peak_bytes"] = max(page["peak_bytes"], render["peak_bytes"])
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def session_report(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get the totals of one session, or None if it hasn't been measured"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return None if session is None else {
+                **session, "pages": {k: dict(v) for k, v in session["pages"].items()}
+            }
+
+    def report(self) -> Dict[str, Any]:
+        """Get the process's traced memory and the totals of every session, largest state first"""
+        with self._lock:
+            sessions = {
+                session_id: {k: session[k] for k in ("renders", "retained_bytes",
+                                                     "peak_bytes", "session_state_bytes")}
+                for session_id, session in self._sessions.items()
+            }
+        current, peak = tracemalloc.get_traced_memory() if self.enabled else (0, 0)
+        return {
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "sessions": dict(sorted(sessions.items(),
+                                    key=lambda item: item[1]["session_state_bytes"],
+                                    reverse=True)),
+        }
+
+
+def current_session_id() -> str:
+    """Get the id of the Streamlit session running this script, or "local" outside one"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+
+_profiler: Optional[MemoryProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_memory_profiler() -> MemoryProfiler:
+    """Get the process-wide profiler, which every session reports to"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = MemoryProfiler()
+    return _profiler
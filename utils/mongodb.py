@@ -1,158 +1,682 @@
-import os
+import functools
+import threading
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Set, Tuple
 from dotenv import load_dotenv
+from utils.cache import DocumentCache, TTLCache
+from utils.compression import COMPRESSED_FIELDS, check_codec, compress_fields, decompress_fields
+from utils.config import (COMPRESSION, DB_CACHE_TTL_SECONDS, DOC_CACHE_MB, DOC_CACHE_TTL_SECONDS,
+                          RETENTION, TASK_RETENTION_DAYS)
+from utils.skills import SKILL_ID_FIELDS, get_skill_taxonomy, with_skill_ids
+from utils.storage import StorageBackend, create_backend
+from utils.storage.base import ScoreRange, TextFilters
+from utils.tracing import annotate, trace_methods
 
 load_dotenv()
 
+# Fields needed to label each collection's documents in listings
+SUMMARY_FIELDS = {
+    "cv_analyses": ["created_at", "personal_info.name"],
+    "job_searches": ["created_at", "filters.job_title", "job_count"],
+    "job_analyses": ["created_at", "job_title", "company", "posting_status"],
+    "suitability_reports": ["created_at", "cv_name", "job_title", "company", "overall_match_score"],
+    "cover_letters": ["created_at", "cv_name", "job_title", "company", "tone"],
+}
 
-class MongoDB:
-    def __init__(self):
-        self.client: Optional[MongoClient] = None
-        self.db: Optional[Database] = None
-        self._connect()
-    
-    def _connect(self):
-        """Connect to MongoDB using connection string from environment"""
-        mongodb_uri = os.getenv("MONGODB_URI")
-        if not mongodb_uri:
-            raise ValueError("MONGODB_URI not found in environment variables")
-        
-        self.client = MongoClient(mongodb_uri)
-        # Extract database name from URI or use default
-        db_name = os.getenv("MONGODB_DATABASE", "job_agent")
-        self.db = self.client[db_name]
-    
-    def get_collection(self, collection_name: str) -> Collection:
-        """Get a collection from the database"""
-        if self.db is None:
-            raise RuntimeError("Database connection not initialized")
-        return self.db[collection_name]
-    
-    def close(self):
-        """Close the MongoDB connection"""
-        if self.client is not None:
-            self.client.close()
+# Fields a refresh of tracked job postings needs from each analysis (see utils.pipeline)
+TRACKING_FIELDS = ["created_at", "job_url", "content_hash", "posting_status", "checked_at"]
+
+# Fields of each report a CV x job match matrix shows (see utils.matrix)
+MATRIX_FIELDS = ["created_at", "cv_id", "job_id", "overall_match_score", "pre_score"]
+
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_BULK_CHUNK_SIZE = 500
+
+SKILL_OUTCOMES = ("matched", "missing")
+SKILL_TYPES = ("technical_skills", "soft_skills")
+
+
+def _cached(collection_name: str):
+    """Serve a JobAgentDB read from its cache, invalidated by writes to collection_name"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            loaded = []
+
+            def load():
+                loaded.append(True)
+                return method(self, *args, **kwargs)
+
+            result = self.cache.get_or_load(collection_name, key, load)
+            annotate(cache_hit=not loaded)
+            return result
+        return wrapper
+    return decorator
+
+
+def _cached_document(collection_name: str):
+    """Serve a JobAgentDB read of one document by ID from its bounded document cache"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, doc_id: str) -> Optional[Dict[str, Any]]:
+            loaded = []
 
+            def load():
+                loaded.append(True)
+                return method(self, doc_id)
 
+            result = self.documents.get_or_load(collection_name, doc_id, load)
+            annotate(cache_hit=not loaded)
+            return result
+        return wrapper
+    return decorator
+
+
+def _now() -> datetime:
+    # Truncated to the millisecond precision MongoDB stores, so every backend
+    # hands back the same timestamps and pagination cursors
+    now = datetime.now()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+# Only within a task's or pipeline item's trace: page renders and task polling read the
+# database every few seconds, and would otherwise each leave a one-span trace
+@trace_methods("db", nested_only=True)
 class JobAgentDB:
     """Database operations for Job Agent application"""
     
-    def __init__(self):
-        self.mongo = MongoDB()
-        self.cv_analyses = self.mongo.get_collection("cv_analyses")
-        self.job_searches = self.mongo.get_collection("job_searches")
-        self.job_analyses = self.mongo.get_collection("job_analyses")
-        self.suitability_reports = self.mongo.get_collection("suitability_reports")
-        self.cover_letters = self.mongo.get_collection("cover_letters")
+    def __init__(self, backend: Optional[StorageBackend] = None, cache: Optional[TTLCache] = None,
+                 retention: str = RETENTION, compression: str = COMPRESSION,
+                 documents: Optional[DocumentCache] = None,
+                 task_retention_days: float = TASK_RETENTION_DAYS):
+        from utils.retention import RetentionPolicy, apply_ttl, parse_retention
+        check_codec(compression)
+        # Codec for the large fields in COMPRESSED_FIELDS; reads handle any codec
+        self.compression = compression
+        self.backend = backend or create_backend()
+        # Shared by every session using this instance; see _cached
+        self.cache = cache if cache is not None else TTLCache(DB_CACHE_TTL_SECONDS)
+        # Full documents by ID, so pages only need to keep IDs; see _cached_document
+        self.documents = (documents if documents is not None
+                          else DocumentCache(int(DOC_CACHE_MB * 1024 * 1024),
+                                             ttl_seconds=DOC_CACHE_TTL_SECONDS))
+        self.retention = parse_retention(retention)
+        # Tasks only matter until their outcome was shown, so they expire unless told otherwise
+        if task_retention_days > 0:
+            self.retention.setdefault("tasks", RetentionPolicy("ttl", task_retention_days))
+        self.ensure_indexes()
+        apply_ttl(self, self.retention)
+    
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Create any missing tables and indexes, returning the index names per collection"""
+        return self.backend.ensure_indexes()
+    
+    def _pack(self, collection: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        # Every write of an analysis stores the canonical IDs of its skills
+        doc = with_skill_ids(collection, doc)
+        return compress_fields(doc, COMPRESSED_FIELDS.get(collection, []), self.compression)
+    
+    def _find_by_id(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        return decompress_fields(self.backend.find_by_id(collection, doc_id))
+    
+    def _find_one(self, collection: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return decompress_fields(self.backend.find_one(collection, filters))
+    
+    def _find_all(self, collection: str) -> List[Dict[str, Any]]:
+        return [decompress_fields(doc) for doc in self.backend.find(collection)]
+    
+    def _insert(self, collection: str, doc: Dict[str, Any]) -> str:
+        doc_id = self.backend.insert(collection, self._pack(collection, doc))
+        self.cache.invalidate(collection)
+        return doc_id
+    
+    def _save_by_hash(self, collection: str, doc: Dict[str, Any]) -> str:
+        """Insert a document, or replace the one with the same content hash"""
+        if not doc.get("content_hash"):
+            return self._insert(collection, doc)
+        doc_id = self.backend.upsert_by_hash(collection, self._pack(collection, doc))
+        self.cache.invalidate(collection)
+        # Replaced in place when the hash was already stored
+        self.documents.discard(collection, doc_id)
+        return doc_id
+    
+    def _bulk_save(self, collection: str, doc_type: str, items: Iterable[Dict[str, Any]],
+                   chunk_size: int) -> List[Dict[str, Optional[str]]]:
+        """Write documents with one bulk request per chunk
+
+        Documents with a content_hash are upserted on it, others are inserted.
+        Returns one {"id", "error"} entry per item, in input order; a failed item
+        doesn't stop the rest of its chunk.
+        """
+        results = []
+        for chunk in _chunked(items, chunk_size):
+            now = _now()
+            docs = [self._pack(collection, {**data, "created_at": now, "type": doc_type})
+                    for data in chunk]
+            try:
+                chunk_results = self.backend.bulk_save(collection, docs)
+            except Exception:
+                self.invalidate(collection)
+                raise
+            self.cache.invalidate(collection)
+            for result in chunk_results:
+                if result["id"]:
+                    self.documents.discard(collection, result["id"])
+            results.extend(chunk_results)
+        return results
+
+    def _newest_id(self, collection: str, filters: Dict[str, Any]) -> Optional[str]:
+        """Get the ID of the newest document matching the filters, from the listing cache"""
+        def load():
+            docs = self.backend.find(collection, filters, fields=["created_at"], limit=1)
+            return str(docs[0]["_id"]) if docs else None
+        key = ("_newest_id", tuple(sorted(filters.items())))
+        return self.cache.get_or_load(collection, key, load)
+
+    def invalidate(self, collection: str):
+        """Drop the cached listings and documents of a collection, e.g. after deleting some"""
+        self.cache.invalidate(collection)
+        self.documents.invalidate(collection)
+    
+    def _get_summaries(self, collection: str) -> List[Dict[str, Any]]:
+        """Get the ID and label fields of every document, newest first"""
+        return self.backend.find(collection, fields=SUMMARY_FIELDS[collection])
+    
+    def _get_page(self, collection: str, cursor: Optional[str], page_size: int,
+                  text_filters: Optional[TextFilters] = None,
+                  score_range: ScoreRange = (None, None)
+                  ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of summaries, newest first, continuing after the given cursor
+
+        text_filters maps field paths to case-insensitive substrings they must contain.
+        Returns the page and the cursor for the next page, or None on the last page.
+        """
+        return self.backend.page(collection, SUMMARY_FIELDS[collection], cursor, page_size,
+                                 text_filters, score_range)
     
     # CV Analysis operations
     def save_cv_analysis(self, data: Dict[str, Any]) -> str:
-        """Save CV analysis result"""
+        """Save CV analysis result, replacing any analysis of the same CV text"""
         doc = {
             **data,
-            "created_at": datetime.now(),
+            "created_at": _now(),
             "type": "cv_analysis"
         }
-        result = self.cv_analyses.insert_one(doc)
-        return str(result.inserted_id)
+        return self._save_by_hash("cv_analyses", doc)
+    
+    def save_cv_analyses(
+        self, items: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Optional[str]]]:
+        """Save many CV analyses with one bulk write per chunk"""
+        return self._bulk_save("cv_analyses", "cv_analysis", items, chunk_size)
+    
+    def get_existing_cv_hashes(self, hashes: Iterable[str]) -> Set[str]:
+        """Get which of the given content hashes already have a stored CV analysis"""
+        return self.backend.find_hashes("cv_analyses", hashes)
     
     def get_cv_analyses(self) -> List[Dict[str, Any]]:
         """Get all CV analyses sorted by creation date"""
-        return list(self.cv_analyses.find().sort("created_at", -1))
+        return self._find_all("cv_analyses")
+    
+    @_cached("cv_analyses")
+    def get_cv_analysis_summaries(self) -> List[Dict[str, Any]]:
+        """Get ID and label fields of all CV analyses sorted by creation date"""
+        return self._get_summaries("cv_analyses")
     
+    @_cached("cv_analyses")
+    def get_cv_analysis_page(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        name: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of CV analysis summaries filtered by name"""
+        return self._get_page(
+            "cv_analyses", cursor, page_size,
+            text_filters={"personal_info.name": name}
+        )
+    
+    @_cached_document("cv_analyses")
     def get_cv_analysis_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific CV analysis by ID"""
-        from bson import ObjectId
-        return self.cv_analyses.find_one({"_id": ObjectId(doc_id)})
+        return self._find_by_id("cv_analyses", doc_id)
+    
+    def get_cv_analysis_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the CV analysis stored for the given content hash"""
+        return self._find_one("cv_analyses", {"content_hash": content_hash})
     
     # Job Search operations
     def save_job_search(self, data: Dict[str, Any]) -> str:
         """Save job search results"""
         doc = {
             **data,
-            "created_at": datetime.now(),
+            "created_at": _now(),
             "type": "job_search"
         }
-        result = self.job_searches.insert_one(doc)
-        return str(result.inserted_id)
+        return self._insert("job_searches", doc)
+    
+    def save_job_searches(
+        self, items: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Optional[str]]]:
+        """Save many job searches with one bulk write per chunk"""
+        return self._bulk_save("job_searches", "job_search", items, chunk_size)
     
     def get_job_searches(self) -> List[Dict[str, Any]]:
         """Get all job searches sorted by creation date"""
-        return list(self.job_searches.find().sort("created_at", -1))
+        return self._find_all("job_searches")
+    
+    @_cached("job_searches")
+    def get_job_search_summaries(self) -> List[Dict[str, Any]]:
+        """Get ID and label fields of all job searches sorted by creation date"""
+        return self._get_summaries("job_searches")
+    
+    @_cached("job_searches")
+    def get_job_search_page(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        title: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of job search summaries filtered by title"""
+        return self._get_page(
+            "job_searches", cursor, page_size,
+            text_filters={"filters.job_title": title}
+        )
     
+    @_cached_document("job_searches")
     def get_job_search_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific job search by ID"""
-        from bson import ObjectId
-        return self.job_searches.find_one({"_id": ObjectId(doc_id)})
+        return self._find_by_id("job_searches", doc_id)
     
     # Job Analysis operations
     def save_job_analysis(self, data: Dict[str, Any]) -> str:
-        """Save job analysis result"""
+        """Save job analysis result, replacing any analysis of the same description"""
         doc = {
             **data,
-            "created_at": datetime.now(),
+            "created_at": _now(),
             "type": "job_analysis"
         }
-        result = self.job_analyses.insert_one(doc)
-        return str(result.inserted_id)
+        return self._save_by_hash("job_analyses", doc)
+    
+    def insert_job_analysis(self, data: Dict[str, Any]) -> str:
+        """Save job analysis result as a new document, failing if its content_hash is stored"""
+        return self._insert("job_analyses", {**data, "created_at": _now(), "type": "job_analysis"})
+    
+    def save_job_analyses(
+        self, items: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Optional[str]]]:
+        """Save many job analyses with one bulk write per chunk"""
+        return self._bulk_save("job_analyses", "job_analysis", items, chunk_size)
     
     def get_job_analyses(self) -> List[Dict[str, Any]]:
         """Get all job analyses sorted by creation date"""
-        return list(self.job_analyses.find().sort("created_at", -1))
+        return self._find_all("job_analyses")
+    
+    def get_job_analyses_without_content(self) -> List[Dict[str, Any]]:
+        """Get all job analyses sorted by creation date, without their scraped raw_content"""
+        return self.backend.find("job_analyses", exclude=["raw_content"])
+    
+    @_cached("job_analyses")
+    def get_job_analysis_summaries(self) -> List[Dict[str, Any]]:
+        """Get ID and label fields of all job analyses sorted by creation date"""
+        return self._get_summaries("job_analyses")
+    
+    @_cached("job_analyses")
+    def get_job_analysis_page(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        title: Optional[str] = None,
+        company: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of job analysis summaries filtered by title and company"""
+        return self._get_page(
+            "job_analyses", cursor, page_size,
+            text_filters={"job_title": title, "company": company}
+        )
     
+    @_cached_document("job_analyses")
     def get_job_analysis_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific job analysis by ID"""
-        from bson import ObjectId
-        return self.job_analyses.find_one({"_id": ObjectId(doc_id)})
+        return self._find_by_id("job_analyses", doc_id)
+    
+    def get_job_analysis_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the job analysis stored for the given content hash"""
+        return self._find_one("job_analyses", {"content_hash": content_hash})
+    
+    def get_job_analysis_by_url(self, job_url: str) -> Optional[Dict[str, Any]]:
+        """Get the current analysis of a job posting URL: the newest one not superseded"""
+        def load():
+            docs = self.backend.find("job_analyses", {"job_url": job_url},
+                                     fields=["created_at", "posting_status"])
+            # A posting that went back to an earlier description revives that older analysis
+            current = [doc for doc in docs if doc.get("posting_status") != "changed"] or docs
+            return str(current[0]["_id"]) if current else None
+        doc_id = self.cache.get_or_load("job_analyses", ("get_job_analysis_by_url", job_url), load)
+        return self.get_job_analysis_by_id(doc_id) if doc_id else None
+
+    def get_tracked_job_analyses(self, checked_before: Optional[datetime] = None
+                                 ) -> List[Dict[str, Any]]:
+        """Get the current analysis of each posting URL, unless the posting was removed
+
+        The current analysis is the newest one not superseded by another. Only
+        TRACKING_FIELDS are loaded. With checked_before, postings checked (or,
+        if never checked, analyzed) since then are left out.
+        """
+        tracked = []
+        seen = set()
+        for doc in self.backend.find("job_analyses", fields=TRACKING_FIELDS):
+            url = doc.get("job_url")
+            if not url or url in seen or doc.get("posting_status") == "changed":
+                continue
+            seen.add(url)
+            if doc.get("posting_status") == "removed":
+                continue
+            if checked_before and (doc.get("checked_at") or doc["created_at"]) >= checked_before:
+                continue
+            tracked.append(doc)
+        return tracked
+
+    @_cached("job_analyses")
+    def get_job_analyses_requiring(self, skills: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """Get the summaries of the job analyses requiring every one of skills, newest first
+
+        Skills can be given by any name the taxonomy knows, e.g. "Postgres" for
+        postgresql. Summaries carry required_skill_ids as well as the label fields.
+        """
+        skill_ids = get_skill_taxonomy().canonicalize_all(skills)
+        if not skill_ids:
+            raise ValueError("Give at least one skill to look for")
+        return self.backend.find_containing(
+            "job_analyses", "required_skill_ids", skill_ids,
+            fields=SUMMARY_FIELDS["job_analyses"] + ["required_skill_ids"]
+        )
+
+    def backfill_skill_ids(self, recompute: bool = False) -> Dict[str, int]:
+        """Store canonical skill IDs on analyses saved without them, counting them per collection
+
+        With recompute, analyses that have them are checked too, and updated where the
+        taxonomy now gives different IDs, e.g. after aliases were added.
+        """
+        counts = {}
+        for collection, targets in SKILL_ID_FIELDS.items():
+            fields = list(targets) + list(targets.values())
+            counts[collection] = 0
+            for doc in self.backend.find(collection, fields=fields):
+                if not recompute and all(target in doc for target in targets):
+                    continue
+                skill_ids = with_skill_ids(collection, doc)
+                changed = {target: skill_ids[target] for target in targets
+                           if doc.get(target) != skill_ids[target]}
+                if not changed:
+                    continue
+                self.backend.update(collection, str(doc["_id"]), changed)
+                counts[collection] += 1
+            if counts[collection]:
+                self.invalidate(collection)
+        return counts
+
+    def update_job_analysis(self, doc_id: str, fields: Dict[str, Any]) -> bool:
+        """Set top-level fields of a job analysis, returning whether it exists"""
+        updated = self.backend.update("job_analyses", doc_id, fields)
+        self.cache.invalidate("job_analyses")
+        self.documents.discard("job_analyses", doc_id)
+        return updated
     
     # Suitability Report operations
     def save_suitability_report(self, data: Dict[str, Any]) -> str:
         """Save suitability report"""
         doc = {
             **data,
-            "created_at": datetime.now(),
+            "created_at": _now(),
             "type": "suitability_report"
         }
-        result = self.suitability_reports.insert_one(doc)
-        return str(result.inserted_id)
+        return self._insert("suitability_reports", doc)
+    
+    def save_suitability_reports(
+        self, items: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Optional[str]]]:
+        """Save many suitability reports with one bulk write per chunk"""
+        return self._bulk_save("suitability_reports", "suitability_report", items, chunk_size)
     
     def get_suitability_reports(self) -> List[Dict[str, Any]]:
         """Get all suitability reports sorted by creation date"""
-        return list(self.suitability_reports.find().sort("created_at", -1))
+        return self._find_all("suitability_reports")
+    
+    @_cached("suitability_reports")
+    def get_suitability_report_summaries(self) -> List[Dict[str, Any]]:
+        """Get ID and label fields of all suitability reports sorted by creation date"""
+        return self._get_summaries("suitability_reports")
     
+    @_cached("suitability_reports")
+    def get_suitability_report_page(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        name: Optional[str] = None,
+        title: Optional[str] = None,
+        company: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of report summaries filtered by name, title, company and score range"""
+        return self._get_page(
+            "suitability_reports", cursor, page_size,
+            text_filters={"cv_name": name, "job_title": title, "company": company},
+            score_range=(min_score, max_score)
+        )
+    
+    @_cached_document("suitability_reports")
     def get_suitability_report_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific suitability report by ID"""
-        from bson import ObjectId
-        return self.suitability_reports.find_one({"_id": ObjectId(doc_id)})
+        return self._find_by_id("suitability_reports", doc_id)
+    
+    def get_suitability_report_for(self, cv_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the newest report comparing a CV analysis with a job analysis"""
+        doc_id = self._newest_id("suitability_reports", {"cv_id": cv_id, "job_id": job_id})
+        return self.get_suitability_report_by_id(doc_id) if doc_id else None
+    
+    @_cached("suitability_reports")
+    def get_report_matrix(self, cv_id: Optional[str] = None,
+                          job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the newest report of every CV and job pair, optionally for one CV or job
+
+        Only MATRIX_FIELDS are loaded.
+        """
+        filters = {"cv_id": cv_id, "job_id": job_id}
+        matrix = []
+        seen = set()
+        for doc in self.backend.find("suitability_reports",
+                                     {k: v for k, v in filters.items() if v is not None},
+                                     fields=MATRIX_FIELDS):
+            pair = (doc.get("cv_id"), doc.get("job_id"))
+            if pair not in seen:
+                seen.add(pair)
+                matrix.append(doc)
+        return matrix
     
     # Cover Letter operations
     def save_cover_letter(self, data: Dict[str, Any]) -> str:
         """Save cover letter"""
         doc = {
             **data,
-            "created_at": datetime.now(),
+            "created_at": _now(),
             "type": "cover_letter"
         }
-        result = self.cover_letters.insert_one(doc)
-        return str(result.inserted_id)
+        return self._insert("cover_letters", doc)
+    
+    def save_cover_letters(
+        self, items: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Optional[str]]]:
+        """Save many cover letters with one bulk write per chunk"""
+        return self._bulk_save("cover_letters", "cover_letter", items, chunk_size)
     
     def get_cover_letters(self) -> List[Dict[str, Any]]:
         """Get all cover letters sorted by creation date"""
-        return list(self.cover_letters.find().sort("created_at", -1))
+        return self._find_all("cover_letters")
     
+    @_cached("cover_letters")
+    def get_cover_letter_summaries(self) -> List[Dict[str, Any]]:
+        """Get ID and label fields of all cover letters sorted by creation date"""
+        return self._get_summaries("cover_letters")
+    
+    @_cached("cover_letters")
+    def get_cover_letter_page(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        name: Optional[str] = None,
+        title: Optional[str] = None,
+        company: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of cover letter summaries filtered by name, title and company"""
+        return self._get_page(
+            "cover_letters", cursor, page_size,
+            text_filters={"cv_name": name, "job_title": title, "company": company}
+        )
+    
+    @_cached_document("cover_letters")
     def get_cover_letter_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific cover letter by ID"""
-        from bson import ObjectId
-        return self.cover_letters.find_one({"_id": ObjectId(doc_id)})
+        return self._find_by_id("cover_letters", doc_id)
+
+    def get_cover_letter_for(self, cv_id: str, job_id: str,
+                             tone: str) -> Optional[Dict[str, Any]]:
+        """Get the newest cover letter in a tone for a CV analysis and a job analysis"""
+        doc_id = self._newest_id("cover_letters", {"cv_id": cv_id, "job_id": job_id, "tone": tone})
+        return self.get_cover_letter_by_id(doc_id) if doc_id else None
+
+    # Task operations; never cached, since tasks are polled for their progress
+    def save_task(self, data: Dict[str, Any]) -> str:
+        """Save a background task"""
+        now = _now()
+        doc = {
+            **data,
+            "created_at": now,
+            "updated_at": now,
+            "type": "task"
+        }
+        return self._insert("tasks", doc)
+
+    def update_task(self, task_id: str, fields: Dict[str, Any]) -> bool:
+        """Set fields of a task, returning whether it exists"""
+        updated = self.backend.update("tasks", task_id, {**fields, "updated_at": _now()})
+        self.cache.invalidate("tasks")
+        return updated
+
+    def get_task_by_id(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific task by ID"""
+        return self._find_by_id("tasks", task_id)
+
+    def get_tasks(self, status: Optional[str] = None, task_key: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get tasks, optionally by status and dedup key, newest first"""
+        filters = {"status": status, "task_key": task_key}
+        return self.backend.find(
+            "tasks", {k: v for k, v in filters.items() if v is not None}, limit=limit
+        )
+
+    # Analytics operations, computed by the backend so only the aggregates are transferred
+    @_cached("suitability_reports")
+    def get_top_report_skills(
+        self,
+        outcome: str = "missing",
+        skill_type: str = "technical_skills",
+        limit: int = 10,
+        since: Optional[datetime] = None,
+        company: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the skills most often matched or missing in reports, as {"value", "count"}"""
+        if outcome not in SKILL_OUTCOMES or skill_type not in SKILL_TYPES:
+            raise ValueError(f"Unknown skill outcome or type: {outcome!r}, {skill_type!r}")
+        return self.backend.top_values(
+            "suitability_reports", f"skill_matches.{skill_type}.{outcome}", limit,
+            filters={"company": company} if company else None, since=since
+        )
+    
+    @_cached("suitability_reports")
+    def get_report_score_histogram(
+        self,
+        bucket_size: int = 10,
+        since: Optional[datetime] = None,
+        company: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Count suitability reports per overall match score bucket, as {"min", "max", "count"}"""
+        # The last bucket's upper bound is exclusive, so reach past 100 to include perfect scores
+        boundaries = list(range(0, 100, bucket_size)) + [101]
+        return self.backend.histogram(
+            "suitability_reports", "overall_match_score", boundaries,
+            filters={"company": company} if company else None, since=since
+        )
+    
+    @_cached("suitability_reports")
+    def get_report_scores_by_company(
+        self, since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the report count and score average, minimum and maximum per company"""
+        return self.backend.group_stats(
+            "suitability_reports", "company", "overall_match_score", since=since
+        )
+    
+    def get_activity_by_period(
+        self, period: str = "week", since: Optional[datetime] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Count the documents saved per day, week or month in every collection"""
+        return {
+            collection: self.cache.get_or_load(
+                collection, ("get_activity_by_period", period, since),
+                lambda collection=collection: self.backend.count_by_period(
+                    collection, period, since=since
+                )
+            )
+            for collection in SUMMARY_FIELDS
+        }
     
     def close(self):
         """Close database connection"""
-        self.mongo.close()
+        self.backend.close()
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_db_instance: Optional[JobAgentDB] = None
+_db_lock = threading.Lock()
+
+
+def get_db() -> JobAgentDB:
+    """Get the shared database instance, connecting on first use"""
+    global _db_instance
+    if _db_instance is None:
+        with _db_lock:
+            if _db_instance is None:
+                _db_instance = JobAgentDB()
+    return _db_instance
+
+
+def cache_stats() -> Optional[Dict[str, Dict[str, float]]]:
+    """Get the shared instance's listing and document cache stats, or None before it connects"""
+    instance = _db_instance
+    if instance is None:
+        return None
+    return {"listings": instance.cache.stats(), "documents": instance.documents.stats()}
+
+
+class _LazyJobAgentDB:
+    """Stands in for the shared JobAgentDB until an attribute is first used"""
+    
+    def __getattr__(self, name: str):
+        return getattr(get_db(), name)
 
 
-# Global database instance
-db = JobAgentDB()
\ No newline at end of file
+# Global database instance, so importing a page doesn't open a connection
+db = _LazyJobAgentDB()
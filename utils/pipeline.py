@@ -0,0 +1,236 @@
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from agents.cover_letter_writer import CoverLetterWriterAgent
+from agents.cv_analyzer import CVAnalyzerAgent
+from agents.job_analyzer import POSTING_REMOVED, JobAnalyzerAgent, is_scrape_failure
+from agents.job_searcher import JobSearchAgent
+from agents.registry import get_agent
+from agents.suitability_reporter import SuitabilityReporterAgent
+from utils.hashing import content_hash, normalize_text
+from utils.mongodb import JobAgentDB, _now
+
+# Fields stored alongside an agent's output that are not part of it
+INTERNAL_FIELDS = ("_id", "created_at", "type", "content_hash", "raw_content", "checked_at",
+                   "removed_at", "check_error", "previous_id", "superseded_by", "pre_score",
+                   "skill_ids", "required_skill_ids", "nice_to_have_skill_ids")
+
+# Jobs found between calls of search_jobs' on_results, after the first one. Each call writes
+# every job found so far to the task, so reporting each job would be quadratic.
+SEARCH_REPORT_EVERY = 10
+
+# What refresh_job_analysis found out about a posting
+REFRESH_OUTCOMES = ("unchanged", "changed", "removed", "failed")
+
+
+def strip_internal_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a stored document without database bookkeeping fields"""
+    return {k: v for k, v in doc.items() if k not in INTERNAL_FIELDS}
+
+
+def analyze_cv_pdf(db: JobAgentDB, pdf_path: str, force_refresh: bool = False,
+                   agent: Optional[CVAnalyzerAgent] = None) -> Tuple[str, Dict, bool]:
+    """Analyze a CV PDF, reusing the stored analysis when the CV text was seen before
+
+    Returns the document ID, the analysis and whether it came from the database.
+    """
+    agent = agent or get_agent(CVAnalyzerAgent)
+    cv_text = agent.extract_text_from_pdf(pdf_path)
+    # Scanned or unreadable PDFs would all share the hash of empty text
+    if not normalize_text(cv_text):
+        raise ValueError(f"No extractable text in {pdf_path}")
+    cv_hash = content_hash(cv_text)
+
+    if not force_refresh:
+        stored = db.get_cv_analysis_by_hash(cv_hash)
+        if stored:
+            return str(stored["_id"]), strip_internal_fields(stored), True
+
+    result = agent.analyze_cv_handler(cv_text=cv_text)
+    doc_id = db.save_cv_analysis({**result, "content_hash": cv_hash})
+    return doc_id, result, False
+
+
+def analyze_job_url(db: JobAgentDB, job_url: str, force_refresh: bool = False,
+                    agent: Optional[JobAnalyzerAgent] = None) -> Tuple[str, Dict, bool]:
+    """Analyze a job posting, reusing the stored analysis when its description was seen before
+
+    Returns the document ID, the analysis and whether it came from the database.
+    """
+    agent = agent or get_agent(JobAnalyzerAgent)
+    job_content = agent.scrape_job_content(job_url)
+    if job_content == POSTING_REMOVED:
+        raise ValueError(f"{POSTING_REMOVED}: {job_url}")
+    # Failed scrapes all share a handful of placeholder texts, so they must not be deduplicated
+    job_hash = None if is_scrape_failure(job_content) else content_hash(job_content)
+
+    if job_hash and not force_refresh:
+        stored = db.get_job_analysis_by_hash(job_hash)
+        if stored and stored.get("job_url") != job_url:
+            # Another posting's description: this URL gets its own copy, so it is tracked too
+            current = db.get_job_analysis_by_url(job_url)
+            if current and content_hash(current.get("raw_content") or "") == job_hash:
+                stored = current
+            else:
+                doc_id = _copy_job_analysis(db, stored, job_url, job_content)
+                stored = db.get_job_analysis_by_id(doc_id)
+        if stored:
+            return str(stored["_id"]), strip_internal_fields(stored), True
+
+    result = agent.analyze_job_handler(job_content=job_content)
+    result["job_url"] = job_url
+    # The scraped description is kept (compressed) for re-analysis and auditing
+    data = {**result, "raw_content": job_content}
+    if job_hash:
+        data["content_hash"] = job_hash
+    doc_id = db.save_job_analysis(data)
+    return doc_id, result, False
+
+
+def _copy_job_analysis(db: JobAgentDB, known: Dict[str, Any], job_url: str, job_content: str,
+                       fields: Optional[Dict[str, Any]] = None) -> str:
+    """Save another posting's analysis of the same description as job_url's
+
+    The copy has no content_hash, which is unique to the original.
+    """
+    return db.insert_job_analysis({**strip_internal_fields(known), **(fields or {}),
+                                   "job_url": job_url, "raw_content": job_content})
+
+
+def refresh_job_analysis(db: JobAgentDB, stored: Dict[str, Any],
+                         agent: Optional[JobAnalyzerAgent] = None) -> Dict[str, Any]:
+    """Re-check a tracked job posting, analyzing it again only if its description changed
+
+    stored is the posting's newest analysis, with at least its _id, job_url and
+    content_hash (see JobAgentDB.get_tracked_job_analyses). The description is
+    scraped again and its normalized hash compared with the stored one:
+    unchanged postings only get checked_at updated, changed ones get a new
+    analysis that supersedes the stored one, and closed ones are marked
+    removed. A failed scrape is recorded on the analysis and retried next time.
+    Returns the outcome (see REFRESH_OUTCOMES) and the ID of the current analysis.
+    """
+    agent = agent or get_agent(JobAnalyzerAgent)
+    doc_id = str(stored["_id"])
+    job_content = agent.scrape_job_content(stored["job_url"])
+    now = _now()
+
+    if job_content == POSTING_REMOVED:
+        db.update_job_analysis(doc_id, {"posting_status": "removed", "checked_at": now,
+                                        "removed_at": now, "check_error": None})
+        return {"outcome": "removed", "id": doc_id}
+    if is_scrape_failure(job_content):
+        # checked_at is left alone so the next refresh tries again
+        db.update_job_analysis(doc_id, {"check_error": job_content})
+        return {"outcome": "failed", "id": doc_id, "error": job_content}
+
+    job_hash = content_hash(job_content)
+    stored_hash = stored.get("content_hash")
+    if stored_hash is None:
+        # Saved before descriptions were hashed
+        raw_content = (db.get_job_analysis_by_id(doc_id) or {}).get("raw_content")
+        stored_hash = content_hash(raw_content) if raw_content else None
+    if job_hash == stored_hash:
+        db.update_job_analysis(doc_id, {"posting_status": "open", "checked_at": now,
+                                        "check_error": None})
+        return {"outcome": "unchanged", "id": doc_id}
+
+    current = {"posting_status": "open", "checked_at": now, "check_error": None,
+               "previous_id": doc_id, "superseded_by": None}
+    known = db.get_job_analysis_by_hash(job_hash)
+    if known and known.get("job_url") == stored["job_url"]:
+        # The posting went back to an earlier description, whose analysis becomes current again
+        new_id = str(known["_id"])
+        db.update_job_analysis(new_id, current)
+    elif known:
+        # Another posting has this description: its analysis applies, but its document stays
+        # that posting's
+        new_id = _copy_job_analysis(db, known, stored["job_url"], job_content, current)
+    else:
+        result = agent.analyze_job_handler(job_content=job_content)
+        result["job_url"] = stored["job_url"]
+        new_id = db.insert_job_analysis({**result, **current, "raw_content": job_content,
+                                         "content_hash": job_hash})
+    # Reports and letters keep pointing at the analysis they were written from
+    db.update_job_analysis(doc_id, {"posting_status": "changed", "checked_at": now,
+                                    "superseded_by": new_id})
+    return {"outcome": "changed", "id": new_id, "previous_id": doc_id}
+
+
+def search_jobs(db: JobAgentDB, filters: Dict[str, str],
+                agent: Optional[JobSearchAgent] = None,
+                on_results: Optional[Callable[[List[Dict]], None]] = None
+                ) -> Tuple[Optional[str], List[Dict]]:
+    """Search for jobs and save the search, once complete, when it found any
+
+    on_results is called with the jobs found so far once the first one is
+    found, then every SEARCH_REPORT_EVERY jobs and once the search ends, so
+    they can be shown before the search is over. Returns the document ID, or
+    None when nothing was found, and the jobs.
+    """
+    agent = agent or get_agent(JobSearchAgent)
+    results = []
+    reported = 0
+    try:
+        for job in agent.iter_jobs(filters):
+            results.append(job)
+            if on_results and (reported == 0 or len(results) - reported >= SEARCH_REPORT_EVERY):
+                on_results(results)
+                reported = len(results)
+    except Exception as e:
+        # As with a full search, a page that fails to load ends it with the jobs found so far
+        print(f"Error searching jobs: {e}")
+    if on_results and len(results) > reported:
+        on_results(results)
+    if not results:
+        return None, results
+    doc_id = db.save_job_search({"filters": filters, "results": results, "job_count": len(results)})
+    return doc_id, results
+
+
+def _load_pair(db: JobAgentDB, cv_id: str, job_id: str) -> Tuple[Dict, Dict]:
+    cv_data = db.get_cv_analysis_by_id(cv_id)
+    if cv_data is None:
+        raise ValueError(f"CV analysis {cv_id} not found")
+    job_data = db.get_job_analysis_by_id(job_id)
+    if job_data is None:
+        raise ValueError(f"Job analysis {job_id} not found")
+    return cv_data, job_data
+
+
+def _source_fields(cv_id: str, job_id: str, cv_data: Dict, job_data: Dict) -> Dict[str, Any]:
+    """Reference the documents a report or letter was generated from"""
+    return {
+        "cv_id": cv_id,
+        "job_id": job_id,
+        "cv_name": cv_data.get("personal_info", {}).get("name", "Unknown"),
+        "job_title": job_data.get("job_title", "Unknown"),
+        "company": job_data.get("company", "Unknown"),
+    }
+
+
+def generate_suitability_report(db: JobAgentDB, cv_id: str, job_id: str,
+                                agent: Optional[SuitabilityReporterAgent] = None,
+                                fields: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict]:
+    """Compare a stored CV analysis with a stored job analysis and save the report
+
+    fields are stored alongside the report, e.g. the pre-score it was scheduled by.
+    Returns the document ID and the report.
+    """
+    cv_data, job_data = _load_pair(db, cv_id, job_id)
+    agent = agent or get_agent(SuitabilityReporterAgent)
+    report = agent.run(strip_internal_fields(cv_data), strip_internal_fields(job_data))
+    report.update(_source_fields(cv_id, job_id, cv_data, job_data))
+    report.update(fields or {})
+    return db.save_suitability_report(report), report
+
+
+def generate_cover_letter(db: JobAgentDB, cv_id: str, job_id: str, tone: str = "professional",
+                          agent: Optional[CoverLetterWriterAgent] = None) -> Tuple[str, Dict]:
+    """Write a cover letter for a stored CV analysis and job analysis and save it
+
+    Returns the document ID and the letter.
+    """
+    cv_data, job_data = _load_pair(db, cv_id, job_id)
+    agent = agent or get_agent(CoverLetterWriterAgent)
+    letter = agent.run(strip_internal_fields(cv_data), strip_internal_fields(job_data), tone)
+    letter.update(_source_fields(cv_id, job_id, cv_data, job_data))
+    letter["tone"] = tone
+    return db.save_cover_letter(letter), letter
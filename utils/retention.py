@@ -0,0 +1,147 @@
+"""Retention policies: expiring documents with a TTL, and archiving old ones to disk
+
+A policy applies to one collection and either deletes documents once they
+are older than its age (``ttl``) or moves them to gzip-compressed NDJSON
+files that restore_archive can load back (``archive``).
+"""
+import gzip
+import os
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional
+
+from bson import json_util
+from bson.json_util import CANONICAL_JSON_OPTIONS
+
+from utils.storage import INDEXES
+
+if TYPE_CHECKING:
+    from utils.mongodb import JobAgentDB
+
+RETENTION_MODES = ("ttl", "archive")
+DEFAULT_ARCHIVE_BATCH_SIZE = 1000
+
+# Canonical extended JSON so that IDs, dates and number types round-trip exactly
+_JSON_OPTIONS = CANONICAL_JSON_OPTIONS.with_options(tz_aware=False)
+
+
+class RetentionPolicy(NamedTuple):
+    mode: str
+    days: float
+
+
+def parse_retention(spec: str) -> Dict[str, RetentionPolicy]:
+    """Parse policies written as "collection=mode:days", comma separated
+
+    e.g. "job_searches=ttl:30,job_analyses=archive:180"
+    """
+    policies = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            collection, rule = entry.split("=", 1)
+            mode, days = rule.split(":", 1)
+            policy = RetentionPolicy(mode.strip().lower(), float(days))
+        except ValueError:
+            raise ValueError(f"Invalid retention policy {entry!r}, expected collection=mode:days")
+        collection = collection.strip()
+        if collection not in INDEXES:
+            raise ValueError(f"Unknown collection {collection!r} in retention policy {entry!r}")
+        if policy.mode not in RETENTION_MODES:
+            raise ValueError(f"Unknown retention mode {policy.mode!r} in {entry!r}")
+        policies[collection] = policy
+    return policies
+
+
+def archive_collection(db: "JobAgentDB", collection: str, cutoff: datetime, archive_dir: str,
+                       batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE) -> Dict[str, object]:
+    """Move documents created before cutoff to compressed NDJSON files
+
+    Each batch is written to its own part file and synced to disk before its
+    documents are deleted, so an interruption never loses documents; at worst
+    the next run archives a batch again. Returns the run directory and counts.
+    """
+    run_dir = os.path.join(archive_dir, collection, datetime.now().strftime("%Y%m%dT%H%M%S%f"))
+    archived = parts = 0
+    try:
+        while True:
+            docs = db.backend.find_created_before(collection, cutoff, batch_size)
+            if not docs:
+                break
+            parts += 1
+            os.makedirs(run_dir, exist_ok=True)
+            _write_part(os.path.join(run_dir, f"part-{parts:05d}.ndjson.gz"), docs)
+            archived += db.backend.delete_by_ids(collection, [str(doc["_id"]) for doc in docs])
+    finally:
+        db.invalidate(collection)
+    return {"collection": collection, "archived": archived, "path": run_dir if parts else None}
+
+
+def _write_part(path: str, docs: List[Dict]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as file:
+            for doc in docs:
+                file.write(json_util.dumps(doc, json_options=_JSON_OPTIONS).encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_archive(path: str) -> Iterator[Dict]:
+    """Read the documents in an archive part file, or in every part file under a directory"""
+    if os.path.isdir(path):
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                if name.endswith(".ndjson.gz"):
+                    yield from read_archive(os.path.join(root, name))
+        return
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json_util.loads(line, json_options=_JSON_OPTIONS)
+
+
+def restore_archive(db: "JobAgentDB", collection: str, path: str,
+                    batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE) -> Dict[str, int]:
+    """Load archived documents back into a collection, keeping their IDs
+
+    Documents that are stored already, or whose content hash has a newer
+    analysis, are skipped, so restoring the same archive twice is harmless.
+    """
+    restored = skipped = 0
+    batch: List[Dict] = []
+    try:
+        for doc in read_archive(path):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                inserted = db.backend.insert_many(collection, batch)
+                restored, skipped = restored + inserted, skipped + len(batch) - inserted
+                batch = []
+        inserted = db.backend.insert_many(collection, batch)
+        restored, skipped = restored + inserted, skipped + len(batch) - inserted
+    finally:
+        db.invalidate(collection)
+    return {"restored": restored, "skipped": skipped}
+
+
+def apply_ttl(db: "JobAgentDB", policies: Dict[str, RetentionPolicy], clear_others: bool = False):
+    """Set the TTL of every collection with a ttl policy
+
+    Other collections keep whatever TTL they have, since a process started
+    without the app's RETENTION must not drop it; clear_others removes them.
+    """
+    for collection in INDEXES:
+        policy = policies.get(collection)
+        if policy and policy.mode == "ttl":
+            db.backend.set_ttl(collection, int(policy.days * 86400))
+        elif clear_others:
+            db.backend.set_ttl(collection, None)
+
+
+def run_archival(db: "JobAgentDB", policies: Dict[str, RetentionPolicy], archive_dir: str,
+                 now: Optional[datetime] = None) -> List[Dict[str, object]]:
+    """Archive what every archive policy considers expired"""
+    now = now or datetime.now()
+    return [
+        archive_collection(db, collection, now - timedelta(days=policy.days), archive_dir)
+        for collection, policy in policies.items() if policy.mode == "archive"
+    ]
@@ -0,0 +1,276 @@
+"""Canonical skill IDs for the free-text skills in CV and job analyses
+
+The LLM names one skill many ways ("Postgres", "PostgreSQL", "postgresql 14"),
+so analyses are stored with the canonical IDs of their skills as well, which
+exact matching, grouping and the indexed "jobs requiring X" lookups use.
+Known skills are found with a trie of their aliases, word by word, so a
+skill string is canonicalized in one pass over its words however many
+aliases there are. A name only takes an alias's ID when its other words
+are versions, filler or other aliases, so "React Native" isn't React.
+Skills the taxonomy doesn't know get an ID made of their own words without
+version numbers, so they still group with each other.
+"""
+import functools
+import json
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.config import SKILL_ALIASES_FILE
+
+# Canonical skill ID -> the names it goes by, the first being its label. Matched
+# case-insensitively on whole words; SKILL_ALIASES_FILE can add to or extend these.
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "python": ["Python", "Python3", "CPython"],
+    "java": ["Java", "Java SE", "Java EE", "J2EE"],
+    "javascript": ["JavaScript", "JS", "ECMAScript", "Vanilla JS"],
+    "typescript": ["TypeScript", "TS"],
+    "c": ["C", "ANSI C"],
+    "c++": ["C++", "CPP"],
+    "c#": ["C#", "CSharp", "C Sharp"],
+    "go": ["Go", "Golang"],
+    "rust": ["Rust"],
+    "ruby": ["Ruby"],
+    "php": ["PHP"],
+    "kotlin": ["Kotlin"],
+    "swift": ["Swift"],
+    "scala": ["Scala"],
+    "r": ["R", "R programming", "RStudio"],
+    "matlab": ["MATLAB"],
+    "bash": ["Bash", "Shell scripting", "Shell", "Unix shell"],
+    "sql": ["SQL", "Structured Query Language"],
+    "postgresql": ["PostgreSQL", "Postgres", "PSQL", "PgSQL"],
+    "mysql": ["MySQL"],
+    "sqlite": ["SQLite"],
+    "sql-server": ["SQL Server", "MS SQL", "MSSQL", "Microsoft SQL Server", "T-SQL", "TSQL"],
+    "oracle-database": ["Oracle Database", "Oracle DB", "Oracle", "PL/SQL"],
+    "mongodb": ["MongoDB", "Mongo"],
+    "redis": ["Redis"],
+    "elasticsearch": ["Elasticsearch", "Elastic Search", "ELK", "OpenSearch"],
+    "cassandra": ["Cassandra", "Apache Cassandra"],
+    "dynamodb": ["DynamoDB", "Amazon DynamoDB"],
+    "snowflake": ["Snowflake"],
+    "bigquery": ["BigQuery", "Google BigQuery"],
+    "react": ["React", "ReactJS", "React.js"],
+    "angular": ["Angular", "AngularJS", "Angular.js"],
+    "vue": ["Vue", "Vue.js", "VueJS"],
+    "node.js": ["Node.js", "NodeJS", "Node"],
+    "django": ["Django"],
+    "flask": ["Flask"],
+    "fastapi": ["FastAPI"],
+    "spring": ["Spring", "Spring Boot", "SpringBoot", "Spring Framework"],
+    ".net": [".NET", "dotnet", ".NET Core", "ASP.NET"],
+    "html": ["HTML", "HTML5"],
+    "css": ["CSS", "CSS3"],
+    "graphql": ["GraphQL"],
+    "rest-api": ["REST APIs", "REST", "RESTful", "RESTful APIs", "REST API"],
+    "aws": ["AWS", "Amazon Web Services"],
+    "azure": ["Azure", "Microsoft Azure"],
+    "gcp": ["GCP", "Google Cloud", "Google Cloud Platform"],
+    "docker": ["Docker", "Containers", "Containerization"],
+    "kubernetes": ["Kubernetes", "K8s", "EKS", "GKE", "AKS"],
+    "terraform": ["Terraform"],
+    "ansible": ["Ansible"],
+    "linux": ["Linux", "Unix"],
+    "git": ["Git", "GitHub", "GitLab", "Bitbucket"],
+    "ci-cd": ["CI/CD", "CICD", "Continuous Integration", "Continuous Delivery",
+              "Continuous Deployment", "Jenkins", "GitHub Actions", "GitLab CI"],
+    "kafka": ["Kafka", "Apache Kafka"],
+    "spark": ["Spark", "Apache Spark", "PySpark"],
+    "hadoop": ["Hadoop", "Apache Hadoop", "HDFS"],
+    "airflow": ["Airflow", "Apache Airflow"],
+    "dbt": ["dbt", "data build tool"],
+    "etl": ["ETL", "ELT", "Data pipelines", "Data pipeline"],
+    "pandas": ["pandas"],
+    "numpy": ["NumPy"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "tensorflow": ["TensorFlow"],
+    "pytorch": ["PyTorch", "Torch"],
+    "machine-learning": ["Machine Learning", "ML"],
+    "deep-learning": ["Deep Learning", "DL", "Neural Networks"],
+    "nlp": ["NLP", "Natural Language Processing"],
+    "computer-vision": ["Computer Vision", "CV"],
+    "llm": ["LLMs", "LLM", "Large Language Models", "Generative AI", "GenAI"],
+    "data-analysis": ["Data Analysis", "Data Analytics", "Analytics"],
+    "statistics": ["Statistics", "Statistical analysis", "Statistical modeling"],
+    "tableau": ["Tableau"],
+    "power-bi": ["Power BI", "PowerBI"],
+    "excel": ["Excel", "Microsoft Excel", "MS Excel"],
+    "figma": ["Figma"],
+    "jira": ["Jira", "Atlassian Jira"],
+    "agile": ["Agile", "Agile methodologies", "Agile methodology", "Scrum", "Kanban"],
+    "microservices": ["Microservices", "Microservice architecture"],
+    "communication": ["Communication", "Communication skills", "Verbal communication",
+                      "Written communication"],
+    "teamwork": ["Teamwork", "Collaboration", "Team player"],
+    "leadership": ["Leadership", "Team leadership", "People management"],
+    "problem-solving": ["Problem solving", "Problem-solving", "Analytical thinking",
+                       "Critical thinking"],
+    "project-management": ["Project management"],
+    "time-management": ["Time management"],
+}
+
+# Canonical skill ID fields stored with each collection's analyses, and the skill list each
+# is built from
+SKILL_ID_FIELDS: Dict[str, Dict[str, str]] = {
+    "cv_analyses": {"skill_ids": "skills.technical"},
+    "job_analyses": {
+        "required_skill_ids": "required_skills.technical",
+        "nice_to_have_skill_ids": "nice_to_have_skills",
+    },
+}
+
+# Skill strings whose canonical IDs are remembered
+CACHE_SIZE = 10_000
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+# Version numbers and similar suffixes, e.g. "14", "3.11", "v2", "2.x"
+_VERSION = re.compile(r"^v?\d+(?:\.\d+)*(?:\.x|\+)?$")
+# A version written onto the name, as in "C++17" or "Angular2"
+_GLUED_VERSION = re.compile(r"(?<=[a-z+#])\d+(?:\.\d+)*$")
+# Words that can surround an alias without naming a different skill, as in "Experience with
+# PostgreSQL" or "Strong Python skills"
+_FILLER = frozenset({
+    "experience", "experienced", "with", "in", "of", "and", "or", "the", "using", "knowledge",
+    "proficiency", "proficient", "strong", "solid", "good", "advanced", "basic", "working",
+    "familiarity", "hands", "on", "skills", "skill",
+})
+# Marks the trie node where an alias ends; never a word itself
+_END = ""
+
+
+def _words(text: str) -> List[str]:
+    # ".NET" and "dotnet" both need a word to match on, so a leading dot is kept
+    words = _WORD.findall(text.casefold())
+    if text.lstrip().startswith(".") and words:
+        words[0] = "." + words[0]
+    return words
+
+
+class SkillTaxonomy:
+    """Maps free-text skill names to canonical skill IDs with a trie of aliases"""
+
+    def __init__(self, aliases: Optional[Dict[str, List[str]]] = None):
+        aliases = SKILL_ALIASES if aliases is None else aliases
+        self.labels = {skill_id: names[0] if names else skill_id
+                       for skill_id, names in aliases.items()}
+        self._trie: Dict[str, Any] = {}
+        for skill_id, names in aliases.items():
+            for name in [skill_id, *names]:
+                words = _words(name)
+                if words:
+                    self._add(words, skill_id)
+        # Analyses repeat the same few thousand skill strings
+        self.canonicalize = functools.lru_cache(maxsize=CACHE_SIZE)(self._canonicalize)
+
+    def _add(self, words: List[str], skill_id: str):
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node[_END] = skill_id
+
+    def _unversioned(self, word: str) -> str:
+        if word in self._trie:
+            return word
+        bare = _GLUED_VERSION.sub("", word)
+        return bare if bare in self._trie else word
+
+    def _longest_match(self, words: List[str], start: int) -> Tuple[Optional[str], int]:
+        """Find the longest alias starting at words[start], as (skill ID, words matched)"""
+        node, found, length = self._trie, None, 0
+        for offset, word in enumerate(words[start:], 1):
+            node = node.get(word)
+            if node is None:
+                break
+            if _END in node:
+                found, length = node[_END], offset
+        return found, length
+
+    def _canonicalize(self, skill: str) -> Optional[str]:
+        """Get the canonical ID of a skill name, or None if it has no words
+
+        A name is only an alias's skill when all its other words are versions,
+        filler or aliases too, as in "Kubernetes (EKS)"; "React Native" is a
+        skill of its own. The first alias found wins, longest first where
+        several start at the same word.
+        """
+        words = [self._unversioned(word) for word in _words(skill) if not _VERSION.match(word)]
+        if not words:
+            return None
+        found, start = None, 0
+        while start < len(words):
+            skill_id, length = self._longest_match(words, start)
+            if not skill_id:
+                if words[start] not in _FILLER:
+                    return "-".join(words)
+                start += 1
+                continue
+            # A one or two letter alias inside a longer name is usually something else,
+            # e.g. the "R" of "R&D" or the "CV" of "CV screening"
+            if found is None and (length == len(words)
+                                  or len(" ".join(words[start:start + length])) > 2):
+                found = skill_id
+            start += length
+        return found or "-".join(words)
+
+    def canonicalize_all(self, skills: Iterable[Any]) -> List[str]:
+        """Get the distinct canonical IDs of a list of skill names, in order of appearance"""
+        ids = []
+        for skill in skills:
+            skill_id = self.canonicalize(skill) if isinstance(skill, str) else None
+            if skill_id and skill_id not in ids:
+                ids.append(skill_id)
+        return ids
+
+    def label(self, skill_id: str) -> str:
+        """Get the display name of a canonical skill ID"""
+        return self.labels.get(skill_id, skill_id)
+
+
+def _get_path(doc: Dict[str, Any], field: str) -> Any:
+    for part in field.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def with_skill_ids(collection: str, doc: Dict[str, Any],
+                   taxonomy: Optional["SkillTaxonomy"] = None) -> Dict[str, Any]:
+    """Return a copy of an analysis with the SKILL_ID_FIELDS of its collection filled in
+
+    Documents of other collections are returned as they are.
+    """
+    fields = SKILL_ID_FIELDS.get(collection)
+    if not fields:
+        return doc
+    taxonomy = taxonomy or get_skill_taxonomy()
+    doc = dict(doc)
+    for target, source in fields.items():
+        skills = _get_path(doc, source)
+        doc[target] = taxonomy.canonicalize_all(skills if isinstance(skills, list) else [])
+    return doc
+
+
+def load_aliases(path: str = SKILL_ALIASES_FILE) -> Dict[str, List[str]]:
+    """Get the built-in aliases, extended with those of a JSON file of {skill ID: [names]}"""
+    aliases = {skill_id: list(names) for skill_id, names in SKILL_ALIASES.items()}
+    if path:
+        with open(path, encoding="utf-8") as file:
+            for skill_id, names in json.load(file).items():
+                aliases.setdefault(skill_id, []).extend(names)
+    return aliases
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Get the process-wide taxonomy, built on first use"""
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = SkillTaxonomy(load_aliases())
+    return _taxonomy
@@ -0,0 +1,7 @@
+from typing import List
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Get the value at a fraction (0 to 1) of the sorted values, by nearest rank"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
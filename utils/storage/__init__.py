@@ -0,0 +1,16 @@
+from utils.config import SQLITE_PATH, STORAGE_BACKEND
+from utils.storage.base import INDEXES, StorageBackend
+
+__all__ = ["INDEXES", "StorageBackend", "create_backend"]
+
+
+def create_backend(kind: str = STORAGE_BACKEND) -> StorageBackend:
+    """Create the storage backend named by STORAGE_BACKEND ("mongodb" or "sqlite")"""
+    # Imported here so that only the chosen backend's driver is loaded
+    if kind == "mongodb":
+        from utils.storage.mongo import MongoBackend
+        return MongoBackend()
+    if kind == "sqlite":
+        from utils.storage.sqlite import SQLiteBackend
+        return SQLiteBackend(SQLITE_PATH)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {kind!r} (expected 'mongodb' or 'sqlite')")
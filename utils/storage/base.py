@@ -0,0 +1,210 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Listings sort newest first with _id breaking ties between equal timestamps
+_CREATED_AT = ([("created_at", -1), ("_id", -1)], {})
+# Partial so that documents saved before hashing was introduced don't collide
+_CONTENT_HASH = ([("content_hash", 1)], {
+    "unique": True,
+    "partialFilterExpression": {"content_hash": {"$exists": True}}
+})
+
+# Indexes created at startup, as (keys, options) pairs per collection
+INDEXES = {
+    "cv_analyses": [_CREATED_AT, _CONTENT_HASH, ([("skill_ids", 1)], {})],
+    "job_searches": [_CREATED_AT],
+    "job_analyses": [
+        _CREATED_AT, _CONTENT_HASH, ([("job_url", 1)], {}), ([("required_skill_ids", 1)], {})
+    ],
+    "suitability_reports": [
+        _CREATED_AT,
+        ([("cv_id", 1), ("job_id", 1)], {}),
+        ([("job_id", 1)], {}),
+    ],
+    "cover_letters": [
+        _CREATED_AT,
+        ([("cv_id", 1), ("job_id", 1)], {}),
+        ([("job_id", 1)], {}),
+    ],
+    # Background task state, looked up by dedup key and status (see utils.tasks)
+    "tasks": [_CREATED_AT, ([("task_key", 1), ("status", 1)], {}), ([("status", 1)], {})],
+}
+
+# Indexed fields holding arrays, which MongoDB indexes per element (see utils.skills)
+ARRAY_FIELDS = {"skill_ids", "required_skill_ids"}
+
+# Keyword filters for StorageBackend.page: field path -> case-insensitive substring
+TextFilters = Dict[str, Optional[str]]
+ScoreRange = Tuple[Optional[float], Optional[float]]
+
+# Time windows StorageBackend.count_by_period can group creation times by
+PERIODS = ("day", "week", "month")
+
+
+class StorageBackend:
+    """Document store behind JobAgentDB
+
+    Documents are dicts keyed by ``_id`` with a ``created_at`` datetime, kept in
+    the collections named in INDEXES. Listings are newest first with ``_id``
+    breaking ties, and returned documents carry ``_id`` as an ObjectId.
+    Field paths use dots for nested fields, e.g. ``personal_info.name``.
+    """
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Create any missing indexes, returning the index names per collection"""
+        raise NotImplementedError
+
+    def insert(self, collection: str, doc: Dict[str, Any]) -> str:
+        """Insert a document, returning its ID"""
+        raise NotImplementedError
+
+    def upsert_by_hash(self, collection: str, doc: Dict[str, Any]) -> str:
+        """Insert a document, or replace the one with the same content_hash, keeping its ID"""
+        raise NotImplementedError
+
+    def bulk_save(self, collection: str,
+                  docs: List[Dict[str, Any]]) -> List[Dict[str, Optional[str]]]:
+        """Save documents in one round trip, upserting the ones with a content_hash
+
+        An upsert replaces the stored document with the same hash, as upsert_by_hash does.
+        Returns one {"id", "error"} entry per document, in input order; a failed
+        document doesn't stop the rest.
+        """
+        raise NotImplementedError
+
+    def update(self, collection: str, doc_id: str, fields: Dict[str, Any]) -> bool:
+        """Set top-level fields of a document, as $set does, returning whether it exists"""
+        raise NotImplementedError
+
+    def find_by_id(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Get a document by ID"""
+        raise NotImplementedError
+
+    def find(self, collection: str, filters: Optional[Dict[str, Any]] = None,
+             fields: Optional[List[str]] = None, limit: Optional[int] = None,
+             exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get documents whose fields equal the given filters, newest first
+
+        With fields, documents only carry ``_id`` and those fields; with
+        exclude, they carry every field but those top-level ones.
+        """
+        raise NotImplementedError
+
+    def find_containing(self, collection: str, field: str, values: List[Any],
+                        fields: Optional[List[str]] = None, limit: Optional[int] = None
+                        ) -> List[Dict[str, Any]]:
+        """Get documents whose array field holds every one of values, newest first
+
+        With fields, documents only carry ``_id`` and those fields.
+        """
+        raise NotImplementedError
+
+    def find_one(self, collection: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the newest document matching the filters"""
+        docs = self.find(collection, filters, limit=1)
+        return docs[0] if docs else None
+
+    def find_hashes(self, collection: str, hashes: Iterable[str]) -> Set[str]:
+        """Get which of the given content hashes are stored in a collection"""
+        raise NotImplementedError
+
+    def page(self, collection: str, fields: List[str], cursor: Optional[str], page_size: int,
+             text_filters: Optional[TextFilters] = None,
+             score_range: ScoreRange = (None, None)) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of projected documents, continuing after the given cursor
+
+        text_filters maps field paths to case-insensitive substrings they must
+        contain and score_range bounds overall_match_score. Returns the page and
+        the cursor for the next page, or None on the last page.
+        """
+        raise NotImplementedError
+
+    def count(self, collection: str, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Count the documents whose fields equal the given filters"""
+        raise NotImplementedError
+
+    # Retention
+
+    def set_ttl(self, collection: str, seconds: Optional[int]):
+        """Expire documents seconds after their created_at, or stop expiring them with None"""
+        raise NotImplementedError
+
+    def find_created_before(self, collection: str, cutoff: datetime,
+                            limit: int) -> List[Dict[str, Any]]:
+        """Get up to limit documents created before cutoff, oldest first"""
+        raise NotImplementedError
+
+    def delete_by_ids(self, collection: str, doc_ids: List[str]) -> int:
+        """Delete documents by ID, returning how many were deleted"""
+        raise NotImplementedError
+
+    def insert_many(self, collection: str, docs: List[Dict[str, Any]]) -> int:
+        """Insert documents as they are, IDs included, skipping any that clash with a stored one
+
+        Returns how many were inserted.
+        """
+        raise NotImplementedError
+
+    # Analytics: each reduces a collection where it's stored and only returns the aggregates.
+    # filters are equality filters as in find, and since keeps documents created at or after it.
+
+    def top_values(self, collection: str, field: str, limit: int = 10,
+                   filters: Optional[Dict[str, Any]] = None,
+                   since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Get the most frequent string values of a field, counting each array element
+
+        Values are grouped case-insensitively. Returns [{"value", "count"}],
+        most frequent first.
+        """
+        raise NotImplementedError
+
+    def histogram(self, collection: str, field: str, boundaries: List[float],
+                  filters: Optional[Dict[str, Any]] = None,
+                  since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Count the numeric values of a field in each [boundaries[i], boundaries[i + 1]) bucket
+
+        Returns [{"min", "max", "count"}] for every bucket, including empty ones.
+        """
+        raise NotImplementedError
+
+    def group_stats(self, collection: str, group_field: str, value_field: str,
+                    filters: Optional[Dict[str, Any]] = None,
+                    since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Count documents per value of group_field, with stats of a numeric value_field
+
+        Returns [{"key", "count", "avg", "min", "max"}], largest groups first.
+        The stats skip documents whose value isn't a number.
+        """
+        raise NotImplementedError
+
+    def count_by_period(self, collection: str, period: str,
+                        filters: Optional[Dict[str, Any]] = None,
+                        since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Count documents per day, week (starting Monday) or month of their creation
+
+        Returns [{"period", "count"}] in time order, where period is the first
+        day ("YYYY-MM-DD") or the month ("YYYY-MM"); empty periods are left out.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+def fill_histogram(boundaries: List[float], counts: Dict[int, int]) -> List[Dict[str, Any]]:
+    """Build histogram buckets from counts keyed by bucket index"""
+    return [
+        {"min": low, "max": high, "count": counts.get(index, 0)}
+        for index, (low, high) in enumerate(zip(boundaries, boundaries[1:]))
+    ]
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Build an opaque pagination cursor pointing after the given document"""
+    return f"{doc['created_at'].isoformat()}|{doc['_id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Split a pagination cursor into its creation time and document ID"""
+    created_at, doc_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(created_at), doc_id
@@ -0,0 +1,321 @@
+import os
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.storage.base import (
+    INDEXES, PERIODS, ScoreRange, StorageBackend, TextFilters, decode_cursor, encode_cursor,
+    fill_histogram
+)
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
+    from pymongo.collection import Collection
+    from pymongo.database import Database
+
+_NEWEST_FIRST = [("created_at", -1), ("_id", -1)]
+
+# Day of the week as 0 for Monday through 6 for Sunday ($dayOfWeek counts from Sunday = 1)
+_DAYS_SINCE_MONDAY = {"$mod": [{"$add": [{"$dayOfWeek": "$created_at"}, 5]}, 7]}
+_PERIOD_KEYS = {
+    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+    "week": {"$dateToString": {"format": "%Y-%m-%d", "date": {
+        "$subtract": ["$created_at", {"$multiply": [_DAYS_SINCE_MONDAY, 24 * 60 * 60 * 1000]}]
+    }}},
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}},
+}
+
+
+def _match(filters: Optional[Dict[str, Any]], since: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Build the $match stage that starts every analytics pipeline"""
+    query = dict(filters or {})
+    if since is not None:
+        query["created_at"] = {"$gte": since}
+    return [{"$match": query}] if query else []
+
+
+def _numeric(field: str) -> Dict[str, Any]:
+    # $avg, $min and $max skip nulls, so non-numbers are left out of the stats
+    return {"$cond": [{"$isNumber": f"${field}"}, f"${field}", None]}
+
+
+class MongoDB:
+    def __init__(self, client: Optional["MongoClient"] = None):
+        self.client: Optional["MongoClient"] = client
+        self.db: Optional["Database"] = None
+        self._connect()
+
+    def _connect(self):
+        """Connect to MongoDB using connection string from environment"""
+        if self.client is None:
+            mongodb_uri = os.getenv("MONGODB_URI")
+            if not mongodb_uri:
+                raise ValueError("MONGODB_URI not found in environment variables")
+
+            from pymongo import MongoClient
+            self.client = MongoClient(mongodb_uri)
+        # Extract database name from URI or use default
+        db_name = os.getenv("MONGODB_DATABASE", "job_agent")
+        self.db = self.client[db_name]
+
+    def get_collection(self, collection_name: str) -> "Collection":
+        """Get a collection from the database"""
+        if self.db is None:
+            raise RuntimeError("Database connection not initialized")
+        return self.db[collection_name]
+
+    def close(self):
+        """Close the MongoDB connection"""
+        if self.client is not None:
+            self.client.close()
+
+
+class MongoBackend(StorageBackend):
+    """Stores documents in MongoDB collections"""
+
+    def __init__(self, mongo: Optional[MongoDB] = None):
+        self.mongo = mongo or MongoDB()
+
+    def collection(self, name: str) -> "Collection":
+        return self.mongo.get_collection(name)
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Create any missing indexes from INDEXES, returning the index names per collection
+
+        Safe to call repeatedly: creating an index that already exists with the
+        same keys and options is a no-op on the server.
+        """
+        created = {}
+        for collection_name, indexes in INDEXES.items():
+            collection = self.collection(collection_name)
+            # One call per index, since create_indexes loses partialFilterExpression on mongomock
+            created[collection_name] = [
+                collection.create_index(keys, **options) for keys, options in indexes
+            ]
+        return created
+
+    def insert(self, collection: str, doc: Dict[str, Any]) -> str:
+        return str(self.collection(collection).insert_one(doc).inserted_id)
+
+    def upsert_by_hash(self, collection: str, doc: Dict[str, Any]) -> str:
+        from pymongo import ReturnDocument
+        # Replaced as a whole, so fields the new version no longer has don't linger
+        saved = self.collection(collection).find_one_and_replace(
+            {"content_hash": doc["content_hash"]},
+            {k: v for k, v in doc.items() if k != "_id"},
+            upsert=True,
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return str(saved["_id"])
+
+    def bulk_save(self, collection: str,
+                  docs: List[Dict[str, Any]]) -> List[Dict[str, Optional[str]]]:
+        """Save documents with one unordered bulk write"""
+        from bson import ObjectId
+        from pymongo import InsertOne, ReplaceOne
+        from pymongo.errors import BulkWriteError
+
+        coll = self.collection(collection)
+        ops, ids, hashes = [], [], []
+        for doc in docs:
+            doc = dict(doc)
+            if doc.get("content_hash"):
+                doc.pop("_id", None)
+                ops.append(ReplaceOne({"content_hash": doc["content_hash"]}, doc, upsert=True))
+                ids.append(None)
+                hashes.append(doc["content_hash"])
+            else:
+                doc.setdefault("_id", ObjectId())
+                ops.append(InsertOne(doc))
+                ids.append(str(doc["_id"]))
+                hashes.append(None)
+        if not ops:
+            return []
+
+        errors = {}
+        try:
+            coll.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            errors = {err["index"]: err.get("errmsg", "write failed")
+                      for err in e.details.get("writeErrors", [])}
+
+        # Upserts don't report the IDs of documents that already existed, so look them up
+        upserted = [h for i, h in enumerate(hashes) if h and i not in errors]
+        if upserted:
+            found = {
+                doc["content_hash"]: str(doc["_id"])
+                for doc in coll.find({"content_hash": {"$in": upserted}}, {"content_hash": 1})
+            }
+            ids = [found.get(h) if h else doc_id for doc_id, h in zip(ids, hashes)]
+
+        return [
+            {"id": None, "error": errors[index]} if index in errors
+            else {"id": doc_id, "error": None}
+            for index, doc_id in enumerate(ids)
+        ]
+
+    def update(self, collection: str, doc_id: str, fields: Dict[str, Any]) -> bool:
+        from bson import ObjectId
+        result = self.collection(collection).update_one({"_id": ObjectId(doc_id)}, {"$set": fields})
+        return result.matched_count > 0
+
+    def find_by_id(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        from bson import ObjectId
+        return self.collection(collection).find_one({"_id": ObjectId(doc_id)})
+
+    def find(self, collection: str, filters: Optional[Dict[str, Any]] = None,
+             fields: Optional[List[str]] = None, limit: Optional[int] = None,
+             exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        if fields:
+            projection = {field: 1 for field in fields}
+        else:
+            projection = {field: 0 for field in exclude} if exclude else None
+        # MongoDB stores dates with millisecond precision, so break ties on insertion order
+        cursor = self.collection(collection).find(filters or {}, projection).sort(_NEWEST_FIRST)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+    def find_containing(self, collection: str, field: str, values: List[Any],
+                        fields: Optional[List[str]] = None, limit: Optional[int] = None
+                        ) -> List[Dict[str, Any]]:
+        # Served by the multikey index, which has an entry per array element
+        return self.find(collection, {field: {"$all": list(values)}}, fields, limit)
+
+    def find_hashes(self, collection: str, hashes: Iterable[str]) -> Set[str]:
+        cursor = self.collection(collection).find(
+            {"content_hash": {"$in": list(hashes)}},
+            {"content_hash": 1, "_id": 0}
+        )
+        return {doc["content_hash"] for doc in cursor}
+
+    def page(self, collection: str, fields: List[str], cursor: Optional[str], page_size: int,
+             text_filters: Optional[TextFilters] = None,
+             score_range: ScoreRange = (None, None)) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        from bson import ObjectId
+        conditions = []
+        for field, value in (text_filters or {}).items():
+            if value:
+                conditions.append({field: {"$regex": re.escape(value), "$options": "i"}})
+        min_score, max_score = score_range
+        if min_score is not None or max_score is not None:
+            score = {}
+            if min_score is not None:
+                score["$gte"] = min_score
+            if max_score is not None:
+                score["$lte"] = max_score
+            conditions.append({"overall_match_score": score})
+        if cursor:
+            # Keyset pagination: strictly after the last (created_at, _id) already shown
+            created_at, last_id = decode_cursor(cursor)
+            conditions.append({"$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": ObjectId(last_id)}},
+            ]})
+        query = {"$and": conditions} if conditions else {}
+
+        projection = {field: 1 for field in fields}
+        docs = list(
+            self.collection(collection).find(query, projection)
+            .sort(_NEWEST_FIRST)
+            .limit(page_size + 1)
+        )
+        next_cursor = encode_cursor(docs[page_size - 1]) if len(docs) > page_size else None
+        return docs[:page_size], next_cursor
+
+    def count(self, collection: str, filters: Optional[Dict[str, Any]] = None) -> int:
+        return self.collection(collection).count_documents(filters or {})
+
+    def set_ttl(self, collection: str, seconds: Optional[int]):
+        coll = self.collection(collection)
+        existing = coll.index_information().get("created_at_1")
+        if seconds is None:
+            if existing:
+                coll.drop_index("created_at_1")
+        elif existing is None:
+            # The server's TTL monitor deletes expired documents about once a minute
+            coll.create_index([("created_at", 1)], expireAfterSeconds=seconds)
+        elif existing.get("expireAfterSeconds") != seconds:
+            self.mongo.db.command("collMod", collection, index={
+                "keyPattern": {"created_at": 1}, "expireAfterSeconds": seconds
+            })
+
+    def find_created_before(self, collection: str, cutoff: datetime,
+                            limit: int) -> List[Dict[str, Any]]:
+        cursor = self.collection(collection).find({"created_at": {"$lt": cutoff}})
+        return list(cursor.sort([("created_at", 1), ("_id", 1)]).limit(limit))
+
+    def delete_by_ids(self, collection: str, doc_ids: List[str]) -> int:
+        from bson import ObjectId
+        result = self.collection(collection).delete_many(
+            {"_id": {"$in": [ObjectId(doc_id) for doc_id in doc_ids]}}
+        )
+        return result.deleted_count
+
+    def insert_many(self, collection: str, docs: List[Dict[str, Any]]) -> int:
+        from pymongo.errors import BulkWriteError
+        if not docs:
+            return 0
+        try:
+            return len(self.collection(collection).insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # Duplicate IDs or content hashes mean the document is already stored
+            return e.details["nInserted"]
+
+    def top_values(self, collection: str, field: str, limit: int = 10,
+                   filters: Optional[Dict[str, Any]] = None,
+                   since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        pipeline = _match(filters, since) + [
+            {"$unwind": f"${field}"},
+            {"$match": {field: {"$type": "string"}}},
+            {"$group": {"_id": {"$toLower": f"${field}"}, "count": {"$sum": 1},
+                        "value": {"$min": f"${field}"}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": limit},
+        ]
+        return [{"value": doc["value"], "count": doc["count"]}
+                for doc in self.collection(collection).aggregate(pipeline)]
+
+    def histogram(self, collection: str, field: str, boundaries: List[float],
+                  filters: Optional[Dict[str, Any]] = None,
+                  since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        pipeline = _match(filters, since) + [
+            {"$match": {field: {"$type": "number"}}},
+            {"$bucket": {"groupBy": f"${field}", "boundaries": boundaries,
+                         "default": "other", "output": {"count": {"$sum": 1}}}},
+        ]
+        counts = {
+            boundaries.index(doc["_id"]): doc["count"]
+            for doc in self.collection(collection).aggregate(pipeline) if doc["_id"] != "other"
+        }
+        return fill_histogram(boundaries, counts)
+
+    def group_stats(self, collection: str, group_field: str, value_field: str,
+                    filters: Optional[Dict[str, Any]] = None,
+                    since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        pipeline = _match(filters, since) + [
+            {"$group": {"_id": f"${group_field}", "count": {"$sum": 1},
+                        "avg": {"$avg": _numeric(value_field)},
+                        "min": {"$min": _numeric(value_field)},
+                        "max": {"$max": _numeric(value_field)}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+        return [{"key": doc["_id"], "count": doc["count"], "avg": doc["avg"],
+                 "min": doc["min"], "max": doc["max"]}
+                for doc in self.collection(collection).aggregate(pipeline)]
+
+    def count_by_period(self, collection: str, period: str,
+                        filters: Optional[Dict[str, Any]] = None,
+                        since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period!r} (expected one of {PERIODS})")
+        pipeline = _match(filters, since) + [
+            {"$group": {"_id": _PERIOD_KEYS[period], "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+        ]
+        return [{"period": doc["_id"], "count": doc["count"]}
+                for doc in self.collection(collection).aggregate(pipeline)]
+
+    def close(self):
+        self.mongo.close()
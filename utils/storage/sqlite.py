@@ -0,0 +1,454 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId, json_util
+from bson.json_util import JSONMode, JSONOptions
+
+from utils.storage.base import (
+    ARRAY_FIELDS, INDEXES, PERIODS, ScoreRange, StorageBackend, TextFilters, decode_cursor,
+    encode_cursor, fill_histogram
+)
+
+# Relaxed extended JSON keeps plain numbers and strings queryable with json_extract,
+# while dates and ObjectIds inside documents still round-trip
+_JSON_OPTIONS = JSONOptions(json_mode=JSONMode.RELAXED, tz_aware=False)
+_FIELD_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+# How often a collection with a TTL is checked for expired documents, as MongoDB's TTL monitor does
+TTL_PURGE_INTERVAL_SECONDS = 60
+# Kept in their own columns rather than in the JSON document
+_COLUMNS = {"_id": "id", "created_at": "created_at", "content_hash": "content_hash"}
+_PERIOD_KEYS = {
+    "day": "substr(created_at, 1, 10)",
+    # Forward to the week's Sunday (or stay on it), then back to its Monday
+    "week": "date(created_at, 'weekday 0', '-6 days')",
+    "month": "substr(created_at, 1, 7)",
+}
+
+
+def _path(field: str) -> str:
+    """Get the quoted JSON path of a document field"""
+    if not _FIELD_PATH.match(field):
+        raise ValueError(f"Invalid field path: {field!r}")
+    return f"'$.{field}'"
+
+
+def _json_path(field: str) -> str:
+    """Get the SQL expression for a document field, identical wherever it's indexed or queried"""
+    if field in _COLUMNS:
+        return _COLUMNS[field]
+    return f"json_extract(doc, {_path(field)})"
+
+
+def _timestamp(value: datetime) -> str:
+    # Fixed width so that text order matches time order
+    return value.isoformat(timespec="microseconds")
+
+
+def _is_number(field: str) -> str:
+    return f"json_type(doc, {_path(field)}) IN ('integer', 'real')"
+
+
+def _casefold(value: Any) -> Any:
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _set_path(doc: Dict[str, Any], field: str, value: Any):
+    *parents, leaf = field.split(".")
+    for parent in parents:
+        doc = doc.setdefault(parent, {})
+    doc[leaf] = value
+
+
+class SQLiteBackend(StorageBackend):
+    """Stores documents as JSON in a local SQLite file, one table per collection
+
+    Each table keeps the ID, creation time and content hash in columns and the
+    rest of the document as extended JSON; lookup fields get expression indexes
+    on json_extract. A single connection is shared behind a lock, so one
+    instance can serve every Streamlit session of a small deployment.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.create_function("casefold", 1, _casefold, deterministic=True)
+        if path != ":memory:":
+            # Readers don't block the writer
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.RLock()
+        # collection -> (TTL in seconds, monotonic time of the next purge)
+        self._ttls: Dict[str, Tuple[int, float]] = {}
+
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        created = {}
+        with self._lock:
+            for collection, indexes in INDEXES.items():
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {collection} ("
+                    "id TEXT PRIMARY KEY, created_at TEXT NOT NULL, "
+                    "content_hash TEXT UNIQUE, doc TEXT NOT NULL)"
+                )
+                for keys, options in indexes:
+                    fields = [field for field, _ in keys]
+                    if fields == ["content_hash"]:
+                        # Enforced by the column's UNIQUE constraint, which allows many NULLs
+                        continue
+                    if ARRAY_FIELDS.intersection(fields):
+                        # An expression index would only cover the array as a whole
+                        continue
+                    name = f"{collection}_{'_'.join(fields)}".replace(".", "_")
+                    direction = " DESC" if keys[0][1] == -1 else ""
+                    columns = ", ".join(f"{_json_path(field)}{direction}" for field in fields)
+                    unique = "UNIQUE " if options.get("unique") else ""
+                    self._conn.execute(
+                        f"CREATE {unique}INDEX IF NOT EXISTS {name} ON {collection} ({columns})"
+                    )
+                created[collection] = [row[0] for row in self._conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                    "ORDER BY name", (collection,)
+                )]
+        return created
+
+    def _dump(self, doc: Dict[str, Any]) -> Tuple[str, str, Optional[str], str]:
+        """Split a document into its (id, created_at, content_hash, JSON) row values"""
+        body = {k: v for k, v in doc.items() if k not in ("_id", "created_at")}
+        doc_id = str(doc.get("_id") or ObjectId())
+        return (doc_id, _timestamp(doc["created_at"]), doc.get("content_hash") or None,
+                json_util.dumps(body, json_options=_JSON_OPTIONS))
+
+    def _load(self, row: Tuple) -> Dict[str, Any]:
+        doc_id, created_at, body = row
+        return {"_id": ObjectId(doc_id), "created_at": datetime.fromisoformat(created_at),
+                **json_util.loads(body, json_options=_JSON_OPTIONS)}
+
+    def _load_projected(self, row: Tuple, fields: List[str]) -> Dict[str, Any]:
+        doc_id, created_at, values = row
+        doc = {"_id": ObjectId(doc_id), "created_at": datetime.fromisoformat(created_at)}
+        body_fields = [field for field in fields if field not in _COLUMNS]
+        for field, value in zip(body_fields, json_util.loads(values, json_options=_JSON_OPTIONS)):
+            # Match MongoDB projections, which leave missing fields out
+            if value is not None:
+                _set_path(doc, field, value)
+        return doc
+
+    def _select_projected(self, fields: List[str]) -> str:
+        values = ", ".join(_json_path(field) for field in fields if field not in _COLUMNS)
+        return f"id, created_at, json_array({values})"
+
+    def _upsert(self, collection: str, doc: Dict[str, Any]) -> str:
+        row = self._conn.execute(
+            f"SELECT id, created_at, doc FROM {collection} WHERE content_hash = ?",
+            (doc["content_hash"],)
+        ).fetchone()
+        if row is None:
+            return self._insert(collection, doc)
+        # Replaced as a whole under the stored ID, as MongoDB's replace does
+        replacement = {**doc, "_id": row[0]}
+        doc_id, created_at, _, body = self._dump(replacement)
+        self._conn.execute(
+            f"UPDATE {collection} SET created_at = ?, doc = ? WHERE id = ?",
+            (created_at, body, doc_id)
+        )
+        return doc_id
+
+    def _purge_expired(self, collection: str, force: bool = False):
+        """Delete documents past the collection's TTL, at most once per purge interval"""
+        if collection not in self._ttls:
+            return
+        seconds, next_purge = self._ttls[collection]
+        now = time.monotonic()
+        if not force and now < next_purge:
+            return
+        self._ttls[collection] = (seconds, now + TTL_PURGE_INTERVAL_SECONDS)
+        cutoff = _timestamp(datetime.now() - timedelta(seconds=seconds))
+        self._conn.execute(f"DELETE FROM {collection} WHERE created_at < ?", (cutoff,))
+
+    def _insert(self, collection: str, doc: Dict[str, Any]) -> str:
+        self._purge_expired(collection)
+        values = self._dump(doc)
+        self._conn.execute(
+            f"INSERT INTO {collection} (id, created_at, content_hash, doc) VALUES (?, ?, ?, ?)",
+            values
+        )
+        return values[0]
+
+    def insert(self, collection: str, doc: Dict[str, Any]) -> str:
+        with self._lock:
+            return self._insert(collection, doc)
+
+    def upsert_by_hash(self, collection: str, doc: Dict[str, Any]) -> str:
+        with self._lock, self._transaction():
+            return self._upsert(collection, doc)
+
+    def bulk_save(self, collection: str,
+                  docs: List[Dict[str, Any]]) -> List[Dict[str, Optional[str]]]:
+        """Save documents in a single transaction"""
+        results = []
+        with self._lock, self._transaction():
+            for doc in docs:
+                try:
+                    if doc.get("content_hash"):
+                        doc_id = self._upsert(collection, doc)
+                    else:
+                        doc_id = self._insert(collection, doc)
+                    results.append({"id": doc_id, "error": None})
+                except sqlite3.IntegrityError as e:
+                    results.append({"id": None, "error": str(e)})
+        return results
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def update(self, collection: str, doc_id: str, fields: Dict[str, Any]) -> bool:
+        with self._lock, self._transaction():
+            row = self._conn.execute(
+                f"SELECT id, created_at, doc FROM {collection} WHERE id = ?", (str(doc_id),)
+            ).fetchone()
+            if row is None:
+                return False
+            merged = {**self._load(row), **{k: v for k, v in fields.items() if k != "_id"}}
+            _, created_at, content_hash, body = self._dump(merged)
+            self._conn.execute(
+                f"UPDATE {collection} SET created_at = ?, content_hash = ?, doc = ? WHERE id = ?",
+                (created_at, content_hash, body, str(doc_id))
+            )
+            return True
+
+    def find_by_id(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute(
+            f"SELECT id, created_at, doc FROM {collection} WHERE id = ?", (str(doc_id),)
+        )
+        return self._load(rows[0]) if rows else None
+
+    def _where(self, filters: Optional[Dict[str, Any]]) -> Tuple[List[str], List[Any]]:
+        conditions, params = [], []
+        for field, value in (filters or {}).items():
+            if value is None:
+                conditions.append(f"{_json_path(field)} IS NULL")
+            else:
+                conditions.append(f"{_json_path(field)} = ?")
+                if isinstance(value, datetime):
+                    value = _timestamp(value)
+                params.append(str(value) if field == "_id" else value)
+        return conditions, params
+
+    def find(self, collection: str, filters: Optional[Dict[str, Any]] = None,
+             fields: Optional[List[str]] = None, limit: Optional[int] = None,
+             exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        conditions, params = self._where(filters)
+        return self._select(collection, conditions, params, fields, limit, exclude)
+
+    def find_containing(self, collection: str, field: str, values: List[Any],
+                        fields: Optional[List[str]] = None, limit: Optional[int] = None
+                        ) -> List[Dict[str, Any]]:
+        # Expression indexes can't reach inside arrays, so this scans the table
+        conditions = [f"EXISTS (SELECT 1 FROM json_each({collection}.doc, {_path(field)}) "
+                      f"AS element WHERE element.value = ?)"] * len(values)
+        return self._select(collection, conditions, list(values), fields, limit)
+
+    def _select(self, collection: str, conditions: List[str], params: List[Any],
+                fields: Optional[List[str]], limit: Optional[int],
+                exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        if fields:
+            select = self._select_projected(fields)
+        elif exclude:
+            # Dropped by SQLite, so the excluded values are never parsed in Python
+            select = f"id, created_at, json_remove(doc, {', '.join(map(_path, exclude))})"
+        else:
+            select = "id, created_at, doc"
+        sql = f"SELECT {select} FROM {collection}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        rows = self._execute(sql, params)
+        if fields:
+            return [self._load_projected(row, fields) for row in rows]
+        return [self._load(row) for row in rows]
+
+    def find_hashes(self, collection: str, hashes: Iterable[str]) -> Set[str]:
+        hashes = list(hashes)
+        if not hashes:
+            return set()
+        placeholders = ", ".join("?" * len(hashes))
+        rows = self._execute(
+            f"SELECT content_hash FROM {collection} WHERE content_hash IN ({placeholders})", hashes
+        )
+        return {row[0] for row in rows}
+
+    def page(self, collection: str, fields: List[str], cursor: Optional[str], page_size: int,
+             text_filters: Optional[TextFilters] = None,
+             score_range: ScoreRange = (None, None)) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        conditions, params = [], []
+        for field, value in (text_filters or {}).items():
+            if value:
+                conditions.append(f"instr(casefold({_json_path(field)}), ?) > 0")
+                params.append(value.casefold())
+        min_score, max_score = score_range
+        score = _json_path("overall_match_score")
+        if min_score is not None or max_score is not None:
+            # Only numbers compare against the bounds, as in MongoDB
+            conditions.append(_is_number("overall_match_score"))
+        if min_score is not None:
+            conditions.append(f"{score} >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append(f"{score} <= ?")
+            params.append(max_score)
+        if cursor:
+            # Keyset pagination: strictly after the last (created_at, id) already shown
+            created_at, last_id = decode_cursor(cursor)
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([_timestamp(created_at), _timestamp(created_at), last_id])
+
+        sql = f"SELECT {self._select_projected(fields)} FROM {collection}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        rows = self._execute(sql, params + [page_size + 1])
+        docs = [self._load_projected(row, fields) for row in rows]
+        next_cursor = encode_cursor(docs[page_size - 1]) if len(docs) > page_size else None
+        return docs[:page_size], next_cursor
+
+    def count(self, collection: str, filters: Optional[Dict[str, Any]] = None) -> int:
+        conditions, params = self._where(filters)
+        sql = f"SELECT COUNT(*) FROM {collection}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return self._execute(sql, params)[0][0]
+
+    def set_ttl(self, collection: str, seconds: Optional[int]):
+        """Expire documents past the TTL, deleting them on writes to the collection
+
+        SQLite has no background expiry, so expired documents are purged now and
+        then by the first write of each purge interval.
+        """
+        with self._lock:
+            if seconds is None:
+                self._ttls.pop(collection, None)
+                return
+            self._ttls[collection] = (seconds, 0.0)
+            self._purge_expired(collection, force=True)
+
+    def find_created_before(self, collection: str, cutoff: datetime,
+                            limit: int) -> List[Dict[str, Any]]:
+        rows = self._execute(
+            f"SELECT id, created_at, doc FROM {collection} WHERE created_at < ? "
+            f"ORDER BY created_at, id LIMIT ?",
+            (_timestamp(cutoff), limit)
+        )
+        return [self._load(row) for row in rows]
+
+    def delete_by_ids(self, collection: str, doc_ids: List[str]) -> int:
+        if not doc_ids:
+            return 0
+        placeholders = ", ".join("?" * len(doc_ids))
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {collection} WHERE id IN ({placeholders})",
+                [str(doc_id) for doc_id in doc_ids]
+            )
+            return cursor.rowcount
+
+    def insert_many(self, collection: str, docs: List[Dict[str, Any]]) -> int:
+        with self._lock, self._transaction():
+            before = self._conn.total_changes
+            # Duplicate IDs or content hashes mean the document is already stored
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO {collection} (id, created_at, content_hash, doc) "
+                f"VALUES (?, ?, ?, ?)",
+                [self._dump(doc) for doc in docs]
+            )
+            return self._conn.total_changes - before
+
+    def _analytics_where(self, filters: Optional[Dict[str, Any]], since: Optional[datetime],
+                         *extra: str) -> Tuple[str, List[Any]]:
+        conditions, params = self._where(filters)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(_timestamp(since))
+        conditions.extend(extra)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def top_values(self, collection: str, field: str, limit: int = 10,
+                   filters: Optional[Dict[str, Any]] = None,
+                   since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        # json_each walks array elements, or yields a lone value as a single row like $unwind
+        where, params = self._analytics_where(filters, since, "element.type = 'text'")
+        rows = self._execute(
+            f"SELECT lower(element.value) AS skill, COUNT(*) AS n, MIN(element.value) "
+            f"FROM {collection}, json_each({collection}.doc, {_path(field)}) AS element{where} "
+            f"GROUP BY skill ORDER BY n DESC, skill LIMIT ?",
+            params + [limit]
+        )
+        return [{"value": value, "count": count} for _, count, value in rows]
+
+    def histogram(self, collection: str, field: str, boundaries: List[float],
+                  filters: Optional[Dict[str, Any]] = None,
+                  since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        value = _json_path(field)
+        cases = " ".join(
+            f"WHEN {value} >= ? AND {value} < ? THEN {index}"
+            for index in range(len(boundaries) - 1)
+        )
+        bounds = [bound for pair in zip(boundaries, boundaries[1:]) for bound in pair]
+        where, params = self._analytics_where(filters, since, _is_number(field))
+        rows = self._execute(
+            f"SELECT CASE {cases} END AS bucket, COUNT(*) FROM {collection}{where} "
+            f"GROUP BY bucket",
+            bounds + params
+        )
+        return fill_histogram(boundaries, {bucket: n for bucket, n in rows if bucket is not None})
+
+    def group_stats(self, collection: str, group_field: str, value_field: str,
+                    filters: Optional[Dict[str, Any]] = None,
+                    since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        key = _json_path(group_field)
+        number = f"CASE WHEN {_is_number(value_field)} THEN {_json_path(value_field)} END"
+        where, params = self._analytics_where(filters, since)
+        rows = self._execute(
+            f"SELECT {key} AS key, COUNT(*) AS n, AVG({number}), MIN({number}), MAX({number}) "
+            f"FROM {collection}{where} GROUP BY key ORDER BY n DESC, key",
+            params
+        )
+        return [{"key": key, "count": n, "avg": avg, "min": low, "max": high}
+                for key, n, avg, low, high in rows]
+
+    def count_by_period(self, collection: str, period: str,
+                        filters: Optional[Dict[str, Any]] = None,
+                        since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period!r} (expected one of {PERIODS})")
+        where, params = self._analytics_where(filters, since)
+        rows = self._execute(
+            f"SELECT {_PERIOD_KEYS[period]} AS period, COUNT(*) FROM {collection}{where} "
+            f"GROUP BY period ORDER BY period",
+            params
+        )
+        return [{"period": period, "count": count} for period, count in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """Wraps writes in BEGIN/COMMIT, rolling back if they raise"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,312 @@
+"""Background tasks: agent work run by bounded worker pools, with its state in the database
+
+Pages submit a task and poll it by ID instead of blocking a script run on
+the agent. Each task type runs in a pool with a fixed number of worker
+threads, so e.g. scraping can't starve report generation. A task's status,
+progress message, partial results and outcome are saved in the ``tasks``
+collection as they change. Submitting a task identical to one that is still
+queued or running returns that task instead of starting another.
+"""
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from utils.config import TASK_QUEUE_LIMIT, TASK_WORKERS
+from utils.hashing import content_hash
+from utils.mongodb import JobAgentDB, _now, get_db
+from utils.tracing import span
+
+TASK_STATUSES = ("queued", "running", "done", "failed")
+ACTIVE_STATUSES = ("queued", "running")
+
+# Worker threads per pool when TASK_WORKERS doesn't say otherwise
+DEFAULT_POOL_SIZES = {"analysis": 2, "search": 1, "report": 2, "letter": 2}
+
+# progress(message, partial=None): record what a running task is doing and what it has so far
+Progress = Callable[..., None]
+
+
+class QueueFull(Exception):
+    """Raised when a pool already has as many unfinished tasks as it accepts"""
+
+    def __init__(self, pool: str, limit: int):
+        super().__init__(f"The {pool} queue is full ({limit} unfinished tasks), try again later")
+        self.pool = pool
+        self.limit = limit
+
+
+class TaskType(NamedTuple):
+    pool: str
+    # run(db, params, progress) -> result, saved on the task when it's done
+    run: Callable[[JobAgentDB, Dict[str, Any], Progress], Dict[str, Any]]
+
+
+def _analyze_cv(db: JobAgentDB, params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    from utils.pipeline import analyze_cv_pdf
+    progress("Analyzing CV")
+    try:
+        doc_id, _, cached = analyze_cv_pdf(db, params["pdf_path"],
+                                           params.get("force_refresh", False))
+    finally:
+        # The page saved the upload for this task only
+        if params.get("delete_pdf") and os.path.exists(params["pdf_path"]):
+            os.unlink(params["pdf_path"])
+    return {"collection": "cv_analyses", "id": doc_id, "cached": cached}
+
+
+def _analyze_job(db: JobAgentDB, params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    from utils.pipeline import analyze_job_url
+    progress("Scraping and analyzing job posting")
+    doc_id, _, cached = analyze_job_url(db, params["job_url"], params.get("force_refresh", False))
+    return {"collection": "job_analyses", "id": doc_id, "cached": cached}
+
+
+def _search_jobs(db: JobAgentDB, params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    from utils.pipeline import search_jobs
+    progress("Searching LinkedIn")
+    # The page shows each job as it's found, and the search is saved once it's complete
+    doc_id, results = search_jobs(db, params["filters"], on_results=lambda jobs: progress(
+        f"Searching LinkedIn, {len(jobs)} jobs found so far", partial=jobs
+    ))
+    return {"collection": "job_searches", "id": doc_id, "job_count": len(results)}
+
+
+def _generate_report(db: JobAgentDB, params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    from utils.pipeline import generate_suitability_report
+    progress("Generating suitability report")
+    doc_id, _ = generate_suitability_report(db, params["cv_id"], params["job_id"])
+    return {"collection": "suitability_reports", "id": doc_id}
+
+
+def _generate_letter(db: JobAgentDB, params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    from utils.pipeline import generate_cover_letter
+    progress("Writing cover letter")
+    doc_id, _ = generate_cover_letter(db, params["cv_id"], params["job_id"],
+                                      params.get("tone", "professional"))
+    return {"collection": "cover_letters", "id": doc_id}
+
+
+TASK_TYPES: Dict[str, TaskType] = {
+    "cv_analysis": TaskType("analysis", _analyze_cv),
+    "job_analysis": TaskType("analysis", _analyze_job),
+    "job_search": TaskType("search", _search_jobs),
+    "suitability_report": TaskType("report", _generate_report),
+    "cover_letter": TaskType("letter", _generate_letter),
+}
+
+
+def parse_pool_sizes(spec: str) -> Dict[str, int]:
+    """Parse worker counts written as "pool=workers", comma separated, over the defaults
+
+    e.g. "analysis=4,search=1"
+    """
+    sizes = dict(DEFAULT_POOL_SIZES)
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            pool, workers = entry.split("=", 1)
+            workers = int(workers)
+        except ValueError:
+            raise ValueError(f"Invalid task pool size {entry!r}, expected pool=workers")
+        pool = pool.strip()
+        if pool not in DEFAULT_POOL_SIZES:
+            raise ValueError(f"Unknown task pool {pool!r} in {entry!r}")
+        if workers < 1:
+            raise ValueError(f"A task pool needs at least one worker, got {entry!r}")
+        sizes[pool] = workers
+    return sizes
+
+
+def task_key(task_type: str, params: Dict[str, Any]) -> str:
+    """Get the dedup key of a task: equal for the same type and parameters"""
+    return content_hash(json.dumps([task_type, params], sort_keys=True, default=str))
+
+
+def _owner() -> Dict[str, Any]:
+    return {"host": socket.gethostname(), "pid": os.getpid()}
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TaskQueue:
+    """Runs tasks in per-pool worker threads, keeping their state in the database"""
+
+    def __init__(self, db: JobAgentDB, pool_sizes: Optional[Dict[str, int]] = None,
+                 task_types: Optional[Dict[str, TaskType]] = None,
+                 max_pending: int = TASK_QUEUE_LIMIT):
+        self.db = db
+        self.task_types = task_types if task_types is not None else TASK_TYPES
+        self.pool_sizes = pool_sizes or parse_pool_sizes(TASK_WORKERS)
+        # Unfinished tasks each pool accepts before submit raises QueueFull (0 for no limit)
+        self.max_pending = max_pending
+        self._executors = {
+            pool: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"task-{pool}")
+            for pool, workers in self.pool_sizes.items()
+        }
+        # Dedup key -> ID of the queued or running task submitted through this queue
+        self._active: Dict[str, str] = {}
+        self._pending = {pool: 0 for pool in self.pool_sizes}
+        # Task ID -> callbacks to call once it finishes, for every unfinished task
+        self._watchers: Dict[str, List[Callable[[], None]]] = {}
+        self._lock = threading.Lock()
+        self.fail_interrupted()
+
+    def submit(self, task_type: str, params: Dict[str, Any], key: Optional[str] = None) -> str:
+        """Queue a task, returning its ID, or the ID of an identical task not yet finished
+
+        key overrides the dedup key computed from the parameters, for parameters
+        such as temporary file paths that differ between identical submissions.
+        """
+        if task_type not in self.task_types:
+            raise ValueError(f"Unknown task type {task_type!r}")
+        key = key or task_key(task_type, params)
+        pool = self.task_types[task_type].pool
+        with self._lock:
+            task_id = self._active.get(key)
+            if task_id is not None:
+                return task_id
+            if self.max_pending and self._pending[pool] >= self.max_pending:
+                raise QueueFull(pool, self.max_pending)
+            task_id = self.db.save_task({
+                "task_type": task_type,
+                "task_key": key,
+                "params": params,
+                "status": "queued",
+                "progress": None,
+                "partial": None,
+                "result": None,
+                "error": None,
+                "owner": _owner(),
+            })
+            self._active[key] = task_id
+            self._pending[pool] += 1
+            self._watchers[task_id] = []
+        try:
+            self._executors[pool].submit(self._run, task_id, key, task_type, params)
+        except BaseException as e:
+            # e.g. after shutdown: the task never runs, so it mustn't stay active or pending
+            with self._lock:
+                self._active.pop(key, None)
+                self._pending[pool] -= 1
+                watchers = self._watchers.pop(task_id, [])
+            self.db.update_task(task_id, {"status": "failed", "finished_at": _now(),
+                                          "error": str(e) or type(e).__name__})
+            for callback in watchers:
+                callback()
+            raise
+        return task_id
+
+    def _run(self, task_id: str, key: str, task_type: str, params: Dict[str, Any]):
+        def progress(message: str, partial: Any = None):
+            fields = {"progress": message}
+            if partial is not None:
+                fields["partial"] = partial
+            self.db.update_task(task_id, fields)
+
+        try:
+            self.db.update_task(task_id, {"status": "running", "started_at": _now()})
+            try:
+                with span(f"task.{task_type}", task_id=task_id):
+                    result = self.task_types[task_type].run(self.db, params, progress)
+                outcome = {"status": "done", "result": result}
+            except Exception as e:
+                outcome = {"status": "failed", "error": str(e) or type(e).__name__}
+            self.db.update_task(task_id, {**outcome, "finished_at": _now()})
+        finally:
+            # Only once the outcome is saved, so a resubmission never finds an unfinished copy
+            with self._lock:
+                self._active.pop(key, None)
+                self._pending[self.task_types[task_type].pool] -= 1
+                watchers = self._watchers.pop(task_id, [])
+            for callback in watchers:
+                callback()
+
+    def on_finished(self, task_id: str, callback: Callable[[], None]) -> bool:
+        """Call callback from a worker thread once a task of this queue finishes
+
+        Returns False without registering it when the task isn't unfinished in
+        this queue, e.g. because it has finished already.
+        """
+        with self._lock:
+            if task_id not in self._watchers:
+                return False
+            self._watchers[task_id].append(callback)
+            return True
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get the current state of a task"""
+        return self.db.get_task_by_id(task_id)
+
+    def fail_interrupted(self) -> int:
+        """Mark the unfinished tasks of processes on this host that have exited as failed
+
+        Their worker threads died with them, so nobody would ever finish them.
+        Returns how many were marked.
+        """
+        host = socket.gethostname()
+        marked = 0
+        for status in ACTIVE_STATUSES:
+            for task in self.db.get_tasks(status):
+                owner = task.get("owner") or {}
+                if owner.get("host") != host or _is_running(owner.get("pid", 0)):
+                    continue
+                self.db.update_task(str(task["_id"]), {
+                    "status": "failed", "error": "Interrupted before it finished",
+                    "finished_at": _now(),
+                })
+                marked += 1
+        return marked
+
+    def active_count(self) -> int:
+        """Count the tasks queued or running in this queue"""
+        with self._lock:
+            return len(self._active)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the workers and unfinished tasks of every pool"""
+        with self._lock:
+            return {pool: {"workers": workers, "pending": self._pending[pool]}
+                    for pool, workers in self.pool_sizes.items()}
+
+    def shutdown(self, wait: bool = True):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
+
+
+_queue: Optional[TaskQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_task_queue() -> TaskQueue:
+    """Get the process-wide task queue, so every Streamlit session shares its pools"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = TaskQueue(get_db())
+    return _queue
+
+
+def result_document(db: JobAgentDB, task: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Load the document a finished task saved, if any"""
+    result = task.get("result") or {}
+    if not result.get("id"):
+        return None
+    getters: Dict[str, Callable[[str], Optional[Dict[str, Any]]]] = {
+        "cv_analyses": db.get_cv_analysis_by_id,
+        "job_analyses": db.get_job_analysis_by_id,
+        "job_searches": db.get_job_search_by_id,
+        "suitability_reports": db.get_suitability_report_by_id,
+        "cover_letters": db.get_cover_letter_by_id,
+    }
+    return getters[result["collection"]](result["id"])
@@ -0,0 +1,235 @@
+"""Lightweight tracing: nested, timed spans exported as JSON lines
+
+A span times one piece of work and carries attributes such as sizes, token
+counts and cache hits. Spans opened while another is open in the same thread
+become its children, so one task's scrape, LLM and database calls form a
+single trace. Finished spans are written one JSON object per line to
+TRACE_FILE; with TRACE_FILE empty, tracing is off and spans cost a check.
+"""
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils.config import TRACE_FILE
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = 0.0
+
+    def set(self, **attributes: Any):
+        """Add attributes, e.g. sizes known only once the work is done"""
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+            "thread": threading.current_thread().name,
+        }
+
+
+class JsonlExporter:
+    """Appends finished spans to a JSON lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Dict[str, Any]):
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line)
+
+
+class MemoryExporter:
+    """Keeps finished spans in a list, for tests"""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, span: Dict[str, Any]):
+        self.spans.append(span)
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Opens spans and hands them to an exporter when they finish; disabled without one"""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Time the enclosed block as a child of the current span, yielding None when disabled"""
+        if self.exporter is None:
+            yield None
+            return
+        span = Span(name, _current.get(), attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            span.finish()
+            try:
+                self.exporter.export(span.to_dict())
+            except Exception:
+                # Tracing must never break the work it measures
+                pass
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer, exporting to TRACE_FILE when it's set"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(JsonlExporter(TRACE_FILE) if TRACE_FILE else None)
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """Open a span with the process-wide tracer"""
+    return get_tracer().span(name, **attributes)
+
+
+def annotate(**attributes: Any):
+    """Add attributes to the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def _result_size(result: Any) -> Optional[int]:
+    if isinstance(result, (list, set)):
+        return len(result)
+    # Pages come back as (documents, next cursor)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    return None
+
+
+def traced(name: str, nested_only: bool = False) -> Callable:
+    """Run the decorated function in a span, recording how many items it returned
+
+    With nested_only, calls made outside any span run untraced rather than
+    each starting a trace of its own.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled or (nested_only and _current.get() is None):
+                return fn(*args, **kwargs)
+            with tracer.span(name) as current:
+                result = fn(*args, **kwargs)
+                size = _result_size(result)
+                if size is not None:
+                    current.set(results=size)
+                return result
+        return wrapper
+    return decorator
+
+
+def trace_methods(prefix: str, nested_only: bool = False) -> Callable[[type], type]:
+    """Class decorator tracing every public method as "prefix.method_name"; see traced"""
+    def decorator(cls: type) -> type:
+        for attr_name, attr in list(vars(cls).items()):
+            if callable(attr) and not attr_name.startswith("_"):
+                setattr(cls, attr_name, traced(f"{prefix}.{attr_name}", nested_only)(attr))
+        return cls
+    return decorator
+
+
+def read_traces(path: str = TRACE_FILE, max_spans: int = 20000) -> List[List[Dict[str, Any]]]:
+    """Read the last max_spans spans of a trace file, grouped by trace, newest trace first"""
+    if not path or not os.path.exists(path):
+        return []
+    lines: deque = deque(maxlen=max_spans)
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                lines.append(line)
+
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for line in lines:
+        try:
+            span_dict = json.loads(line)
+        except ValueError:
+            # A line cut short while being written
+            continue
+        traces.setdefault(span_dict["trace_id"], []).append(span_dict)
+    for spans in traces.values():
+        spans.sort(key=lambda s: s["start"])
+    return sorted(traces.values(), key=lambda spans: spans[0]["start"], reverse=True)
+
+
+def waterfall_rows(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order a trace's spans depth-first for a waterfall
+
+    Each row gets its depth, its offset from the start of the trace and its
+    self time, the part of its duration not spent in child spans.
+    """
+    if not spans:
+        return []
+    ids = {s["span_id"] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        # Spans whose parent was cut off by max_spans show as roots
+        parent = s["parent_id"] if s["parent_id"] in ids else None
+        children.setdefault(parent, []).append(s)
+    trace_start = min(s["start"] for s in spans)
+
+    rows: List[Dict[str, Any]] = []
+
+    def visit(parent: Optional[str], depth: int):
+        for s in sorted(children.get(parent, []), key=lambda s: s["start"]):
+            child_ms = sum(c["duration_ms"] for c in children.get(s["span_id"], []))
+            rows.append({**s, "depth": depth,
+                         "offset_ms": round((s["start"] - trace_start) * 1000, 3),
+                         "self_ms": round(max(s["duration_ms"] - child_ms, 0.0), 3)})
+            visit(s["span_id"], depth + 1)
+
+    visit(None, 0)
+    return rows
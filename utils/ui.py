@@ -0,0 +1,161 @@
+import streamlit as st
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PAGE_SIZES = [10, 25, 50, 100]
+# How often a page showing an unfinished background task checks on it
+TASK_POLL_SECONDS = 1.0
+
+# fetch_page(cursor, page_size) -> (documents, next_cursor)
+PageFetcher = Callable[[Optional[str], int], Tuple[List[Dict[str, Any]], Optional[str]]]
+
+
+def format_created_at(doc: Dict[str, Any]) -> str:
+    return doc["created_at"].strftime("%Y-%m-%d %H:%M:%S")
+
+
+def cv_label(doc: Dict[str, Any]) -> str:
+    name = doc.get("personal_info", {}).get("name", "Unknown")
+    return f"{format_created_at(doc)} - {name}"
+
+
+def job_label(doc: Dict[str, Any]) -> str:
+    job_title = doc.get("job_title", "Unknown")
+    company = doc.get("company", "Unknown")
+    removed = " (removed)" if doc.get("posting_status") == "removed" else ""
+    return f"{format_created_at(doc)} - {job_title} at {company}{removed}"
+
+
+def job_search_label(doc: Dict[str, Any]) -> str:
+    job_title = doc.get("filters", {}).get("job_title", "Unknown")
+    job_count = doc.get("job_count", 0)
+    return f"{format_created_at(doc)} - {job_title} ({job_count} jobs)"
+
+
+def report_label(doc: Dict[str, Any]) -> str:
+    cv_name = doc.get("cv_name", "Unknown")
+    job_title = doc.get("job_title", "Unknown")
+    company = doc.get("company", "Unknown")
+    score = doc.get("overall_match_score", 0)
+    return f"{format_created_at(doc)} - {cv_name} for {job_title} at {company} ({score}%)"
+
+
+def letter_label(doc: Dict[str, Any]) -> str:
+    cv_name = doc.get("cv_name", "Unknown")
+    job_title = doc.get("job_title", "Unknown")
+    company = doc.get("company", "Unknown")
+    tone = doc.get("tone", "professional")
+    return f"{format_created_at(doc)} - {cv_name} for {job_title} at {company} ({tone})"
+
+
+def paginated_selectbox(key: str, label: str, fetch_page: PageFetcher,
+                        format_label: Callable[[Dict[str, Any]], str],
+                        filters: Optional[Dict[str, Any]] = None,
+                        empty_message: str = "Nothing found.") -> Optional[Tuple[str, str]]:
+    """Render a selectbox over one page of history with newer/older navigation
+
+    Only the current page is queried, and only labels and IDs are kept in the
+    session. Returns the selected (label, document ID), or None if the page is empty.
+    """
+    page_size = st.selectbox("Page size", PAGE_SIZES, key=f"{key}_page_size")
+
+    # Start again from the newest page whenever the filters or page size change
+    signature = (page_size, tuple(sorted((filters or {}).items())))
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+
+    docs, next_cursor = fetch_page(cursors[-1], page_size)
+    if not docs:
+        filtered = any(value for value in (filters or {}).values())
+        st.info("No matching entries found." if filtered else empty_message)
+        return None
+
+    options = [(format_label(doc), str(doc["_id"])) for doc in docs]
+    selected = st.selectbox(label, options, format_func=lambda x: x[0], key=f"{key}_selected")
+
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        st.button("◀ Newer", key=f"{key}_newer", disabled=len(cursors) == 1,
+                  on_click=cursors.pop)
+    with col2:
+        st.button("Older ▶", key=f"{key}_older", disabled=next_cursor is None,
+                  on_click=cursors.append, args=(next_cursor,))
+    with col3:
+        st.caption(f"Page {len(cursors)}")
+    return selected
+
+
+def task_session_key(prefix: str, *inputs: Any) -> str:
+    """Get the session key remembering the task for one set of page inputs
+
+    Each input combination keeps its own task, so switching back to earlier
+    inputs shows their result again instead of generating it anew.
+    """
+    return "|".join([prefix, *(str(value) for value in inputs)])
+
+
+def sticky_button(label: str, key: str, value: Any) -> bool:
+    """A button that stays pressed across reruns for as long as value is unchanged"""
+    pressed_key = f"{key}_pressed"
+    if st.button(label, key=key):
+        st.session_state[pressed_key] = value
+    return pressed_key in st.session_state and st.session_state[pressed_key] == value
+
+
+def submit_task(session_key: str, task_type: str, params: Dict[str, Any],
+                key: Optional[str] = None) -> Optional[str]:
+    """Queue a background task and remember its ID in the session under session_key
+
+    Returns None, with a warning shown, when the task's pool is full.
+    """
+    from utils.tasks import QueueFull, get_task_queue
+    try:
+        task_id = get_task_queue().submit(task_type, params, key)
+    except QueueFull as e:
+        st.warning(str(e))
+        return None
+    st.session_state[session_key] = task_id
+    return task_id
+
+
+def task_outcome(session_key: str, error_prefix: str,
+                 render_partial: Optional[Callable[[Any], None]] = None
+                 ) -> Optional[Dict[str, Any]]:
+    """Show the progress of the session's task under session_key, returning it once done
+
+    While the task is queued or running its progress (and any partial result,
+    through render_partial) is refreshed every TASK_POLL_SECONDS without
+    rerunning the page; a failed task is shown as an error.
+    """
+    task_id = st.session_state.get(session_key)
+    if not task_id:
+        return None
+    from utils.mongodb import db
+    from utils.tasks import ACTIVE_STATUSES
+    task = db.get_task_by_id(task_id)
+    if task is None:
+        return None
+    if task["status"] in ACTIVE_STATUSES:
+        _task_progress(task_id, render_partial)
+        return None
+    if task["status"] == "failed":
+        st.error(f"{error_prefix}: {task.get('error')}")
+        return None
+    return task
+
+
+@st.fragment(run_every=TASK_POLL_SECONDS)
+def _task_progress(task_id: str, render_partial: Optional[Callable[[Any], None]]):
+    from utils.mongodb import db
+    from utils.tasks import ACTIVE_STATUSES
+    task = db.get_task_by_id(task_id)
+    if task is None or task["status"] not in ACTIVE_STATUSES:
+        # Finished: rerun the whole page so it renders the outcome
+        st.rerun()
+    if task["status"] == "queued":
+        st.info("⏳ Waiting for a free worker...")
+    else:
+        st.info(f"⏳ {task.get('progress') or 'Working'}...")
+    if render_partial and task.get("partial") is not None:
+        render_partial(task["partial"])